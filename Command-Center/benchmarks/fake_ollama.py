@@ -0,0 +1,310 @@
+# fake_ollama.py
+#
+# A stand-in for the Ollama REST API that streams deterministic tokens at a
+# configurable pace, so the inference benchmarks (and anything else talking to
+# Ollama) can run offline and without a GPU:
+#
+#   python -m benchmarks.fake_ollama --port 11500 --num-parallel 2
+#
+# Requests beyond `num_parallel` wait for a slot, like OLLAMA_NUM_PARALLEL,
+# and a model that is not loaded pays `load_seconds` on its first request.
+
+import argparse
+import hashlib
+import json
+import random
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.synthetic_pdf import WORDS
+
+DEFAULT_MODELS = {"llama3.2:3b": 2_019_393_189, "qwen2.5:7b": 4_683_087_332}
+FOREVER = "2318-01-01T00:00:00+00:00"     # What Ollama reports for keep_alive -1.
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeOllamaServer:
+    """
+    Serves /api/generate, /api/chat (streamed or not), /api/embed, /api/tags,
+    /api/ps, /api/show, /api/version and a short streamed /api/pull. Token
+    timing is `prompt_seconds` before the first token, then `tokens_per_second`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, tokens_per_second=50.0, prompt_seconds=0.05,
+                 load_seconds=0.2, num_parallel=1, max_tokens=64, models=None, seed=0):
+        self.host = host
+        self.port = port
+        self.tokens_per_second = tokens_per_second
+        self.prompt_seconds = prompt_seconds
+        self.load_seconds = load_seconds
+        self.max_tokens = max_tokens
+        self.models = dict(models or DEFAULT_MODELS)
+        self.seed = seed
+        self.slots = threading.BoundedSemaphore(num_parallel)
+        self.loaded = {}            # model -> expiry (time.time()), None while it stays loaded forever
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -------------------------
+    # Model state
+    # -------------------------
+    def _load(self, model, keep_alive):
+        """Returns the load time paid by this request."""
+        with self._lock:
+            now = time.time()
+            expiry = self.loaded.get(model, 0)
+            was_loaded = model in self.loaded and (expiry is None or expiry > now)
+        seconds = 0.0 if was_loaded else self.load_seconds
+        if seconds:
+            time.sleep(seconds)
+        with self._lock:
+            keep = self._keep_alive_seconds(keep_alive)
+            if keep == 0:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded[model] = None if keep < 0 else time.time() + keep
+        return seconds
+
+    @staticmethod
+    def _keep_alive_seconds(value):
+        if value is None:
+            return 300.0
+        if isinstance(value, (int, float)):
+            return float(value)
+        units = {"s": 1, "m": 60, "h": 3600}
+        value = str(value).strip()
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+
+    def running(self):
+        with self._lock:
+            now = time.time()
+            return {model: expiry for model, expiry in self.loaded.items() if expiry is None or expiry > now}
+
+    def tokens_for(self, prompt, limit):
+        rng = random.Random(f"{self.seed}:{prompt}")
+        count = min(limit, max(4, len(prompt.split()) * 2))
+        return [(" " if i else "") + rng.choice(WORDS) for i in range(count)]
+
+    # -------------------------
+    # HTTP
+    # -------------------------
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._json({"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    self._json({"models": [
+                        {"name": name, "model": name, "size": size, "modified_at": _now_iso(),
+                         "digest": hashlib.sha256(f"{name}:{size}".encode()).hexdigest(),
+                         "details": {"family": name.split(":")[0], "parameter_size": name.split(":")[-1].upper(),
+                                     "quantization_level": "Q4_K_M"}}
+                        for name, size in server.models.items()
+                    ]})
+                elif self.path == "/api/ps":
+                    models = []
+                    for name, expiry in server.running().items():
+                        size = server.models.get(name, 0)
+                        expires = FOREVER
+                        if expiry is not None:
+                            expires = datetime.fromtimestamp(expiry, timezone.utc).isoformat()
+                        models.append({"name": name, "model": name, "size": size, "size_vram": size,
+                                       "expires_at": expires})
+                    self._json({"models": models})
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def do_DELETE(self):
+                body = self._body()
+                if server.models.pop(body.get("model") or body.get("name"), None) is None:
+                    self._json({"error": "model not found"}, 404)
+                else:
+                    self._json({})
+
+            def do_POST(self):
+                body = self._body()
+                if self.path in ("/api/generate", "/api/chat"):
+                    self._generate(body, chat=self.path == "/api/chat")
+                elif self.path == "/api/embed":
+                    self._embed(body)
+                elif self.path == "/api/show":
+                    name = body.get("model") or body.get("name")
+                    if name not in server.models:
+                        self._json({"error": f"model '{name}' not found"}, 404)
+                    else:
+                        self._json({"details": {"parameter_size": name.split(":")[-1].upper(),
+                                                "quantization_level": "Q4_K_M"},
+                                    "model_info": {"general.parameter_count": server.models[name] * 2}})
+                elif self.path == "/api/pull":
+                    self._pull(body)
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def _start_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+            def _line(self, payload):
+                self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+            def _pull(self, body):
+                name = body.get("model") or body.get("name")
+                self._start_stream()
+                self._line({"status": "pulling manifest"})
+                total = 1000
+                for completed in range(0, total + 1, 250):
+                    self._line({"status": "pulling layer", "digest": "sha256:fake", "total": total,
+                                "completed": completed})
+                    time.sleep(0.01)
+                server.models.setdefault(name, total)
+                self._line({"status": "success"})
+
+            def _embed(self, body):
+                model = body.get("model")
+                if model not in server.models:
+                    self._json({"error": f"model '{model}' not found"}, 404)
+                    return
+                texts = body.get("input")
+                texts = [texts] if isinstance(texts, str) else list(texts or ())
+                load = server._load(model, body.get("keep_alive"))
+                embeddings = []
+                for text in texts:
+                    rng = random.Random(f"{server.seed}:{text}")
+                    embeddings.append([round(rng.uniform(-1, 1), 6) for _ in range(8)])
+                self._json({"model": model, "embeddings": embeddings, "load_duration": int(load * 1e9)})
+
+            def _generate(self, body, chat):
+                model = body.get("model")
+                if model not in server.models:
+                    self._json({"error": f"model '{model}' not found"}, 404)
+                    return
+                with server._lock:
+                    server.requests += 1
+                if chat:
+                    prompt = " ".join(m.get("content", "") for m in body.get("messages") or ())
+                else:
+                    prompt = body.get("prompt", "")
+                if not prompt and not chat:
+                    # An empty prompt only loads (or, with keep_alive 0, unloads) the model.
+                    load = server._load(model, body.get("keep_alive"))
+                    self._json({"model": model, "created_at": _now_iso(), "response": "", "done": True,
+                                "done_reason": "load" if body.get("keep_alive") != 0 else "unload",
+                                "load_duration": int(load * 1e9)})
+                    return
+                options = body.get("options") or {}
+                limit = options.get("num_predict")
+                limit = server.max_tokens if limit is None or limit < 0 else min(limit, server.max_tokens)
+                started = time.perf_counter()
+                with server.slots:
+                    load = server._load(model, body.get("keep_alive"))
+                    time.sleep(server.prompt_seconds)
+                    prompt_done = time.perf_counter()
+                    tokens = server.tokens_for(prompt, limit)
+                    stream = body.get("stream", True)
+                    if stream:
+                        self._start_stream()
+                    for token in tokens:
+                        if stream:
+                            self._line(self._chunk(model, token, chat))
+                        time.sleep(1.0 / server.tokens_per_second)
+                finished = time.perf_counter()
+                final = self._chunk(model, "" if stream else "".join(tokens), chat)
+                final.update({
+                    "done": True, "done_reason": "stop" if len(tokens) < limit else "length",
+                    "total_duration": int((finished - started) * 1e9), "load_duration": int(load * 1e9),
+                    "prompt_eval_count": len(prompt.split()),
+                    "prompt_eval_duration": int(server.prompt_seconds * 1e9),
+                    "eval_count": len(tokens), "eval_duration": int((finished - prompt_done) * 1e9),
+                })
+                if stream:
+                    self._line(final)
+                else:
+                    self._json(final)
+
+            @staticmethod
+            def _chunk(model, text, chat):
+                chunk = {"model": model, "created_at": _now_iso(), "done": False}
+                if chat:
+                    chunk["message"] = {"role": "assistant", "content": text}
+                else:
+                    chunk["response"] = text
+                return chunk
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server that streams synthetic tokens.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prompt-seconds", type=float, default=0.05, help="Delay before the first token")
+    parser.add_argument("--load-seconds", type=float, default=0.2, help="Cold-load delay of a model")
+    parser.add_argument("--num-parallel", type=int, default=1, help="Requests served at once")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(
+        args.host, args.port, args.tokens_per_second, args.prompt_seconds, args.load_seconds,
+        args.num_parallel, args.max_tokens
+    ).start()
+    print(f"Fake Ollama listening on {server.url}")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# ollama_bench.py
+#
+# Streaming inference benchmark for the Ollama service. Replays a prompt set
+# against /api/generate or /api/chat at increasing concurrency and records
+# time-to-first-token, inter-token latency, tokens/sec and latency
+# percentiles, next to the CPU/GPU load sampled while each level ran. Results
+# are written as JSON and can be compared against a previous run, e.g. one
+# taken with another OLLAMA_NUM_PARALLEL, quantization or num_ctx:
+#
+#   python -m benchmarks.ollama_bench --model llama3.2:3b -o q4.json --label "q4, parallel 2"
+#   python -m benchmarks.ollama_bench --model llama3.2:3b-q8_0 -o q8.json --baseline q4.json
+#   python -m benchmarks.ollama_bench --fake        # against benchmarks.fake_ollama, no GPU needed
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import OLLAMA_URL
+from inference.ollama_client import OllamaClient, OllamaError
+from monitors.resource_sampler import ResourceSampler
+
+DEFAULT_CONCURRENCY = (1, 2, 4, 8)
+DEFAULT_ENDPOINTS = ("generate",)
+REGRESSION_THRESHOLD = 0.10     # Relative tokens/sec drop (or p95 TTFT rise) reported as a regression.
+SAMPLE_INTERVAL = 0.5           # Seconds between CPU/GPU samples during a level.
+
+DEFAULT_PROMPTS = (
+    "Explain what a context window is in two sentences.",
+    "Write a haiku about container orchestration.",
+    "List five practical uses of text embeddings.",
+    "Summarize the difference between quantization levels Q4 and Q8.",
+    "Give a short checklist for debugging a slow REST API.",
+    "Describe how a GPU speeds up matrix multiplication.",
+    "What is retrieval augmented generation? Answer briefly.",
+    "Translate 'the model is loading' into French, German and Spanish.",
+)
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {"mean": statistics.fmean(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "p99": percentile(values, 99), "max": max(values)}
+
+
+def load_prompts(path):
+    """One prompt per line, or JSON lines with a "prompt" (or chat "messages") field."""
+    prompts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                prompts.append(record.get("prompt") or record["messages"])
+            else:
+                prompts.append(line)
+    return prompts
+
+
+# -------------------------
+# Requests
+# -------------------------
+def build_payload(endpoint, model, prompt, options, keep_alive):
+    payload = {"model": model, "stream": True, "options": options}
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    if endpoint == "chat":
+        payload["messages"] = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+    else:
+        payload["prompt"] = prompt if isinstance(prompt, str) else "\n".join(m["content"] for m in prompt)
+    return payload
+
+
+def timed_request(client, endpoint, payload):
+    """Streams one request and returns its timing record."""
+    started = time.perf_counter()
+    token_times = []
+    final = {}
+    try:
+        for message in client.stream(f"/api/{endpoint}", payload):
+            now = time.perf_counter()
+            text = message.get("response") if endpoint == "generate" else (message.get("message") or {}).get("content")
+            if text:
+                token_times.append(now)
+            if message.get("done"):
+                final = message
+    except OllamaError as e:
+        return {"error": str(e), "latency": time.perf_counter() - started}
+    finished = time.perf_counter()
+    gaps = [b - a for a, b in zip(token_times, token_times[1:])]
+    tokens = final.get("eval_count") or len(token_times)
+    decode = token_times[-1] - token_times[0] if len(token_times) > 1 else None
+    eval_duration = final.get("eval_duration")
+    return {
+        "error": None,
+        "latency": finished - started,
+        "ttft": token_times[0] - started if token_times else None,
+        "itl": gaps,
+        "tokens": tokens,
+        # Client-side decode rate (chunks after the first) and the server's own figure.
+        "tokens_per_sec": (len(token_times) - 1) / decode if decode else None,
+        "server_tokens_per_sec": tokens / (eval_duration / 1e9) if eval_duration else None,
+        "load_seconds": final["load_duration"] / 1e9 if final.get("load_duration") else 0.0,
+        "prompt_tokens": final.get("prompt_eval_count"),
+    }
+
+
+def summarize_resources(samples):
+    if not samples:
+        return None
+    summary = {"samples": len(samples),
+               "cpu_mean": statistics.fmean(s.cpu for s in samples), "cpu_max": max(s.cpu for s in samples),
+               "memory_max": max(s.memory for s in samples), "gpus": []}
+    indices = sorted({gpu.index for s in samples for gpu in s.gpus or ()})
+    for index in indices:
+        readings = [gpu for s in samples for gpu in s.gpus or () if gpu.index == index]
+        loads = [gpu.load for gpu in readings if gpu.load is not None]
+        used = [gpu.memory_used for gpu in readings if gpu.memory_used is not None]
+        summary["gpus"].append({
+            "index": index,
+            "load_mean": statistics.fmean(loads) if loads else None,
+            "load_max": max(loads) if loads else None,
+            "memory_used_max_mb": max(used) if used else None,
+            "memory_total_mb": readings[-1].memory_total,
+        })
+    return summary
+
+
+def run_level(client, endpoint, model, prompts, concurrency, requests, options, keep_alive, sample_interval):
+    """Runs `requests` prompts with `concurrency` in flight and returns the level's result dict."""
+    samples = []
+    sampler = ResourceSampler(samples.append, interval=sample_interval, gpu_interval=sample_interval,
+                              process_interval=0).start()
+    payloads = [build_payload(endpoint, model, prompts[i % len(prompts)], options, keep_alive)
+                for i in range(requests)]
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            records = list(executor.map(lambda payload: timed_request(client, endpoint, payload), payloads))
+        wall = time.perf_counter() - started
+    finally:
+        sampler.stop()
+
+    ok = [record for record in records if not record["error"]]
+    tokens = sum(record["tokens"] for record in ok)
+    return {
+        "name": f"{endpoint}/c{concurrency}",
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(records) - len(ok),
+        "error_samples": sorted({record["error"] for record in records if record["error"]})[:3],
+        "seconds": wall,
+        "tokens": tokens,
+        # Aggregate generation rate over the whole level: what the server delivers in total.
+        "tokens_per_sec": tokens / wall if wall else None,
+        "requests_per_sec": len(ok) / wall if wall else None,
+        "ttft": summarize([record["ttft"] for record in ok if record["ttft"] is not None]),
+        "itl": summarize([gap for record in ok for gap in record["itl"]]),
+        "latency": summarize([record["latency"] for record in ok]),
+        "request_tokens_per_sec": summarize(
+            [record["tokens_per_sec"] for record in ok if record["tokens_per_sec"]]),
+        "server_tokens_per_sec": summarize(
+            [record["server_tokens_per_sec"] for record in ok if record["server_tokens_per_sec"]]),
+        "cold_loads": sum(1 for record in ok if record["load_seconds"] > 0.05),
+        "resources": summarize_resources(samples),
+    }
+
+
+def _ms(stats, key):
+    return stats[key] * 1000 if stats else 0.0
+
+
+def run_suite(client, endpoints, model, prompts, concurrency_levels, requests_per_level, options, keep_alive,
+              sample_interval=SAMPLE_INTERVAL):
+    results = []
+    for endpoint in endpoints:
+        for concurrency in concurrency_levels:
+            requests = requests_per_level or max(len(prompts), concurrency * 2)
+            result = run_level(client, endpoint, model, prompts, concurrency, requests, options, keep_alive,
+                               sample_interval)
+            resources = result["resources"] or {}
+            gpu = ", ".join(f"gpu{g['index']} {g['load_mean'] or 0:.0f}%" for g in resources.get("gpus", ()))
+            print(f"{result['name']:<16} {result['tokens_per_sec'] or 0:>8.1f} tok/s  "
+                  f"ttft p50 {_ms(result['ttft'], 'p50'):>6.0f} ms p95 {_ms(result['ttft'], 'p95'):>6.0f} ms  "
+                  f"itl p95 {_ms(result['itl'], 'p95'):>5.1f} ms  errors {result['errors']}  "
+                  f"cpu {resources.get('cpu_mean', 0):.0f}% {gpu}")
+            results.append(result)
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints tokens/sec and TTFT changes against a baseline run; returns the names of regressed levels."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    label = baseline.get("meta", {}).get("label") or "baseline"
+    print(f"\nCompared with {label}:")
+    print(f"{'level':<16} {'tok/s before':>12} {'after':>8} {'change':>8} "
+          f"{'ttft p95 before':>16} {'after':>8} {'change':>8}")
+    for result in results:
+        before = previous.get(result["name"])
+        if not before or not before.get("tokens_per_sec") or not result["tokens_per_sec"]:
+            continue
+        change = result["tokens_per_sec"] / before["tokens_per_sec"] - 1
+        ttft_before, ttft_after = _ms(before["ttft"], "p95"), _ms(result["ttft"], "p95")
+        ttft_change = ttft_after / ttft_before - 1 if ttft_before else 0.0
+        flag = ""
+        if change < -threshold or ttft_change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["name"])
+        print(f"{result['name']:<16} {before['tokens_per_sec']:>12.1f} {result['tokens_per_sec']:>8.1f} "
+              f"{change:>+7.1%} {ttft_before:>16.0f} {ttft_after:>8.0f} {ttft_change:>+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Ollama streaming inference at increasing concurrency.")
+    parser.add_argument("--url", default=OLLAMA_URL, help="Ollama base URL")
+    parser.add_argument("--model", help="Model to benchmark (default: first installed model)")
+    parser.add_argument("--endpoints", nargs="+", default=list(DEFAULT_ENDPOINTS), choices=("generate", "chat"))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--requests", type=int, help="Requests per level (default: max(prompts, 2 x concurrency))")
+    parser.add_argument("--prompts", help="Prompt file: one prompt per line or JSON lines")
+    parser.add_argument("--num-predict", type=int, default=128, help="Maximum tokens per response")
+    parser.add_argument("--num-ctx", type=int, help="Context size passed in the request options")
+    parser.add_argument("--options", help="Extra request options as JSON, e.g. '{\"temperature\": 0}'")
+    parser.add_argument("--keep-alive", default="10m", help="keep_alive sent with every request")
+    parser.add_argument("--no-warmup", action="store_true", help="Don't load the model before the first level")
+    parser.add_argument("--label", help="Free-text description of the setup, stored with the results")
+    parser.add_argument("-o", "--output", default="ollama_bench.json", help="Results JSON file")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative change counted as a regression")
+    parser.add_argument("--fake", action="store_true", help="Run against a local benchmarks.fake_ollama server")
+    args = parser.parse_args(argv)
+
+    fake = None
+    if args.fake:
+        from benchmarks.fake_ollama import FakeOllamaServer
+        fake = FakeOllamaServer(num_parallel=2, tokens_per_second=200.0).start()
+        args.url = fake.url
+    client = OllamaClient(args.url)
+    try:
+        model = args.model or next(iter(client.list_models()), None)
+        if model is None:
+            print(f"No models installed at {args.url}; pass --model.")
+            return 1
+        model = getattr(model, "name", model)
+        prompts = load_prompts(args.prompts) if args.prompts else list(DEFAULT_PROMPTS)
+        options = {"num_predict": args.num_predict}
+        if args.num_ctx:
+            options["num_ctx"] = args.num_ctx
+        if args.options:
+            options.update(json.loads(args.options))
+
+        if not args.no_warmup:
+            # The first request otherwise pays the model load and skews the c1 TTFT.
+            client.load(model, args.keep_alive)
+        print(f"Benchmarking {model} at {args.url}")
+        results = run_suite(client, args.endpoints, model, prompts, args.concurrency, args.requests, options,
+                            args.keep_alive)
+        try:
+            server_version = client.version()
+        except OllamaError:
+            server_version = None
+        loaded = [m._asdict() for m in client.running_models() if m.name == model]
+    finally:
+        if fake:
+            fake.stop()
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "label": args.label,
+            "url": args.url,
+            "model": model,
+            "server_version": server_version,
+            "loaded": loaded,
+            "options": options,
+            "keep_alive": args.keep_alive,
+            "prompts": len(prompts),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} level(s) regressed by more than {args.threshold:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
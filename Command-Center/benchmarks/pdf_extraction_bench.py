@@ -0,0 +1,235 @@
+# pdf_extraction_bench.py
+#
+# Throughput benchmark for the PDF extraction paths in utils/pdf_extraction.py.
+# Every scenario runs in its own interpreter so peak RSS is measured per
+# scenario (pool workers included). Results are written as JSON and can be
+# compared against a previous run:
+#
+#   python -m benchmarks.pdf_extraction_bench -o results.json
+#   python -m benchmarks.pdf_extraction_bench -o new.json --baseline results.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.synthetic_pdf import build_corpus
+
+DEFAULT_MODES = ("Text Only", "Tables Only", "Both")
+DEFAULT_WORKERS = (1, 2, 4)
+REGRESSION_THRESHOLD = 0.10     # Relative pages/sec drop reported as a regression.
+
+
+def peak_rss_mb():
+    """Peak RSS of this process plus its largest child, in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return (own + children) / (1024 * 1024)
+
+
+# -------------------------
+# Scenarios (run inside a fresh interpreter)
+# -------------------------
+def run_single(scenario):
+    from utils.pdf_extraction import format_page, iter_page_records
+    started = time.perf_counter()
+    first_page = None
+    pages = 0
+    size = 0
+    for _, record in iter_page_records(scenario["pdf"], scenario["mode"], adaptive=scenario["adaptive"]):
+        if first_page is None:
+            first_page = time.perf_counter() - started
+        pages += 1
+        size += len(format_page(record))
+    return {"pages": pages, "seconds": time.perf_counter() - started, "first_page_seconds": first_page,
+            "output_chars": size}
+
+
+def run_batch(scenario):
+    from utils.pdf_extraction import BatchExtractor
+    output_folder = tempfile.mkdtemp(prefix="pdf_bench_")
+    try:
+        extractor = BatchExtractor(
+            scenario["corpus"], scenario["mode"], output_folder, max_workers=scenario["workers"],
+            pages_per_task=scenario["pages_per_task"], adaptive=scenario["adaptive"]
+        )
+        started = time.perf_counter()
+        errors = extractor.run()
+        seconds = time.perf_counter() - started
+        first_page = extractor.first_page_time - started if extractor.first_page_time else None
+        first_file = min((end - started for _, end in extractor.file_times.values() if end), default=None)
+        return {"pages": sum(extractor.page_counts.values()), "seconds": seconds,
+                "first_page_seconds": first_page, "first_file_seconds": first_file, "errors": len(errors),
+                "tables_skipped": extractor.tables_skipped}
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+
+def run_scenario(scenario):
+    result = run_single(scenario) if scenario["path"] == "single" else run_batch(scenario)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def spawn_scenario(scenario):
+    """Runs one scenario in a child interpreter and returns its result dict."""
+    command_center = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pdf_extraction_bench", "--run-scenario", json.dumps(scenario)],
+        cwd=command_center, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario {scenario['name']} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# -------------------------
+# Suite and reporting
+# -------------------------
+def build_scenarios(corpus, largest_pdf, modes, workers, pages_per_task, adaptive_options):
+    scenarios = []
+    for mode in modes:
+        for adaptive in adaptive_options:
+            if adaptive and mode == "Text Only":
+                continue    # Adaptive only changes table extraction.
+            suffix = " adaptive" if adaptive else ""
+            scenarios.append({"name": f"single/{mode}{suffix}", "path": "single", "mode": mode,
+                              "adaptive": adaptive, "workers": 1, "pdf": largest_pdf})
+            for n in workers:
+                scenarios.append({"name": f"batch/{mode}{suffix}/w{n}", "path": "batch", "mode": mode,
+                                  "adaptive": adaptive, "workers": n, "corpus": corpus,
+                                  "pages_per_task": pages_per_task})
+    return scenarios
+
+
+def run_suite(scenarios, repeat):
+    results = []
+    for scenario in scenarios:
+        runs = [spawn_scenario(scenario) for _ in range(repeat)]
+        seconds = statistics.median(run["seconds"] for run in runs)
+        first = [run["first_page_seconds"] for run in runs if run["first_page_seconds"] is not None]
+        rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+        result = {
+            "name": scenario["name"],
+            "path": scenario["path"],
+            "mode": scenario["mode"],
+            "adaptive": scenario["adaptive"],
+            "workers": scenario["workers"],
+            "pages": runs[0]["pages"],
+            "seconds": seconds,
+            "pages_per_sec": runs[0]["pages"] / seconds if seconds else None,
+            "first_page_seconds": statistics.median(first) if first else None,
+            "peak_rss_mb": max(rss) if rss else None,
+            "repeat": repeat,
+        }
+        if "tables_skipped" in runs[0]:
+            result["tables_skipped"] = runs[0]["tables_skipped"]
+        first_file = ""
+        if "first_file_seconds" in runs[0]:
+            # Only batches finish files independently of their first page.
+            files = [run["first_file_seconds"] for run in runs if run["first_file_seconds"] is not None]
+            result["first_file_seconds"] = statistics.median(files) if files else None
+            first_file = f"  first file {result['first_file_seconds'] or 0:.3f}s"
+        print(f"{result['name']:<40} {result['pages_per_sec'] or 0:>9.1f} pages/s  "
+              f"first page {result['first_page_seconds'] or 0:.3f}s{first_file}  "
+              f"rss {result['peak_rss_mb'] or 0:.0f} MB")
+        results.append(result)
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints pages/sec changes against a baseline run; returns the names of regressed scenarios."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in results:
+        before = previous.get(result["name"])
+        if not before or not before.get("pages_per_sec") or not result["pages_per_sec"]:
+            continue
+        change = result["pages_per_sec"] / before["pages_per_sec"] - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["name"])
+        print(f"{result['name']:<40} {before['pages_per_sec']:>10.1f} {result['pages_per_sec']:>10.1f} "
+              f"{change:>+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction throughput on a synthetic corpus.")
+    parser.add_argument("-o", "--output", default="pdf_extraction_bench.json", help="Results JSON file")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative pages/sec drop counted as a regression")
+    parser.add_argument("--corpus-dir", help="Where to build (or reuse) the synthetic corpus")
+    parser.add_argument("--files", type=int, default=8, help="Number of synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=40, help="Pages of the largest synthetic PDF")
+    parser.add_argument("--lines-per-page", type=int, default=40, help="Prose lines per page (controls size)")
+    parser.add_argument("--table-density", type=float, default=0.3, help="Fraction of pages with a table")
+    parser.add_argument("--modes", nargs="+", default=list(DEFAULT_MODES), choices=DEFAULT_MODES)
+    parser.add_argument("--workers", nargs="+", type=int, default=list(DEFAULT_WORKERS))
+    parser.add_argument("--pages-per-task", type=int, default=10)
+    parser.add_argument("--no-adaptive", action="store_true", help="Skip the adaptive-mode scenarios")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (the median is kept)")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(json.loads(args.run_scenario))))
+        return 0
+
+    corpus = os.path.abspath(args.corpus_dir or os.path.join(
+        tempfile.gettempdir(),
+        f"pdf_bench_corpus_{args.files}x{args.pages}_{args.lines_per_page}_{args.table_density}"
+    ))
+    paths = build_corpus(corpus, args.files, args.pages, args.lines_per_page, args.table_density)
+    corpus_bytes = sum(os.path.getsize(path) for path in paths)
+    scenarios = build_scenarios(
+        corpus, paths[-1], args.modes, args.workers, args.pages_per_task,
+        (False,) if args.no_adaptive else (False, True)
+    )
+    results = run_suite(scenarios, args.repeat)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": {"folder": corpus, "files": len(paths), "bytes": corpus_bytes,
+                       "largest_pages": args.pages, "lines_per_page": args.lines_per_page,
+                       "table_density": args.table_density},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# synthetic_pdf.py
+#
+# Writes small, deterministic PDFs without any third-party dependency so the
+# extraction benchmarks can build their corpus offline.
+
+import os
+import random
+
+WORDS = (
+    "ollama model context token vector embedding cluster latency throughput "
+    "pipeline batch cache inference quantization gradient tensor kernel memory "
+    "container compose service volume network request response stream chunk"
+).split()
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(rng, page_number, lines_per_page, with_table, table_rows, table_cols):
+    ops = [f"BT /F1 12 Tf 72 740 Td (Page {page_number}) Tj ET"]
+    y = 720
+    for _ in range(lines_per_page):
+        line = " ".join(rng.choice(WORDS) for _ in range(12))
+        ops.append(f"BT /F1 9 Tf 72 {y} Td ({_escape(line)}) Tj ET")
+        y -= 11
+        if y < 72:
+            break
+    if with_table:
+        # A ruled grid, as produced by most report generators.
+        x0, top = 72, max(y - 20, 72 + table_rows * 18)
+        cell_w = (PAGE_WIDTH - 144) // table_cols
+        for r in range(table_rows + 1):
+            ops.append(f"{x0} {top - r * 18} m {x0 + cell_w * table_cols} {top - r * 18} l S")
+        for c in range(table_cols + 1):
+            ops.append(f"{x0 + c * cell_w} {top} m {x0 + c * cell_w} {top - table_rows * 18} l S")
+        for r in range(table_rows):
+            for c in range(table_cols):
+                ops.append(f"BT /F1 8 Tf {x0 + c * cell_w + 3} {top - r * 18 - 13} Td (r{r}c{c} {rng.randint(0, 9999)}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path, pages, lines_per_page=40, table_density=0.3, table_rows=6, table_cols=4, seed=0):
+    """
+    Writes a PDF with `pages` pages of prose; a `table_density` fraction of the
+    pages also carries a ruled table. The same arguments always give the same bytes.
+    """
+    rng = random.Random(seed)
+    objects = {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    next_id = 4
+    for page_number in range(1, pages + 1):
+        stream = _page_stream(
+            rng, page_number, lines_per_page, rng.random() < table_density, table_rows, table_cols
+        )
+        objects[next_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[next_id + 1] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, next_id)
+        )
+        page_ids.append(next_id + 1)
+        next_id += 2
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids), pages
+    )
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(data)
+        data += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+    xref = len(data)
+    size = max(objects) + 1
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for object_id in range(1, size):
+        data += b"%010d 00000 n \n" % offsets[object_id]
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def build_corpus(folder, files=8, pages=40, lines_per_page=40, table_density=0.3, seed=0):
+    """Builds (or reuses) a corpus folder; file i gets (i + 1) * pages / files pages for a size spread."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(files):
+        n_pages = max(1, (i + 1) * pages // files)
+        path = os.path.join(folder, f"synthetic_{i:03d}_{n_pages}p.pdf")
+        if not os.path.exists(path):
+            write_pdf(path, n_pages, lines_per_page, table_density, seed=seed + i)
+        paths.append(path)
+    return paths
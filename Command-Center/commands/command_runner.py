@@ -1,44 +1,198 @@
 # command_runner.py
 
+import codecs
+import os
+import queue
+import signal
 import subprocess
+import sys
 import threading
 from datetime import datetime
 from config import WORKING_DIR
 from utils.logger import print_to_terminal
 
-def execute_command(cmd, output_callback, terminal_callback):
+STREAM_READ_SIZE = 4096     # Bytes read from a pipe at a time.
+MAX_PENDING_CHUNKS = 256    # Readers block (back-pressuring the process) beyond this.
+MAX_PARTIAL_LINE = 8192     # A line without a break is flushed once it grows past this.
+KILL_GRACE_SECONDS = 3      # Time between the polite and the forced kill of a process group.
+
+
+def _pump(stream, name, chunks):
+    """
+    Reads a pipe as data arrives and queues (name, text) chunks that end on a
+    line break (\\n or \\r, so progress bars come through). Decoding is
+    incremental, so multi-byte characters split across reads stay intact.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    try:
+        for data in iter(lambda: stream.read1(STREAM_READ_SIZE), b""):
+            pending += decoder.decode(data)
+            cut = max(pending.rfind("\n"), pending.rfind("\r")) + 1
+            if cut == 0 and len(pending) >= MAX_PARTIAL_LINE:
+                cut = len(pending)
+            if cut:
+                chunks.put((name, pending[:cut]))
+                pending = pending[cut:]
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            chunks.put((name, pending))
+    finally:
+        stream.close()
+        chunks.put((name, None))
+
+
+def _drain(chunks, first):
+    """Coalesces the chunks already queued behind `first` that belong to the same stream."""
+    name, text = first
+    parts = [text]
+    leftover = None
+    while True:
+        try:
+            item = chunks.get_nowait()
+        except queue.Empty:
+            break
+        if item[0] != name or item[1] is None:
+            leftover = item
+            break
+        parts.append(item[1])
+    return name, "".join(parts), leftover
+
+
+def stream_process(process, output_callback, terminal_callback, on_output=None):
+    """
+    Forwards a running process's stdout and stderr to the callbacks while it
+    runs. Both pipes are read concurrently and chunks are delivered in the
+    order they were read; stderr goes to the terminal in red. `on_output`, if
+    given, also receives every chunk as (stream name, text).
+    """
+    chunks = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, "stdout", chunks), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, "stderr", chunks), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    open_streams = len(readers)
+    item = None
+    while open_streams:
+        if item is None:
+            item = chunks.get()
+        if item[1] is None:
+            open_streams -= 1
+            item = None
+            continue
+        name, text, item = _drain(chunks, item)
+        if on_output:
+            on_output(name, text)
+        output_callback(text)
+        terminal_callback(text.rstrip("\n"), color="red" if name == "stderr" else "green")
+    for reader in readers:
+        reader.join()
+    return process.wait()
+
+
+def popen_command(cmd):
+    """
+    Starts a shell command in its own process group (its own session on POSIX)
+    so the shell and everything it spawns can be killed together.
+    """
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(
+        cmd,
+        shell=True,
+        cwd=WORKING_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **kwargs
+    )
+
+
+def launch_detached(cmd, output_callback, terminal_callback):
+    """
+    Starts a long-lived program (e.g. Docker Desktop) outside the job scheduler:
+    its output is not captured and cancelling or closing jobs never kills it.
+    """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    header = f"[{timestamp}] $ {cmd}\n"
+    header = f"[{timestamp}] $ {cmd} (detached)\n"
     output_callback(header)
     terminal_callback(header, color="yellow")
-
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
     try:
-        process = subprocess.run(
+        return subprocess.Popen(
             cmd,
             shell=True,
             cwd=WORKING_DIR,
-            capture_output=True,
-            text=True
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **kwargs
         )
-        if process.stdout:
-            output_callback(process.stdout)
-            terminal_callback(process.stdout, color="green")
-        if process.stderr:
-            error_message = f"Error: {process.stderr}\n"
-            output_callback(error_message)
-            terminal_callback(error_message, color="red")
-        if process.returncode != 0:
+    except Exception as e:
+        error_message = f"Exception: {str(e)}\n"
+        output_callback(error_message)
+        terminal_callback(error_message, color="red")
+        return None
+
+
+def kill_process_tree(process):
+    """Terminates a process started by popen_command together with all of its children."""
+    if process.poll() is not None:
+        return
+    if sys.platform == "win32":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            pass
+        # Children may outlive the shell, so the group is killed regardless.
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def execute_command(cmd, output_callback, terminal_callback, on_start=None, on_output=None):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    header = f"[{timestamp}] $ {cmd}\n"
+    output_callback(header)
+    terminal_callback(header, color="yellow")
+
+    returncode = None
+    try:
+        process = popen_command(cmd)
+        if on_start:
+            on_start(process)
+        returncode = stream_process(process, output_callback, terminal_callback, on_output)
+        if returncode != 0:
             problem = "Houston, we have a problem!\n"
             output_callback(problem)
             terminal_callback(problem, color="red")
     except Exception as e:
         error_message = f"Exception: {str(e)}\n"
+        if on_output:
+            on_output("stderr", error_message)
         output_callback(error_message)
         terminal_callback(error_message, color="red")
 
     separator = "-" * 40 + "\n"
     output_callback(separator)
     terminal_callback(separator)
+    return returncode
 
 def run_command(command, output_callback, terminal_callback):
     thread = threading.Thread(target=execute_command, args=(command, output_callback, terminal_callback))
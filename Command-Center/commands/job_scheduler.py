@@ -0,0 +1,252 @@
+# job_scheduler.py
+
+import itertools
+import threading
+import time
+from collections import deque
+from commands.command_runner import execute_command, kill_process_tree
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed out"
+FINAL_STATES = (SUCCEEDED, FAILED, CANCELLED, TIMED_OUT)
+
+DEFAULT_WORKERS = 4
+DEFAULT_KEY_LIMIT = 1       # Concurrent runs allowed per command key unless configured otherwise.
+
+
+class Job:
+    """
+    One submitted command. The scheduler updates the fields below and calls its
+    listeners after every status change; `wait()` blocks until the job is final.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, command, key, timeout, output_callback, terminal_callback):
+        self.id = next(self._ids)
+        self.command = command
+        self.key = key
+        self.timeout = timeout
+        self.status = QUEUED
+        self.returncode = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.output_callback = output_callback
+        self.terminal_callback = terminal_callback
+        self.process = None
+        self.log_id = None             # Id of the job in the persistent job log, if any.
+        self.cancel_requested = None   # CANCELLED or TIMED_OUT once a stop was asked for.
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINAL_STATES
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.status} {self.command!r}>"
+
+
+class JobScheduler:
+    """
+    Runs shell commands on a fixed pool of worker threads.
+
+    Jobs are grouped by key (the command itself unless given): submitting a
+    key that is already queued or running returns the existing job instead of
+    starting a duplicate, and at most `limits.get(key, default_limit)` jobs per
+    key run at once while the rest wait in FIFO order. Timeouts and
+    cancellation kill the whole process group of the command, so no orphaned
+    `docker` children are left behind.
+
+    Listeners are called from worker threads; GUI code should re-emit them
+    through a queued Qt signal. With a `job_log` (utils.job_log.JobLog) every
+    run is also recorded persistently.
+    """
+
+    def __init__(self, output_callback, terminal_callback, max_workers=DEFAULT_WORKERS,
+                 default_timeout=None, limits=None, default_limit=DEFAULT_KEY_LIMIT, job_log=None):
+        self.job_log = job_log
+        self.output_callback = output_callback
+        self.terminal_callback = terminal_callback
+        self.default_timeout = default_timeout
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._listeners = []
+        self._pending = deque()
+        self._active = {}           # key -> jobs queued or running
+        self._running = {}          # key -> number of running jobs
+        self._condition = threading.Condition()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def submit(self, command, key=None, timeout=None, dedupe=True, output_callback=None, terminal_callback=None):
+        key = key or command
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The job scheduler has been shut down.")
+            if dedupe and self._active.get(key):
+                return self._active[key][0]
+            job = Job(
+                command, key, timeout if timeout is not None else self.default_timeout,
+                output_callback or self.output_callback, terminal_callback or self.terminal_callback
+            )
+            self._active.setdefault(key, []).append(job)
+            self._pending.append(job)
+            self._condition.notify()
+        self._notify(job)
+        return job
+
+    def cancel(self, job, reason=CANCELLED):
+        with self._condition:
+            if job.done or job.cancel_requested:
+                return
+            job.cancel_requested = reason
+            if job.status == QUEUED:
+                self._pending.remove(job)
+                self._finish_locked(job, reason)
+                queued = True
+            else:
+                queued = False
+            process = job.process
+        if queued:
+            self._notify(job)
+        elif process is not None:
+            # The polite kill waits up to KILL_GRACE_SECONDS; keep that off the caller (the GUI thread).
+            threading.Thread(target=kill_process_tree, args=(process,), name=f"job-kill-{job.id}",
+                             daemon=True).start()
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            self.cancel(job)
+
+    def active_jobs(self):
+        with self._condition:
+            return [job for jobs in self._active.values() for job in jobs]
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def shutdown(self, cancel=True, wait=True):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if cancel:
+            self.cancel_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    # -------------------------
+    # Workers
+    # -------------------------
+    def _next_job_locked(self):
+        """First queued job whose key is below its concurrency limit."""
+        for job in self._pending:
+            if self._running.get(job.key, 0) < self.limits.get(job.key, self.default_limit):
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job_locked()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    job = self._next_job_locked()
+                job.status = RUNNING
+                job.started = time.time()
+                self._running[job.key] = self._running.get(job.key, 0) + 1
+            self._notify(job)
+            self._run(job)
+
+    def _run(self, job):
+        timer = None
+        if job.timeout:
+            timer = threading.Timer(job.timeout, self.cancel, args=(job, TIMED_OUT))
+            timer.daemon = True
+            timer.start()
+        recorder = self.job_log.start(job.command) if self.job_log else None
+        if recorder:
+            job.log_id = recorder.job_id
+        try:
+            job.returncode = execute_command(
+                job.command, job.output_callback, job.terminal_callback,
+                on_start=lambda process: self._attach(job, process),
+                on_output=recorder.output if recorder else None
+            )
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            if timer:
+                timer.cancel()
+        with self._condition:
+            self._running[job.key] -= 1
+            if job.cancel_requested:
+                status = job.cancel_requested
+            elif job.returncode == 0:
+                status = SUCCEEDED
+            else:
+                status = FAILED
+            self._finish_locked(job, status)
+            self._condition.notify_all()
+        if recorder:
+            recorder.finish(job.returncode, job.status)
+        if job.cancel_requested:
+            message = f"Job {job.id} {job.cancel_requested}: {job.command}\n"
+            job.output_callback(message)
+            job.terminal_callback(message, color="red")
+        self._notify(job)
+
+    def _attach(self, job, process):
+        with self._condition:
+            job.process = process
+            stop = job.cancel_requested is not None
+        if stop:
+            kill_process_tree(process)   # Cancelled between dequeue and process start.
+
+    def _finish_locked(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.process = None
+        jobs = self._active.get(job.key, [])
+        if job in jobs:
+            jobs.remove(job)
+        if not jobs:
+            self._active.pop(job.key, None)
+        job._done.set()
+
+    def _notify(self, job):
+        for listener in list(self._listeners):
+            try:
+                listener(job)
+            except Exception:
+                pass
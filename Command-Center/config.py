@@ -1,3 +1,56 @@
 import os
 
 WORKING_DIR = os.path.join(os.getcwd(), "LibreChat")
+
+# Persistent cache for utils/pdf_to_text.py extraction results
+PDF_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "librechat-ollama", "pdf_to_text")
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Command job scheduler (commands/job_scheduler.py)
+COMMAND_WORKERS = 4
+COMMAND_TIMEOUT = 15 * 60   # Seconds before a button command is killed; None disables it.
+
+# Persistent job log (utils/job_log.py)
+JOB_LOG_DIR = os.path.join(os.path.expanduser("~"), ".cache", "librechat-ollama", "command_logs")
+JOB_LOG_MAX_BYTES = 16 * 1024 * 1024    # Segment size before rotation.
+JOB_LOG_BACKUPS = 20                    # Rotated (gzipped) segments kept.
+
+# Prometheus / OpenMetrics exporter (monitors/metrics_exporter.py)
+METRICS_EXPORTER_ENABLED = False
+METRICS_EXPORTER_HOST = "0.0.0.0"
+METRICS_EXPORTER_PORT = 9464
+
+# Ollama REST API (inference/ollama_client.py); docker-compose maps the container's 11434 to 11435.
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11435")
+OLLAMA_MAX_CONCURRENT_PULLS = 2
+
+# Model warm-up scheduler (inference/warmup.py)
+WARMUP_ENABLED = False
+WARMUP_INTERVAL = 60                # Seconds between two scheduling passes.
+WARMUP_KEEP_ALIVE = "15m"           # keep_alive sent with every preload.
+WARMUP_RECENT_USE = 30 * 60         # Seconds a model stays warm after it was last used.
+WARMUP_MIN_FREE_GPU_MB = 1024       # VRAM left free after a preload.
+WARMUP_MAX_MEMORY_PERCENT = 85      # System memory use a preload may not push above.
+# Models kept resident: higher priorities are loaded first and evicted last;
+# "hours" limits a model to local time windows (all day when omitted).
+WARMUP_MODELS = [
+    # {"model": "llama3.2:3b", "priority": 10, "hours": ["07:30-19:00"]},
+]
+
+# Local proxy in front of Ollama (inference/proxy.py); point LibreChat's Ollama baseURL at it.
+OLLAMA_PROXY_HOST = "0.0.0.0"
+OLLAMA_PROXY_PORT = 11436
+# VRAM-aware admission control in the proxy (inference/admission.py)
+ADMISSION_VRAM_MB = None            # VRAM budget for models; None uses the total reported by the GPU telemetry.
+ADMISSION_RESERVE_MB = 512          # VRAM never planned for models.
+ADMISSION_SWITCH_AFTER = 5.0        # Seconds a request waits before the models it must evict stop taking new work.
+ADMISSION_MAX_WAIT = 60.0           # Seconds after which a queued request is let through regardless.
+# Loaded stand-ins used instead of forcing an eviction, e.g. {"llama3.1:70b": ["llama3.1:8b"]}.
+ADMISSION_REDIRECTS = {}
+
+# Exact-match response cache in the proxy (inference/response_cache.py)
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "librechat-ollama", "responses")
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024     # Larger responses are passed through uncached.
+RESPONSE_CACHE_EXCLUDE_MODELS = []                  # fnmatch patterns of models that are never cached.
@@ -0,0 +1,284 @@
+# admission.py
+
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from config import (ADMISSION_MAX_WAIT, ADMISSION_REDIRECTS, ADMISSION_RESERVE_MB, ADMISSION_SWITCH_AFTER,
+                    ADMISSION_VRAM_MB)
+from inference.ollama_client import OllamaClient, OllamaError, normalize_model
+from inference.warmup import FOOTPRINT_FACTOR
+from monitors.system_monitor import get_gpu_usage
+
+REFRESH_INTERVAL = 2.0          # Seconds between /api/ps + GPU telemetry reads.
+LOAD_GRACE = 60.0               # Seconds an admitted model counts as resident before /api/ps lists it.
+EVICTION_GRACE = 60.0           # Seconds an evicted model is not re-added while Ollama unloads it.
+RATE_WINDOW = 300.0             # Seconds over which the eviction rate is computed.
+UNKNOWN_TTL = 30.0              # Seconds a name missing from /api/tags is not looked up again.
+MB = 1024 * 1024
+
+# `model` is what the request runs on (differs from `requested` after a
+# redirect); `evicted` lists the resident models this admission displaced.
+# Without a redirect `model` is the name as requested, tag or not.
+Ticket = namedtuple("Ticket", "model requested waited forced evicted")
+
+
+class _Waiter:
+    __slots__ = ("model", "since")
+
+    def __init__(self, model, since):
+        self.model = model
+        self.since = since
+
+
+class AdmissionController:
+    """
+    Decides when a request for a model may go to Ollama, so that several
+    users on different large models do not make Ollama load and unload them
+    in turn.
+
+    The controller keeps its own view of the resident models (from /api/ps,
+    corrected by its own decisions) and of each model's footprint (the file
+    size from /api/tags until /api/ps reports the loaded size). A request for
+    a resident model, or one that fits next to them, is admitted at once.
+    One that would force an eviction is redirected to a loaded stand-in if
+    ADMISSION_REDIRECTS names one, otherwise it queues until the models it
+    displaces are idle. After `switch_after` seconds those models stop taking
+    new requests so they drain; after `max_wait` seconds it is let through
+    regardless. Requests for the same model are thereby batched instead of
+    interleaved.
+    """
+
+    def __init__(self, client=None, capacity_mb=ADMISSION_VRAM_MB, reserve_mb=ADMISSION_RESERVE_MB,
+                 switch_after=ADMISSION_SWITCH_AFTER, max_wait=ADMISSION_MAX_WAIT, redirects=None,
+                 refresh_interval=REFRESH_INTERVAL):
+        self.client = client or OllamaClient()
+        self.capacity_mb = capacity_mb
+        self.reserve_mb = reserve_mb
+        self.switch_after = switch_after
+        self.max_wait = max_wait
+        redirects = ADMISSION_REDIRECTS if redirects is None else redirects
+        self.redirects = {
+            normalize_model(model): [normalize_model(alternative) for alternative in alternatives]
+            for model, alternatives in redirects.items()
+        }
+        self.refresh_interval = refresh_interval
+        self.footprints = {}        # model -> MB
+        self.resident = {}          # model -> MB, as far as the controller knows
+        self.active = Counter()     # model -> requests in flight
+        self.last_used = {}
+        self.admitted_at = {}
+        self.evicted_at = {}
+        self.draining = set()
+        self.unknown = {}           # model -> monotonic time it was last missing from /api/tags
+        self._draining_for = None   # The waiter the draining models make room for.
+        self.gpu_total_mb = None
+        self.other_mb = 0.0         # VRAM used by something other than Ollama's models.
+        self.counters = Counter()
+        self.waits = deque(maxlen=1000)
+        self.evictions = deque()    # monotonic times
+        self._waiters = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._refresh_loop, name="admission-refresh", daemon=True)
+
+    def start(self):
+        self.refresh(installed=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    # -------------------------
+    # Model and GPU state
+    # -------------------------
+    def refresh(self, installed=False):
+        """Re-reads /api/ps and the GPU telemetry; /api/tags too with `installed` or for unknown models."""
+        try:
+            running = self.client.running_models()
+            if installed or not self.footprints or any(normalize_model(m.name) not in self.footprints for m in running):
+                installed = self.client.list_models()
+            else:
+                installed = ()
+        except OllamaError:
+            return False
+        gpus = get_gpu_usage()
+        now = time.monotonic()
+        with self._cond:
+            for model in installed:
+                self.footprints.setdefault(normalize_model(model.name), model.size * FOOTPRINT_FACTOR / MB)
+            names = set()
+            for model in running:
+                name = normalize_model(model.name)
+                names.add(name)
+                size = model.size / MB
+                self.footprints[name] = size
+                evicted = name in self.evicted_at and now - self.evicted_at[name] < EVICTION_GRACE
+                if name in self.resident or not evicted:
+                    self.resident[name] = size
+            for name in list(self.resident):
+                loading = name in self.admitted_at and now - self.admitted_at[name] < LOAD_GRACE
+                if name not in names and not self.active[name] and not loading:
+                    del self.resident[name]     # Expired (keep_alive) or unloaded by someone else.
+            totals = [gpu["memory_total"] for gpu in gpus if gpu["memory_total"]]
+            self.gpu_total_mb = sum(totals) if totals else None
+            if totals:
+                used = sum(gpu["memory_used"] for gpu in gpus)
+                self.other_mb = max(0.0, used - sum(m.size_vram for m in running) / MB)
+            self._cond.notify_all()
+        return True
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def budget_mb(self):
+        """VRAM available to models, or None when there is nothing to plan against."""
+        capacity = self.capacity_mb if self.capacity_mb is not None else self.gpu_total_mb
+        if capacity is None:
+            return None
+        return capacity - self.reserve_mb - self.other_mb
+
+    # -------------------------
+    # Admission
+    # -------------------------
+    def _victims(self, need, budget, idle_only):
+        """Resident models to evict (least recently used first) so `need` MB fit, or None."""
+        free = budget - sum(self.resident.values())
+        victims = []
+        for name in sorted(self.resident, key=lambda n: self.last_used.get(n, 0)):
+            if free >= need:
+                break
+            if idle_only and self.active[name]:
+                continue
+            victims.append(name)
+            free += self.resident[name]
+        return victims if free >= need else None
+
+    def _head(self):
+        """The oldest waiter whose model would need an eviction."""
+        budget = self.budget_mb()
+        used = sum(self.resident.values())
+        for waiter in self._waiters:
+            if waiter.model in self.resident:
+                continue
+            if used + self.footprints.get(waiter.model, 0) > budget:
+                return waiter
+        return None
+
+    def _decide(self, waiter, now):
+        """(model, forced, victims) when `waiter` may go now, else None."""
+        model = waiter.model
+        waited = now - waiter.since
+        forced = waited >= self.max_wait
+        budget = self.budget_mb()
+        if budget is None or model not in self.footprints:
+            return model, False, ()
+        if model in self.resident:
+            if model in self.draining and not forced:
+                return None     # Let it drain so the model waiting for its memory can load.
+            return model, forced and model in self.draining, ()
+        need = self.footprints[model]
+        if sum(self.resident.values()) + need <= budget:
+            return model, False, ()
+        for alternative in self.redirects.get(model, ()):
+            if alternative in self.resident and alternative not in self.draining:
+                return alternative, False, ()
+        if forced:
+            return model, True, tuple(self._victims(need, budget, idle_only=False) or self.resident)
+        if waiter is not self._head():
+            return None     # Only the oldest such request may switch the GPU to another model.
+        victims = self._victims(need, budget, idle_only=True)
+        if victims is not None:
+            return model, False, tuple(victims)
+        if waited >= self.switch_after:
+            self.draining = set(self._victims(need, budget, idle_only=False) or ())
+            self._draining_for = waiter
+        return None
+
+    def acquire(self, model):
+        """Blocks until a request for `model` may be sent; pair with release()."""
+        requested, model = model, normalize_model(model)
+        if model not in self.footprints:
+            missing_since = self.unknown.get(model)
+            if missing_since is None or time.monotonic() - missing_since >= UNKNOWN_TTL:
+                # Newly pulled, or not a model at all (Ollama will answer 404).
+                self.refresh(installed=True)
+                if model not in self.footprints:
+                    self.unknown[model] = time.monotonic()
+                else:
+                    self.unknown.pop(model, None)
+        waiter = _Waiter(model, time.monotonic())
+        with self._cond:
+            self._waiters.append(waiter)
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    decision = self._decide(waiter, now)
+                    if decision is not None:
+                        break
+                    queued = True
+                    self._cond.wait(0.5)
+            finally:
+                self._waiters.remove(waiter)
+            target, forced, victims = decision
+            for victim in victims:
+                self.resident.pop(victim, None)
+                self.evicted_at[victim] = now
+                self.evictions.append(now)
+            self.draining.difference_update(victims)
+            if waiter is self._draining_for or not any(name in self.resident for name in self.draining):
+                # The waiter got its memory (possibly from other victims); the rest may take requests again.
+                self.draining.clear()
+                self._draining_for = None
+            if target not in self.resident and target in self.footprints:
+                self.resident[target] = self.footprints[target]
+                self.admitted_at[target] = now
+            self.active[target] += 1
+            self.last_used[target] = now
+            waited = now - waiter.since
+            self.waits.append(waited)
+            self.counters["admitted"] += 1
+            self.counters["queued"] += queued
+            self.counters["redirected"] += target != model
+            self.counters["forced"] += forced
+            self.counters["evictions"] += len(victims)
+            self._cond.notify_all()
+        return Ticket(target if target != model else requested, requested, waited, forced, victims)
+
+    def release(self, ticket):
+        model = normalize_model(ticket.model)
+        with self._cond:
+            self.active[model] -= 1
+            if self.active[model] <= 0:
+                del self.active[model]
+            self.last_used[model] = time.monotonic()
+            self._cond.notify_all()
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            while self.evictions and now - self.evictions[0] > RATE_WINDOW:
+                self.evictions.popleft()
+            budget = self.budget_mb()
+            return {
+                "queue_depth": len(self._waiters),
+                "queued_by_model": dict(Counter(waiter.model for waiter in self._waiters)),
+                "oldest_wait_seconds": max((now - w.since for w in self._waiters), default=0.0),
+                "active": dict(self.active),
+                "resident_mb": {name: round(size) for name, size in self.resident.items()},
+                "draining": sorted(self.draining),
+                "budget_mb": round(budget) if budget is not None else None,
+                "admitted": self.counters["admitted"],
+                "queued": self.counters["queued"],
+                "redirected": self.counters["redirected"],
+                "forced": self.counters["forced"],
+                "evictions": self.counters["evictions"],
+                "evictions_per_minute": len(self.evictions) * 60 / RATE_WINDOW,
+                "mean_wait_seconds": sum(self.waits) / len(self.waits) if self.waits else 0.0,
+            }
@@ -0,0 +1,195 @@
+# ollama_client.py
+
+import http.client
+import json
+import socket
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+from config import OLLAMA_MAX_CONCURRENT_PULLS, OLLAMA_URL
+
+DEFAULT_TIMEOUT = 30.0          # Seconds for ordinary API calls.
+STREAM_TIMEOUT = 600.0          # Seconds without a single streamed line before giving up.
+PROGRESS_INTERVAL = 0.1         # Minimum seconds between two pull progress callbacks.
+
+ModelInfo = namedtuple("ModelInfo", "name size modified digest family parameter_size quantization")
+LoadedModel = namedtuple("LoadedModel", "name size size_vram expires_at")
+# Byte counts summed over all layers of the model seen so far.
+PullProgress = namedtuple("PullProgress", "model status completed total")
+
+
+def normalize_model(name):
+    """Ollama's canonical model name: "llama3" and "llama3:latest" are the same model."""
+    if not name or ":" in name.rsplit("/", 1)[-1] or "@" in name:
+        return name
+    return name + ":latest"
+
+
+class OllamaError(Exception):
+    pass
+
+
+class PullCancelled(OllamaError):
+    pass
+
+
+class OllamaClient:
+    """
+    Minimal client for the Ollama REST API (https://github.com/ollama/ollama/blob/main/docs/api.md).
+
+    Ordinary calls use one short-lived connection each; streaming calls
+    (pull, generate, chat) read newline-delimited JSON as it arrives. At most
+    `max_concurrent_pulls` pulls run at once, further ones wait for a slot.
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, timeout=DEFAULT_TIMEOUT, max_concurrent_pulls=OLLAMA_MAX_CONCURRENT_PULLS):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.pull_slots = threading.BoundedSemaphore(max_concurrent_pulls)
+
+    # -------------------------
+    # Transport
+    # -------------------------
+    def _connect(self, timeout):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=timeout)
+
+    def _send(self, conn, method, path, payload):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, self.base_path + path, body=body, headers=headers)
+        response = conn.getresponse()
+        if response.status != 200:
+            data = response.read()
+            try:
+                message = json.loads(data).get("error") or data.decode("utf-8", "replace")
+            except ValueError:
+                message = data.decode("utf-8", "replace")
+            raise OllamaError(f"{method} {path} failed with HTTP {response.status}: {message}")
+        return response
+
+    def request(self, method, path, payload=None, timeout=None):
+        conn = self._connect(timeout or self.timeout)
+        try:
+            data = self._send(conn, method, path, payload).read()
+        except (OSError, http.client.HTTPException) as e:
+            raise OllamaError(f"Ollama at {self.base_url} is not reachable: {e}") from e
+        finally:
+            conn.close()
+        return json.loads(data) if data.strip() else {}
+
+    def stream(self, path, payload, cancel_event=None, on_connection=None):
+        """
+        POSTs `payload` and yields each JSON object of the streamed response.
+        `on_connection(conn)` receives the connection, e.g. to close it from
+        another thread; `cancel_event` is checked after every line.
+        """
+        conn = self._connect(STREAM_TIMEOUT)
+        try:
+            if on_connection:
+                on_connection(conn)
+            response = self._send(conn, "POST", path, payload)
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise PullCancelled(f"{path} cancelled")
+                line = response.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+                if "error" in message:
+                    raise OllamaError(message["error"])
+                yield message
+        except (OSError, http.client.HTTPException) as e:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PullCancelled(f"{path} cancelled") from e
+            raise OllamaError(f"Ollama at {self.base_url} is not reachable: {e}") from e
+        finally:
+            conn.close()
+
+    # -------------------------
+    # API
+    # -------------------------
+    def version(self):
+        return self.request("GET", "/api/version").get("version")
+
+    def list_models(self):
+        models = []
+        for model in self.request("GET", "/api/tags").get("models", []):
+            details = model.get("details") or {}
+            models.append(ModelInfo(
+                model.get("name") or model.get("model"), model.get("size", 0), model.get("modified_at"),
+                model.get("digest"), details.get("family"), details.get("parameter_size"),
+                details.get("quantization_level")
+            ))
+        return sorted(models, key=lambda m: m.name)
+
+    def running_models(self):
+        return [
+            LoadedModel(model.get("name") or model.get("model"), model.get("size", 0), model.get("size_vram", 0),
+                        model.get("expires_at"))
+            for model in self.request("GET", "/api/ps").get("models", [])
+        ]
+
+    def show(self, name):
+        return self.request("POST", "/api/show", {"model": name})
+
+    def delete(self, name):
+        self.request("DELETE", "/api/delete", {"model": name})
+
+    def load(self, name, keep_alive, timeout=STREAM_TIMEOUT):
+        """Loads a model without generating anything and keeps it resident for `keep_alive`."""
+        return self.request("POST", "/api/generate", {"model": name, "keep_alive": keep_alive}, timeout)
+
+    def unload(self, name):
+        self.request("POST", "/api/generate", {"model": name, "keep_alive": 0})
+
+    def pull(self, name, callback=None, cancel_event=None, on_connection=None):
+        """
+        Pulls a model, calling `callback(PullProgress)` at most every
+        PROGRESS_INTERVAL seconds (and on every status change). Blocks while
+        all pull slots are taken. Returns the final status ("success").
+        """
+        layers = {}     # digest -> (completed, total)
+        status = "waiting for a free pull slot"
+        if callback:
+            callback(PullProgress(name, status, 0, 0))
+        while not self.pull_slots.acquire(timeout=0.5):
+            if cancel_event is not None and cancel_event.is_set():
+                raise PullCancelled(f"Pull of {name} cancelled")
+        try:
+            last_report = 0.0
+            for message in self.stream("/api/pull", {"model": name, "stream": True}, cancel_event, on_connection):
+                digest = message.get("digest")
+                if digest and "total" in message:
+                    layers[digest] = (message.get("completed", 0), message["total"])
+                changed = message.get("status", status) != status
+                status = message.get("status", status)
+                now = time.monotonic()
+                if callback and (changed or now - last_report >= PROGRESS_INTERVAL):
+                    last_report = now
+                    callback(PullProgress(
+                        name, status, sum(c for c, _ in layers.values()), sum(t for _, t in layers.values())
+                    ))
+        finally:
+            self.pull_slots.release()
+        if status != "success":
+            raise OllamaError(f"Pull of {name} ended with status: {status}")
+        return status
+
+
+def cancel_connection(conn):
+    """Aborts a streaming request from another thread."""
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
@@ -0,0 +1,304 @@
+# proxy.py
+#
+# Small reverse proxy in front of Ollama that runs every inference request
+# through the VRAM-aware AdmissionController. Point LibreChat's Ollama
+# baseURL at it instead of port 11435:
+#
+#   python -m inference.proxy --port 11436 --upstream http://localhost:11435 [--cache]
+#
+# Streaming responses are relayed as they arrive. With --cache, deterministic
+# requests (embeddings, temperature 0) are answered from the ResponseCache
+# when an identical one was seen before; a request header
+# "X-Command-Center-Cache: off" bypasses it. GET /proxy/stats returns the
+# admission and cache figures (queue depth, eviction rate, hits, ...) as JSON.
+
+import argparse
+import http.client
+import json
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from config import OLLAMA_PROXY_HOST, OLLAMA_PROXY_PORT, OLLAMA_URL, RESPONSE_CACHE_DIR, RESPONSE_CACHE_ENABLED
+from inference.admission import AdmissionController
+from inference.ollama_client import STREAM_TIMEOUT, OllamaClient
+from inference.response_cache import ModelDigests, ResponseCache
+
+# Requests that make Ollama load a model; everything else is passed straight through.
+INFERENCE_PATHS = ("/api/generate", "/api/chat", "/api/embed", "/api/embeddings",
+                   "/v1/chat/completions", "/v1/completions", "/v1/embeddings")
+# Hop-by-hop headers, plus the ones the proxy sets itself.
+SKIPPED_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+                   "transfer-encoding", "upgrade", "host", "content-length"}
+STATS_PATH = "/proxy/stats"
+REDIRECT_HEADER = "X-Command-Center-Redirected-From"
+CACHE_HEADER = "X-Command-Center-Cache"
+
+
+class OllamaProxy:
+    """
+    ThreadingHTTPServer forwarding to `upstream`. With an AdmissionController
+    each inference request holds an admission ticket until its response has
+    been relayed completely, so the controller sees the real in-flight count.
+    Cache hits are answered before admission and never reach Ollama.
+    """
+
+    def __init__(self, upstream=OLLAMA_URL, host=OLLAMA_PROXY_HOST, port=OLLAMA_PROXY_PORT, admission=None,
+                 cache=None):
+        parts = urlsplit(upstream)
+        self.upstream = upstream
+        self.upstream_https = parts.scheme == "https"
+        self.upstream_host = parts.hostname or "localhost"
+        self.upstream_port = parts.port
+        self.host = host
+        self.port = port
+        self.admission = admission
+        self.cache = cache
+        self.requests = 0
+        self._server = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.upstream_https else http.client.HTTPConnection
+        return cls(self.upstream_host, self.upstream_port, timeout=STREAM_TIMEOUT)
+
+    def stats(self):
+        stats = {"requests": self.requests, "upstream": self.upstream}
+        if self.admission is not None:
+            stats["admission"] = self.admission.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def start(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == STATS_PATH:
+                    body = json.dumps(proxy.stats(), indent=2).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._forward()
+
+            def do_HEAD(self):
+                self._forward()
+
+            def do_POST(self):
+                self._forward()
+
+            def do_PUT(self):
+                self._forward()
+
+            def do_DELETE(self):
+                self._forward()
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                        if size == 0:
+                            while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                                pass    # Trailers.
+                            return b"".join(chunks)
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _forward(self):
+                proxy.requests += 1
+                body = self._read_body()
+                ticket = None
+                capture = None
+                headers = {}
+                path = self.path.split("?")[0]
+                payload = None
+                if self.command == "POST" and path in INFERENCE_PATHS:
+                    try:
+                        payload = json.loads(body or b"{}")
+                    except ValueError:
+                        pass
+                model = payload.get("model") if isinstance(payload, dict) else None
+                if not isinstance(model, str):
+                    model = None    # Malformed; passed through for Ollama to reject.
+                if model and proxy.cache is not None and self.headers.get(CACHE_HEADER, "").lower() != "off":
+                    key = proxy.cache.key_for(path, payload)
+                    if key is not None:
+                        cached = proxy.cache.get(key, model)
+                        if cached is not None:
+                            self._replay(*cached)
+                            return
+                        capture = (key, model, path)
+                        headers[CACHE_HEADER] = "miss"
+                if model and proxy.admission is not None:
+                    ticket = proxy.admission.acquire(model)
+                    if ticket.model != model:
+                        payload["model"] = ticket.model
+                        body = json.dumps(payload).encode("utf-8")
+                        headers[REDIRECT_HEADER] = model
+                        capture = None      # Another model answered; don't store it under this request.
+                try:
+                    self._relay(body, headers, capture)
+                finally:
+                    if ticket is not None:
+                        proxy.admission.release(ticket)
+
+            def _replay(self, status, content_type, streamed, body):
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                self.send_header(CACHE_HEADER, "hit")
+                if not streamed:
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                # Same framing as a live stream: one chunk per NDJSON (or SSE) line.
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for line in body.splitlines(keepends=True):
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def _relay(self, body, extra_headers, capture=None):
+                conn = proxy._connect()
+                try:
+                    headers = {
+                        key: value for key, value in self.headers.items() if key.lower() not in SKIPPED_HEADERS
+                    }
+                    if body or self.command in ("POST", "PUT"):
+                        headers["Content-Length"] = str(len(body))
+                    try:
+                        conn.request(self.command, self.path, body=body or None, headers=headers)
+                        response = conn.getresponse()
+                    except (OSError, http.client.HTTPException) as e:
+                        message = json.dumps({"error": f"Ollama at {proxy.upstream} is not reachable: {e}"})
+                        self.send_response(502)
+                        self.send_header("Content-Type", "application/json")
+                        self.send_header("Content-Length", str(len(message)))
+                        self.end_headers()
+                        self.wfile.write(message.encode("utf-8"))
+                        return
+                    self.send_response(response.status, response.reason)
+                    for key, value in response.getheaders():
+                        if key.lower() not in SKIPPED_HEADERS:
+                            self.send_header(key, value)
+                    for key, value in extra_headers.items():
+                        self.send_header(key, value)
+                    length = response.getheader("Content-Length")
+                    if self.command == "HEAD":
+                        self.end_headers()
+                        return
+                    if length is not None:
+                        self.send_header("Content-Length", length)
+                        self.end_headers()
+                        data = response.read()
+                        self.wfile.write(data)
+                        if capture:
+                            proxy.cache.put(*capture, False, response.status, response.getheader("Content-Type"),
+                                            data)
+                        return
+                    # Streamed (NDJSON) answers: pass each piece on as soon as it arrives.
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    captured = [] if capture else None
+                    captured_size = 0
+                    while True:
+                        data = response.read1(65536)
+                        if not data:
+                            break
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        if captured is not None:
+                            captured.append(data)
+                            captured_size += len(data)
+                            if captured_size > proxy.cache.max_entry_bytes:
+                                captured = None     # Too large to cache; keep relaying.
+                    self.wfile.write(b"0\r\n\r\n")
+                    if captured is not None:
+                        proxy.cache.put(*capture, True, response.status, response.getheader("Content-Type"),
+                                        b"".join(captured))
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True    # The client went away; drop the upstream request too.
+                finally:
+                    conn.close()
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="ollama-proxy", daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proxy in front of Ollama with VRAM-aware admission control and a response cache.")
+    parser.add_argument("--host", default=OLLAMA_PROXY_HOST)
+    parser.add_argument("--port", type=int, default=OLLAMA_PROXY_PORT)
+    parser.add_argument("--upstream", default=OLLAMA_URL, help="Ollama base URL")
+    parser.add_argument("--vram-mb", type=float, help="VRAM budget override (default: from GPU telemetry)")
+    parser.add_argument("--no-admission", action="store_true", help="Don't run requests through admission control")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=RESPONSE_CACHE_ENABLED,
+                        help="Answer repeated deterministic requests from the response cache")
+    parser.add_argument("--cache-dir", default=RESPONSE_CACHE_DIR)
+    parser.add_argument("--stats-interval", type=float, default=30.0,
+                        help="Seconds between queue depth / eviction rate lines (0 disables them)")
+    args = parser.parse_args(argv)
+
+    admission = None
+    if not args.no_admission:
+        admission = AdmissionController(OllamaClient(args.upstream), capacity_mb=args.vram_mb).start()
+    cache = None
+    if args.cache:
+        cache = ResponseCache(args.cache_dir, digests=ModelDigests(OllamaClient(args.upstream)))
+    proxy = OllamaProxy(args.upstream, args.host, args.port, admission, cache).start()
+    print(f"Proxying http://{args.host}:{proxy.port} -> {args.upstream}")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(args.stats_interval or None):
+            if admission is not None:
+                stats = admission.stats()
+                print(f"queue depth {stats['queue_depth']}, active {sum(stats['active'].values())}, "
+                      f"evictions {stats['evictions']} ({stats['evictions_per_minute']:.2f}/min), "
+                      f"redirected {stats['redirected']}, forced {stats['forced']}")
+            if cache is not None:
+                stats = cache.stats()
+                print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries, "
+                      f"{stats['bytes'] / (1024 * 1024):.1f} MB")
+    except KeyboardInterrupt:
+        pass
+    proxy.stop()
+    if admission is not None:
+        admission.stop()
+    if cache is not None:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# response_cache.py
+
+import fnmatch
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from config import (RESPONSE_CACHE_DIR, RESPONSE_CACHE_EXCLUDE_MODELS, RESPONSE_CACHE_MAX_BYTES,
+                    RESPONSE_CACHE_MAX_ENTRY_BYTES)
+from inference.ollama_client import OllamaError, normalize_model
+
+GENERATION_PATHS = ("/api/generate", "/api/chat", "/v1/chat/completions", "/v1/completions")
+EMBEDDING_PATHS = ("/api/embed", "/api/embeddings", "/v1/embeddings")
+# Request fields that do not change the answer.
+VOLATILE_FIELDS = ("stream", "keep_alive")
+RUNTIME_OPTIONS = ("num_thread", "num_gpu", "main_gpu", "num_batch", "use_mmap", "use_mlock", "numa", "low_vram")
+DIGEST_TTL = 60.0               # Seconds the model digests from /api/tags are reused.
+
+
+def is_streaming(path, payload):
+    # Ollama's own endpoints stream by default, the OpenAI-compatible ones don't.
+    return bool(payload.get("stream", not path.startswith("/v1/")))
+
+
+def is_deterministic(path, payload):
+    """Embeddings always are; generations only with temperature 0. Malformed options never are."""
+    if path in EMBEDDING_PATHS:
+        return True
+    if path.startswith("/v1/"):
+        temperature = payload.get("temperature")
+    else:
+        options = payload.get("options") or {}
+        if not isinstance(options, dict):
+            return False    # Forwarded uncached; Ollama answers with its own 400.
+        temperature = options.get("temperature")
+    try:
+        return temperature is not None and float(temperature) == 0.0
+    except (TypeError, ValueError):
+        return False
+
+
+def request_key(path, payload, model_digest=None):
+    """SHA-256 of the canonical request: sorted keys, no whitespace, volatile fields dropped."""
+    body = {key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}
+    if isinstance(body.get("options"), dict):
+        body["options"] = {k: v for k, v in body["options"].items() if k not in RUNTIME_OPTIONS}
+    canonical = json.dumps(
+        {"path": path, "stream": is_streaming(path, payload), "digest": model_digest, "body": body},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_complete(body, streamed):
+    """Whether a relayed response ended normally (only those are stored)."""
+    if not streamed:
+        return True
+    lines = body.rstrip(b"\n").split(b"\n")
+    last = lines[-1].strip() if lines else b""
+    if last == b"data: [DONE]":
+        return True     # OpenAI-style server-sent events.
+    try:
+        message = json.loads(last)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("done") is True and "error" not in message
+
+
+class ModelDigests:
+    """
+    Model name -> digest from /api/tags, so a re-pulled model never hits answers of the old one.
+    The list is fetched at most once per `ttl`, also for names it does not contain.
+    """
+
+    def __init__(self, client, ttl=DIGEST_TTL):
+        self.client = client
+        self.ttl = ttl
+        self._digests = {}
+        self._time = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()     # Only one /api/tags call at a time; lookups don't wait for it.
+
+    def _fresh(self):
+        return self._time is not None and time.monotonic() - self._time < self.ttl
+
+    def get(self, model):
+        model = normalize_model(model)
+        with self._lock:
+            if self._fresh():
+                return self._digests.get(model)
+        with self._fetch_lock:
+            with self._lock:
+                if self._fresh():
+                    return self._digests.get(model)     # Fetched by another request meanwhile.
+            try:
+                digests = {normalize_model(m.name): m.digest for m in self.client.list_models()}
+            except OllamaError:
+                digests = None
+            with self._lock:
+                if digests is not None:
+                    self._digests = digests
+                self._time = time.monotonic()
+                return self._digests.get(model)
+
+
+class ResponseCache:
+    """
+    Persistent exact-match cache of Ollama responses backed by SQLite.
+
+    Only deterministic requests (embeddings, temperature 0) are cached, keyed
+    on the normalized request and the model digest. Bodies are stored exactly
+    as Ollama sent them, so a streamed answer replays as the same NDJSON
+    lines. The cache is bounded by the total size of stored bodies and evicts
+    the least recently used entries first.
+    """
+
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR, max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                 max_entry_bytes=RESPONSE_CACHE_MAX_ENTRY_BYTES, exclude_models=None, digests=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.exclude_models = RESPONSE_CACHE_EXCLUDE_MODELS if exclude_models is None else exclude_models
+        self.digests = digests
+        self.counters = Counter()
+        self.model_counters = {}    # model -> Counter(hits, misses)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(cache_dir, "responses.sqlite3"), timeout=30,
+                                  check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                path TEXT NOT NULL,
+                streamed INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access);
+        """)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def excluded(self, model):
+        return any(fnmatch.fnmatchcase(model, pattern) for pattern in self.exclude_models)
+
+    def key_for(self, path, payload):
+        """Cache key of a request, or None when it must not be cached."""
+        model = payload.get("model")
+        if not model or path not in GENERATION_PATHS + EMBEDDING_PATHS:
+            return None
+        if self.excluded(model) or not is_deterministic(path, payload):
+            self._count(model, "bypass")
+            return None
+        digest = self.digests.get(model) if self.digests is not None else None
+        return request_key(path, payload, digest)
+
+    def _count(self, model, what):
+        with self._lock:
+            self.counters[what] += 1
+            self.model_counters.setdefault(model, Counter())[what] += 1
+
+    def get(self, key, model):
+        """(status, content_type, streamed, body) of a cached response, or None."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT status, content_type, streamed, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with self.db:
+                    self.db.execute("UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                                    (time.time(), key))
+        self._count(model, "hits" if row else "misses")
+        if row is None:
+            return None
+        return row[0], row[1], bool(row[2]), bytes(row[3])
+
+    def put(self, key, model, path, streamed, status, content_type, body):
+        if status != 200 or len(body) > self.max_entry_bytes or not is_complete(body, streamed):
+            return False
+        now = time.time()
+        with self._lock:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, path, streamed, status, content_type, body, size, "
+                    "created, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, path, int(streamed), status, content_type, body, len(body), now, now)
+                )
+            self.counters["stores"] += 1
+            self._evict()
+        return True
+
+    def clear(self):
+        with self._lock:
+            with self.db:
+                self.db.execute("DELETE FROM responses")
+            self.db.execute("VACUUM")
+
+    def total_size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        with self.db:
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["evictions"] += 1
+                total -= size
+
+    def stats(self):
+        with self._lock:
+            entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            hits, misses = self.counters["hits"], self.counters["misses"]
+            return {
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "bypass": self.counters["bypass"],
+                "stores": self.counters["stores"],
+                "evictions": self.counters["evictions"],
+                "hit_ratio": hits / (hits + misses) if hits + misses else None,
+                "models": {model: dict(counter) for model, counter in self.model_counters.items()},
+            }
@@ -0,0 +1,330 @@
+# warmup.py
+#
+# Keeps the models people are about to use resident in Ollama, so the first
+# chat after an idle period does not wait for a cold load. Runs inside the GUI
+# (WARMUP_ENABLED in config.py) or headless:
+#
+#   python -m inference.warmup --once --dry-run     # print what one pass would do
+#   python -m inference.warmup                      # keep scheduling
+
+import argparse
+import signal
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from psutil import virtual_memory
+from config import (WARMUP_INTERVAL, WARMUP_KEEP_ALIVE, WARMUP_MAX_MEMORY_PERCENT, WARMUP_MIN_FREE_GPU_MB,
+                    WARMUP_MODELS, WARMUP_RECENT_USE)
+from inference.ollama_client import OllamaClient, OllamaError
+from monitors.system_monitor import get_gpu_usage, get_memory_usage
+
+FOOTPRINT_FACTOR = 1.2          # Loaded size relative to the model file (KV cache, compute buffers).
+REFRESH_FRACTION = 0.5          # Re-issue keep_alive once less than this share of it is left.
+MB = 1024 * 1024
+
+# `hours` is a tuple of (start, end) minutes after midnight; empty means all day.
+WarmupModel = namedtuple("WarmupModel", "model priority hours")
+# kind is "load", "refresh" or "unload".
+WarmupAction = namedtuple("WarmupAction", "kind model reason")
+# Memory as seen by one scheduling pass. GPU figures are None without a GPU.
+MemoryState = namedtuple("MemoryState", "gpu_free_mb gpu_total_mb memory_percent memory_total_mb")
+
+
+def _minutes(text):
+    hours, minutes = text.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60 and hours * 60 + minutes <= 24 * 60):
+        raise ValueError(text)
+    return hours * 60 + minutes
+
+
+def parse_models(entries):
+    """
+    WARMUP_MODELS dicts (or plain model names) to WarmupModel tuples.
+    Raises ValueError naming the offending entry when one is malformed.
+    """
+    models = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"model": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("model"), str) or not entry["model"]:
+            raise ValueError(f"WARMUP_MODELS entry {entry!r} needs a model name")
+        priority = entry.get("priority", 0)
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+            raise ValueError(f"WARMUP_MODELS entry for {entry['model']}: priority must be a number, got {priority!r}")
+        windows = entry.get("hours") or ()
+        if isinstance(windows, str):
+            windows = [windows]
+        hours = []
+        for window in windows:
+            try:
+                start, end = str(window).split("-")
+                hours.append((_minutes(start), _minutes(end)))
+            except ValueError:
+                raise ValueError(
+                    f"WARMUP_MODELS entry for {entry['model']}: hours {window!r} is not like \"08:00-18:00\""
+                ) from None
+        models.append(WarmupModel(entry["model"], priority, tuple(hours)))
+    return models
+
+
+def in_window(hours, now):
+    if not hours:
+        return True
+    minute = now.hour * 60 + now.minute
+    for start, end in hours:
+        # A window like 22:00-02:00 wraps around midnight.
+        if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+            return True
+    return False
+
+
+def keep_alive_seconds(value):
+    """Ollama keep_alive ("15m", "1h", 300, -1) in seconds; negative means forever."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    value = str(value).strip()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def read_memory():
+    gpus = get_gpu_usage()
+    totals = [gpu["memory_total"] for gpu in gpus if gpu["memory_total"]]
+    gpu_total = sum(totals) if totals else None
+    gpu_free = sum(gpu["memory_total"] - gpu["memory_used"] for gpu in gpus if gpu["memory_total"]) if totals else None
+    return MemoryState(gpu_free, gpu_total, get_memory_usage(), virtual_memory().total / MB)
+
+
+def plan(models, loaded, sizes, memory, last_used, now=None, clock=None, keep_alive=WARMUP_KEEP_ALIVE,
+         recent_use=WARMUP_RECENT_USE, min_free_gpu_mb=WARMUP_MIN_FREE_GPU_MB,
+         max_memory_percent=WARMUP_MAX_MEMORY_PERCENT):
+    """
+    Decides one scheduling pass without talking to Ollama.
+
+    `loaded` maps resident model names to (footprint MB, seconds until they
+    expire or None), `sizes` maps installed model names to their file size in
+    bytes, `last_used` maps names to the time.time() of their last use.
+    Returns a list of WarmupAction, unloads first.
+    """
+    now = now or datetime.now()
+    clock = clock or time.time()
+    configured = {m.model: m for m in models}
+    wanted = {}     # model -> (priority, reason)
+    for model in models:
+        if model.model in sizes and in_window(model.hours, now):
+            wanted[model.model] = (model.priority, "scheduled")
+    for name, used in last_used.items():
+        if name in sizes and clock - used < recent_use and name not in wanted:
+            wanted[name] = (configured[name].priority if name in configured else 0, "recently used")
+
+    def priority(name):
+        if name in wanted:
+            return wanted[name][0]
+        return configured[name].priority if name in configured else 0
+
+    def footprint(name):
+        return loaded[name][0] if name in loaded else sizes[name] * FOOTPRINT_FACTOR / MB
+
+    gpu_free = memory.gpu_free_mb
+    memory_percent = memory.memory_percent
+
+    def fits(size_mb):
+        if gpu_free is not None:
+            # Whatever does not fit into VRAM spills into system memory.
+            spill = max(0.0, size_mb - (gpu_free - min_free_gpu_mb))
+            return spill == 0 and memory_percent <= max_memory_percent
+        return memory_percent + size_mb * 100 / memory.memory_total_mb <= max_memory_percent
+
+    def release(name):
+        nonlocal gpu_free, memory_percent
+        if gpu_free is not None:
+            gpu_free += loaded[name][0]
+        else:
+            memory_percent -= loaded[name][0] * 100 / memory.memory_total_mb
+
+    actions = []
+    evictable = sorted(
+        (name for name in loaded if name not in wanted),
+        key=lambda name: (priority(name), last_used.get(name, 0))
+    )
+
+    # Memory already tight: drop idle, unwanted models until it is not.
+    tight = (gpu_free is not None and gpu_free < min_free_gpu_mb) or memory_percent > max_memory_percent
+    while tight and evictable:
+        name = evictable.pop(0)
+        actions.append(WarmupAction("unload", name, "memory is tight"))
+        release(name)
+        tight = (gpu_free is not None and gpu_free < min_free_gpu_mb) or memory_percent > max_memory_percent
+
+    keep = keep_alive_seconds(keep_alive)
+    for name in sorted(wanted, key=lambda n: -wanted[n][0]):
+        wanted_priority, reason = wanted[name]
+        if name in loaded:
+            expires_in = loaded[name][1]
+            if keep >= 0 and expires_in is not None and expires_in < keep * REFRESH_FRACTION:
+                actions.append(WarmupAction("refresh", name, reason))
+            continue
+        size = footprint(name)
+        if not fits(size):
+            # Make room from lower-priority models, but only if that is enough.
+            victims = [n for n in evictable if priority(n) < wanted_priority]
+            room = sum(loaded[n][0] for n in victims)
+            if gpu_free is not None:
+                enough = size <= gpu_free - min_free_gpu_mb + room
+            else:
+                enough = memory_percent + (size - room) * 100 / memory.memory_total_mb <= max_memory_percent
+            if not enough:
+                continue
+            for victim in victims:
+                if fits(size):
+                    break
+                evictable.remove(victim)
+                actions.append(WarmupAction("unload", victim, f"making room for {name}"))
+                release(victim)
+            if not fits(size):
+                continue
+        actions.append(WarmupAction("load", name, reason))
+        if gpu_free is not None:
+            gpu_free -= size
+        else:
+            memory_percent += size * 100 / memory.memory_total_mb
+    return sorted(actions, key=lambda action: action.kind != "unload")
+
+
+class WarmupScheduler:
+    """
+    Background thread that runs `plan()` every `interval` seconds against the
+    live model list and memory readings and carries out the actions. Usage is
+    learnt from `record_use()` (e.g. called by a proxy) and from /api/ps: a
+    model whose expiry moved without a preload from here was used by someone.
+    """
+
+    def __init__(self, client=None, models=None, interval=WARMUP_INTERVAL, keep_alive=WARMUP_KEEP_ALIVE,
+                 callback=None, dry_run=False):
+        self.client = client or OllamaClient()
+        self.models = parse_models(WARMUP_MODELS if models is None else models)
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self.callback = callback
+        self.dry_run = dry_run
+        self.last_used = {}
+        self._seen_expiry = {}
+        self._own_loads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def record_use(self, model, when=None):
+        with self._lock:
+            self.last_used[model] = when or time.time()
+
+    def _log(self, text):
+        if self.callback:
+            self.callback(text + "\n")
+
+    def _observe(self, running):
+        """Returns the loaded map for plan() and notes models that were used."""
+        loaded = {}
+        now = datetime.now().astimezone()
+        for model in running:
+            expires_in = None
+            if model.expires_at:
+                try:
+                    expires = datetime.fromisoformat(model.expires_at.replace("Z", "+00:00"))
+                    expires_in = (expires - now).total_seconds()
+                except ValueError:
+                    pass
+            loaded[model.name] = (model.size / MB, expires_in)
+            previous = self._seen_expiry.get(model.name)
+            if model.name not in self._own_loads and (previous is None or previous != model.expires_at):
+                self.record_use(model.name)
+            self._seen_expiry[model.name] = model.expires_at
+        self._own_loads.clear()
+        return loaded
+
+    def run_once(self):
+        loaded = self._observe(self.client.running_models())
+        sizes = {model.name: model.size for model in self.client.list_models()}
+        with self._lock:
+            last_used = dict(self.last_used)
+        actions = plan(self.models, loaded, sizes, read_memory(), last_used, keep_alive=self.keep_alive)
+        for action in actions:
+            self._log(f"Warm-up: {action.kind} {action.model} ({action.reason})")
+            if self.dry_run:
+                continue
+            try:
+                if action.kind == "unload":
+                    self.client.unload(action.model)
+                else:
+                    self.client.load(action.model, self.keep_alive)
+                    self._own_loads.add(action.model)
+            except OllamaError as e:
+                self._log(f"Warm-up: {action.kind} {action.model} failed: {e}")
+        return actions
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except OllamaError:
+                pass    # Ollama is down; try again next pass.
+            except Exception as e:
+                # Bad responses or telemetry must not end warm-up for the rest of the session.
+                self._log(f"Warm-up: pass failed: {type(e).__name__}: {e}")
+            self._stop.wait(self.interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep Ollama models warm according to WARMUP_MODELS.")
+    parser.add_argument("--url", help="Ollama base URL (default: OLLAMA_URL)")
+    parser.add_argument("--model", action="append", dest="models",
+                        help="Model to keep warm (repeatable; replaces WARMUP_MODELS)")
+    parser.add_argument("--interval", type=float, default=WARMUP_INTERVAL)
+    parser.add_argument("--keep-alive", default=WARMUP_KEEP_ALIVE)
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the actions")
+    args = parser.parse_args(argv)
+
+    client = OllamaClient(args.url) if args.url else OllamaClient()
+    try:
+        scheduler = WarmupScheduler(client, args.models, args.interval, args.keep_alive,
+                                    callback=lambda text: print(text, end=""), dry_run=args.dry_run)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.once:
+        try:
+            actions = scheduler.run_once()
+        except OllamaError as e:
+            print(e)
+            return 1
+        if not actions:
+            print("Warm-up: nothing to do")
+        return 0
+
+    scheduler.start()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
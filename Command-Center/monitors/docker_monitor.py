@@ -1,12 +1,226 @@
 # docker_monitor.py
 
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+from collections import namedtuple
+from urllib.parse import quote
 import psutil
 
-def is_docker_running(process_name="docker"):
-    for proc in psutil.process_iter(['name']):
+# Exact names of the processes that mean the Docker engine (or Desktop) is up.
+DOCKER_PROCESS_NAMES = (
+    "dockerd", "com.docker.backend", "com.docker.backend.exe", "Docker Desktop.exe", "Docker Desktop"
+)
+DEFAULT_SOCKET = "/var/run/docker.sock"
+API_TIMEOUT = 5.0               # Seconds for ordinary API calls (the event stream has none).
+FALLBACK_INTERVAL = 5.0         # Seconds between process checks while the API is unreachable.
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+
+ContainerState = namedtuple("ContainerState", "id name service state health")
+# `source` is "api" when the state came from the Engine API, "process" when
+# only the engine process could be checked (no socket, e.g. Docker Desktop on
+# Windows); `containers` is then empty.
+DockerState = namedtuple("DockerState", "engine_running source containers")
+
+_cached_pid = None
+
+
+def is_docker_running(process_names=DOCKER_PROCESS_NAMES):
+    """
+    Checks for a Docker engine process by exact name. The pid found last time is
+    checked first, so the full process scan only happens when it has exited.
+    """
+    global _cached_pid
+    if _cached_pid is not None:
         try:
-            if process_name.lower() in proc.info['name'].lower():
+            if psutil.Process(_cached_pid).name() in process_names:
                 return True
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
+            pass
+        _cached_pid = None
+    for proc in psutil.process_iter(['name']):
+        if proc.info['name'] in process_names:
+            _cached_pid = proc.pid
+            return True
     return False
+
+
+def default_socket_path():
+    """Unix socket of the Docker Engine API from DOCKER_HOST, or the default one (None on Windows)."""
+    host = os.environ.get("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    if host or sys.platform == "win32":
+        return None     # TCP or named pipe endpoints are not handled here.
+    return DEFAULT_SOCKET
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection over a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=API_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def docker_api_get(socket_path, path, timeout=API_TIMEOUT):
+    connection = UnixHTTPConnection(socket_path, timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise OSError(f"Docker API {path} returned HTTP {response.status}")
+        return body
+    finally:
+        connection.close()
+
+
+def _health(status):
+    if "(healthy)" in status:
+        return "healthy"
+    if "(unhealthy)" in status:
+        return "unhealthy"
+    if "(health: starting)" in status:
+        return "starting"
+    return None
+
+
+# Container event actions and the state they leave the container in.
+EVENT_STATES = {
+    "create": "created", "start": "running", "restart": "running", "unpause": "running",
+    "pause": "paused", "die": "exited", "stop": "exited", "kill": "exited", "oom": "exited",
+}
+
+
+class DockerStateTracker:
+    """
+    Keeps the state of the Docker engine and its containers up to date
+    without polling.
+
+    A background thread pings the Engine API over its Unix socket, lists the
+    containers once and then follows the `/events` stream, applying each
+    container event to its table; `callback` receives a new DockerState after
+    every change. When the socket is missing or the engine is down it falls
+    back to `is_docker_running()` every FALLBACK_INTERVAL seconds and
+    reconnects with backoff. `project` limits the table to one compose project.
+    """
+
+    def __init__(self, callback=None, socket_path=None, project=None):
+        self.callback = callback
+        self.socket_path = socket_path if socket_path is not None else default_socket_path()
+        self.project = project
+        self.state = DockerState(False, "process", ())
+        self._containers = {}
+        self._stop = threading.Event()
+        self._events = None
+        self._thread = threading.Thread(target=self._run, name="docker-state", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        events = self._events
+        if events is not None and events.sock is not None:
+            try:
+                events.sock.shutdown(socket.SHUT_RDWR)   # Unblocks the event stream read.
+            except OSError:
+                pass
+        self._thread.join(timeout)
+
+    def _publish(self, engine_running, source):
+        containers = tuple(sorted(self._containers.values(), key=lambda c: (c.service or c.name)))
+        state = DockerState(engine_running, source, containers)
+        if state != self.state:
+            self.state = state
+            if self.callback:
+                self.callback(state)
+
+    def _run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            if self.socket_path and os.path.exists(self.socket_path):
+                try:
+                    self._follow()
+                    delay = 1.0
+                except (OSError, http.client.HTTPException, ValueError):
+                    pass
+                if self._stop.is_set():
+                    break
+            self._containers = {}
+            self._publish(is_docker_running(), "process")
+            self._stop.wait(delay if self.socket_path else FALLBACK_INTERVAL)
+            delay = min(delay * 2, FALLBACK_INTERVAL)
+
+    def _follow(self):
+        """Lists containers and applies events until the stream ends or stop() is called."""
+        docker_api_get(self.socket_path, "/_ping")
+        filters = {"type": ["container"]}
+        if self.project:
+            filters["label"] = [f"{COMPOSE_PROJECT_LABEL}={self.project}"]
+        # Subscribe before listing so no event between the two is missed.
+        self._events = UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            self._events.request("GET", f"/events?filters={quote(json.dumps(filters))}")
+            stream = self._events.getresponse()
+            if stream.status != 200:
+                raise OSError(f"Docker API /events returned HTTP {stream.status}")
+            list_filters = {"label": filters["label"]} if self.project else {}
+            containers = json.loads(docker_api_get(
+                self.socket_path, f"/containers/json?all=1&filters={quote(json.dumps(list_filters))}"
+            ))
+            self._containers = {}
+            for container in containers:
+                labels = container.get("Labels") or {}
+                self._containers[container["Id"]] = ContainerState(
+                    container["Id"][:12],
+                    (container.get("Names") or ["/" + container["Id"][:12]])[0].lstrip("/"),
+                    labels.get(COMPOSE_SERVICE_LABEL),
+                    container.get("State", "unknown"),
+                    _health(container.get("Status", "")),
+                )
+            self._publish(True, "api")
+            while not self._stop.is_set():
+                line = stream.readline()
+                if not line:
+                    break
+                if line.strip():
+                    self._apply(json.loads(line))
+        finally:
+            self._events.close()
+            self._events = None
+
+    def _apply(self, event):
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        action = event.get("Action") or event.get("status") or ""
+        if not container_id:
+            return
+        attributes = actor.get("Attributes") or {}
+        current = self._containers.get(container_id) or ContainerState(
+            container_id[:12], attributes.get("name", container_id[:12]),
+            attributes.get(COMPOSE_SERVICE_LABEL), "created", None
+        )
+        if action == "destroy":
+            self._containers.pop(container_id, None)
+        elif action.startswith("health_status:"):
+            self._containers[container_id] = current._replace(health=action.split(":", 1)[1].strip())
+        elif action in EVENT_STATES:
+            health = current.health if EVENT_STATES[action] == "running" else None
+            self._containers[container_id] = current._replace(state=EVENT_STATES[action], health=health)
+        elif action == "rename":
+            self._containers[container_id] = current._replace(name=attributes.get("name", current.name))
+        else:
+            return  # exec_*, attach, resize, ... don't change the state.
+        self._publish(True, "api")
@@ -0,0 +1,292 @@
+# gpu_telemetry.py
+
+import atexit
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_TTL = 1.0               # Seconds a reading is reused before the backend is asked again.
+PROCESS_TTL = 10.0              # Per-process GPU memory changes slowly and costs a subprocess.
+STREAM_INTERVAL_MS = 1000       # Sampling period of the persistent nvidia-smi stream.
+STREAM_START_TIMEOUT = 5.0      # Seconds to wait for the stream's first sample.
+REDETECT_INTERVAL = 60.0        # Seconds before a backend that failed is looked for again.
+STALE_INTERVALS = 5             # Stream intervals without a line after which the stream counts as stalled.
+
+GPU_QUERY = "index,uuid,name,utilization.gpu,memory.used,memory.total,temperature.gpu"
+APPS_QUERY = "gpu_uuid,pid,process_name,used_memory"
+
+# Memory figures are in MB, load in percent and temperature in degrees Celsius;
+# fields a backend cannot read are None.
+GpuInfo = namedtuple("GpuInfo", "index uuid name load memory_used memory_total temperature")
+GpuProcess = namedtuple("GpuProcess", "gpu_index pid name memory_used")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None     # "[N/A]", "[Not Supported]", ...
+
+
+class NullBackend:
+    """No GPU (or no way to read it)."""
+
+    name = "none"
+
+    def read_gpus(self):
+        return ()
+
+    def read_processes(self):
+        return ()
+
+    def close(self):
+        pass
+
+
+class MockBackend:
+    """Fixed or scripted readings, for machines without a GPU and for tests."""
+
+    name = "mock"
+
+    def __init__(self, gpus=(), processes=()):
+        self.gpus = tuple(gpus)
+        self.processes = tuple(processes)
+        self.reads = 0
+
+    def read_gpus(self):
+        self.reads += 1
+        return self.gpus
+
+    def read_processes(self):
+        return self.processes
+
+    def close(self):
+        pass
+
+
+class NvmlBackend:
+    """Direct NVML calls through the optional `pynvml` module (package nvidia-ml-py)."""
+
+    name = "nvml"
+
+    def __init__(self):
+        import pynvml   # ImportError / NVMLError mean this backend is unavailable.
+        self.nvml = pynvml
+        pynvml.nvmlInit()
+        self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+
+    @staticmethod
+    def _text(value):
+        return value.decode() if isinstance(value, bytes) else value
+
+    def read_gpus(self):
+        nvml = self.nvml
+        gpus = []
+        for index, handle in enumerate(self.handles):
+            memory = nvml.nvmlDeviceGetMemoryInfo(handle)
+            try:
+                temperature = nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)
+            except nvml.NVMLError:
+                temperature = None
+            gpus.append(GpuInfo(
+                index, self._text(nvml.nvmlDeviceGetUUID(handle)), self._text(nvml.nvmlDeviceGetName(handle)),
+                float(nvml.nvmlDeviceGetUtilizationRates(handle).gpu),
+                memory.used / (1024 * 1024), memory.total / (1024 * 1024), temperature
+            ))
+        return tuple(gpus)
+
+    def read_processes(self):
+        import psutil
+        nvml = self.nvml
+        processes = []
+        for index, handle in enumerate(self.handles):
+            for process in nvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                try:
+                    name = psutil.Process(process.pid).name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    name = ""
+                used = process.usedGpuMemory
+                processes.append(GpuProcess(index, process.pid, name, used / (1024 * 1024) if used else None))
+        return tuple(processes)
+
+    def close(self):
+        self.nvml.nvmlShutdown()
+
+
+class NvidiaSmiBackend:
+    """
+    One long-running `nvidia-smi --query-gpu ... -lms` process whose CSV lines
+    are parsed on a reader thread as they arrive; reads return the latest line
+    per GPU without starting a process. A stream that stops producing lines
+    fails like one that exited. Per-process memory is a one-shot query.
+    """
+
+    name = "nvidia-smi"
+
+    def __init__(self, executable="nvidia-smi", interval_ms=STREAM_INTERVAL_MS):
+        self.executable = executable
+        self.stale_after = max(interval_ms / 1000 * STALE_INTERVALS, STREAM_START_TIMEOUT)
+        self._latest = {}
+        self._last_line = time.monotonic()
+        self._first_sample = threading.Event()
+        self._process = subprocess.Popen(
+            [executable, f"--query-gpu={GPU_QUERY}", "--format=csv,noheader,nounits", f"-lms={interval_ms}"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, text=True
+        )
+        self._reader = threading.Thread(target=self._read_stream, name="nvidia-smi-stream", daemon=True)
+        self._reader.start()
+        if not self._first_sample.wait(STREAM_START_TIMEOUT) or not self._latest:
+            self.close()
+            raise OSError("nvidia-smi produced no GPU samples")
+
+    def _read_stream(self):
+        for line in self._process.stdout:
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) != 7 or not fields[0].isdigit():
+                continue
+            index = int(fields[0])
+            self._last_line = time.monotonic()
+            if index in self._latest:
+                self._first_sample.set()    # A full pass over all GPUs has been read.
+            self._latest[index] = GpuInfo(
+                index, fields[1], fields[2], _number(fields[3]), _number(fields[4]),
+                _number(fields[5]), _number(fields[6])
+            )
+        self._first_sample.set()
+
+    @property
+    def alive(self):
+        return self._process.poll() is None
+
+    def read_gpus(self):
+        if not self.alive:
+            raise OSError("nvidia-smi stream exited")
+        if time.monotonic() - self._last_line > self.stale_after:
+            raise OSError("nvidia-smi stream stalled")
+        return tuple(self._latest[index] for index in sorted(self._latest))
+
+    def read_processes(self):
+        indices = {gpu.uuid: gpu.index for gpu in list(self._latest.values())}
+        completed = subprocess.run(
+            [self.executable, f"--query-compute-apps={APPS_QUERY}", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=STREAM_START_TIMEOUT
+        )
+        processes = []
+        for line in completed.stdout.splitlines():
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) == 4 and fields[1].isdigit():
+                processes.append(GpuProcess(indices.get(fields[0]), int(fields[1]), fields[2], _number(fields[3])))
+        return tuple(processes)
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+
+def detect_backend():
+    """NVML if pynvml works, else a persistent nvidia-smi stream, else no GPU."""
+    try:
+        return NvmlBackend()
+    except Exception:
+        pass
+    if shutil.which("nvidia-smi"):
+        try:
+            return NvidiaSmiBackend()
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return NullBackend()
+
+
+class GpuTelemetry:
+    """
+    TTL cache in front of a GPU backend. A backend that starts failing is
+    replaced by NullBackend, so callers see "no GPU" rather than errors, and
+    detection is tried again after REDETECT_INTERVAL seconds.
+    """
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL, process_ttl=PROCESS_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.process_ttl = process_ttl
+        self._lock = threading.Lock()
+        self._processes_lock = threading.Lock()     # One process query at a time, without blocking gpus().
+        self._gpus = ()
+        self._gpus_time = None
+        self._processes = ()
+        self._processes_time = None
+        self._redetect_at = None
+
+    def _backend(self):
+        if self._redetect_at is not None and time.monotonic() >= self._redetect_at:
+            self._redetect_at = None
+            self.backend = None
+        if self.backend is None:
+            self.backend = detect_backend()
+        return self.backend
+
+    def _disable(self):
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+        self.backend = NullBackend()
+        self._redetect_at = time.monotonic() + REDETECT_INTERVAL
+
+    def gpus(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._gpus_time is None or now - self._gpus_time >= self.ttl:
+                try:
+                    self._gpus = self._backend().read_gpus()
+                except Exception:
+                    self._disable()
+                    self._gpus = ()
+                self._gpus_time = now
+            return self._gpus
+
+    def processes(self):
+        with self._processes_lock:
+            with self._lock:
+                now = time.monotonic()
+                if self._processes_time is not None and now - self._processes_time < self.process_ttl:
+                    return self._processes
+                backend = self._backend()
+            # The nvidia-smi query can take seconds; readers of gpus() must not wait for it.
+            try:
+                processes = backend.read_processes()
+            except Exception:
+                processes = ()
+            with self._lock:
+                self._processes = processes
+                self._processes_time = now
+            return processes
+
+    def close(self):
+        with self._lock:
+            if self.backend is not None:
+                self.backend.close()
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Process-wide GpuTelemetry; the backend is detected on first use."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = GpuTelemetry()
+            # The nvidia-smi stream is a child process and must not outlive us.
+            atexit.register(_telemetry.close)
+        return _telemetry
+
+
+def set_telemetry(telemetry):
+    """Replaces the process-wide instance (e.g. with a MockBackend one)."""
+    global _telemetry
+    with _telemetry_lock:
+        _telemetry = telemetry
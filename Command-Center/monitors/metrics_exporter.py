@@ -0,0 +1,202 @@
+# metrics_exporter.py
+#
+# Serves the latest monitor snapshots in OpenMetrics / Prometheus text format.
+# The payload is rendered when a new snapshot arrives, so a scrape only copies
+# cached bytes. Runs inside the GUI (METRICS_EXPORTER_ENABLED in config.py) or
+# headless, without PySide6:
+#
+#   python -m monitors.metrics_exporter --port 9464
+
+import argparse
+import signal
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import METRICS_EXPORTER_HOST, METRICS_EXPORTER_PORT
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "commandcenter_"
+MB = 1024 * 1024
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Families:
+    """Collects samples grouped by metric family, in first-seen order."""
+
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, help_text, value, labels=None, kind="gauge"):
+        if value is None:
+            return
+        family = self.families.setdefault(PREFIX + name, (kind, help_text, []))
+        family[2].append(f"{PREFIX}{name}{_labels(labels)} {float(value)!r}")
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text, samples) in self.families.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(samples)
+        lines.append("# EOF")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def render_metrics(resources=None, docker=None, host=None):
+    """OpenMetrics text for a ResourceSnapshot and a DockerState (either may be None)."""
+    families = _Families()
+    instance = {"host": host or socket.gethostname()}
+    families.add("up", "Whether the exporter has a resource snapshot", 1 if resources else 0, instance)
+    if resources is not None:
+        families.add("snapshot_timestamp_seconds", "Time of the resource snapshot", resources.time)
+        families.add("cpu_usage_percent", "Total CPU load", resources.cpu)
+        families.add("memory_usage_percent", "Used physical memory", resources.memory)
+        for gpu in resources.gpus or ():
+            labels = {"gpu": gpu.index}
+            families.add("gpu_load_percent", "GPU utilization", gpu.load, labels)
+            families.add("gpu_memory_used_bytes", "GPU memory in use",
+                         gpu.memory_used * MB if gpu.memory_used is not None else None, labels)
+            families.add("gpu_memory_total_bytes", "GPU memory size",
+                         gpu.memory_total * MB if gpu.memory_total is not None else None, labels)
+            families.add("gpu_temperature_celsius", "GPU temperature", gpu.temperature, labels)
+        if resources.gpus is not None:
+            families.add("gpu_data_stale", "1 when the GPU readings are older than expected",
+                         1 if resources.gpu_stale else 0)
+        breakdown = resources.processes
+        if breakdown is not None:
+            for core, load in enumerate(breakdown.per_core):
+                families.add("cpu_core_usage_percent", "Per-core CPU load", load, {"core": core})
+            for service in breakdown.services:
+                labels = {"service": service.service}
+                families.add("service_cpu_percent", "CPU used by a service, in percent of one core",
+                             service.cpu, labels)
+                families.add("service_rss_bytes", "Resident memory of a service", service.rss, labels)
+                families.add("service_processes", "Processes attributed to a service", service.processes, labels)
+                families.add("service_disk_read_bytes_per_second", "Disk read rate of a service",
+                             service.read_rate, labels)
+                families.add("service_disk_write_bytes_per_second", "Disk write rate of a service",
+                             service.write_rate, labels)
+    if docker is not None:
+        families.add("docker_engine_up", "Whether the Docker engine is running", 1 if docker.engine_running else 0,
+                     {"source": docker.source})
+        for container in docker.containers:
+            labels = {"service": container.service or "", "name": container.name}
+            families.add("container_running", "1 when the container is running",
+                         1 if container.state == "running" else 0, labels)
+            if container.health:
+                families.add("container_healthy", "1 when the container health check passes",
+                             1 if container.health == "healthy" else 0, labels)
+    return families.render()
+
+
+class MetricsExporter:
+    """
+    HTTP endpoint for the latest snapshots. Feed it with `update_resources()`
+    and `update_docker()` (from any thread, e.g. as sampler callbacks); each
+    update re-renders the payload once and scrapes just return it.
+    """
+
+    def __init__(self, host=METRICS_EXPORTER_HOST, port=METRICS_EXPORTER_PORT):
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self._resources = None
+        self._docker = None
+        self._lock = threading.Lock()
+        self._payload = render_metrics()
+        self._server = None
+        self._thread = None
+
+    def update_resources(self, snapshot):
+        with self._lock:
+            self._resources = snapshot
+            self._payload = render_metrics(self._resources, self._docker)
+
+    def update_docker(self, state):
+        with self._lock:
+            self._docker = state
+            self._payload = render_metrics(self._resources, self._docker)
+
+    @property
+    def payload(self):
+        return self._payload
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    body = b"Command-Center metrics: /metrics\n"
+                    self.send_response(200 if self.path == "/" else 404)
+                    self.send_header("Content-Type", "text/plain; charset=utf-8")
+                else:
+                    body = exporter.payload
+                    exporter.scrapes += 1
+                    openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                    self.send_response(200)
+                    self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    from monitors.docker_monitor import DockerStateTracker
+    from monitors.resource_sampler import DEFAULT_INTERVAL, ResourceSampler
+
+    parser = argparse.ArgumentParser(description="Serve Command-Center monitor metrics for Prometheus.")
+    parser.add_argument("--host", default=METRICS_EXPORTER_HOST)
+    parser.add_argument("--port", type=int, default=METRICS_EXPORTER_PORT)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Seconds between samples")
+    parser.add_argument("--no-docker", action="store_true", help="Don't track the Docker engine")
+    args = parser.parse_args(argv)
+
+    exporter = MetricsExporter(args.host, args.port).start()
+    sampler = ResourceSampler(exporter.update_resources, interval=args.interval).start()
+    tracker = None if args.no_docker else DockerStateTracker(exporter.update_docker).start()
+    print(f"Serving metrics on http://{args.host}:{exporter.port}/metrics")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    sampler.stop()
+    if tracker:
+        tracker.stop()
+    exporter.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# metrics_history.py
+
+import math
+from array import array
+
+# (bucket width in seconds, number of buckets): 1 s for the last hour,
+# 1 min for the last day and 10 min for the last week. With a mean and a
+# maximum per bucket that is about 70 KB per metric.
+DEFAULT_TIERS = ((1, 3600), (60, 1440), (600, 1008))
+
+NAN = float("nan")
+
+
+class Tier:
+    """
+    Fixed-size ring of buckets of one resolution. Bucket `b` covers the
+    seconds [b * resolution, (b + 1) * resolution) and lives in slot
+    b % capacity; buckets without samples hold NaN.
+    """
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.means = array("d", [NAN]) * capacity
+        self.maxima = array("d", [NAN]) * capacity
+        self.last_bucket = None
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp, value):
+        bucket = int(timestamp // self.resolution)
+        if self.last_bucket is not None and bucket < self.last_bucket:
+            return  # Clock went backwards; drop the sample.
+        if bucket != self.last_bucket:
+            if self.last_bucket is not None:
+                for gap in range(max(self.last_bucket + 1, bucket - self.capacity + 1), bucket):
+                    self.means[gap % self.capacity] = NAN
+                    self.maxima[gap % self.capacity] = NAN
+            self.last_bucket = bucket
+            self._sum = 0.0
+            self._count = 0
+            self.maxima[bucket % self.capacity] = value
+        elif not value <= self.maxima[bucket % self.capacity]:
+            self.maxima[bucket % self.capacity] = value
+        # The open bucket is kept up to date so the newest point is visible immediately.
+        self._sum += value
+        self._count += 1
+        self.means[bucket % self.capacity] = self._sum / self._count
+
+    def value(self, bucket, maxima=False):
+        """Mean (or maximum) of a bucket; NaN if it holds no samples or has been overwritten."""
+        if self.last_bucket is None or bucket > self.last_bucket or bucket <= self.last_bucket - self.capacity:
+            return NAN
+        return (self.maxima if maxima else self.means)[bucket % self.capacity]
+
+    def values(self, count=None, maxima=False):
+        """The newest `count` buckets in chronological order, as one array('d')."""
+        count = self.capacity if count is None else min(count, self.capacity)
+        result = array("d", [NAN]) * count
+        if self.last_bucket is None:
+            return result
+        source = self.maxima if maxima else self.means
+        end = self.last_bucket % self.capacity + 1
+        start = end - count
+        if start >= 0:
+            result[:] = source[start:end]
+        else:
+            result[:-start] = source[start:]
+            result[-start:] = source[:end]
+        return result
+
+
+class MetricSeries:
+    """One metric kept at every tier resolution."""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [Tier(resolution, capacity) for resolution, capacity in tiers]
+        self.latest = NAN
+
+    def add(self, timestamp, value):
+        if value is None or math.isnan(value):
+            return
+        self.latest = value
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+
+class MetricsHistory:
+    """
+    Named MetricSeries fed from ResourceSnapshot objects. Not thread-safe: use
+    it from the thread that receives the snapshots (the GUI thread).
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tier_specs = tuple(tiers)
+        self.series = {}
+
+    def get(self, name):
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = MetricSeries(self.tier_specs)
+        return series
+
+    def add(self, name, timestamp, value):
+        self.get(name).add(timestamp, value)
+
+    def record(self, snapshot):
+        self.add("cpu", snapshot.time, snapshot.cpu)
+        self.add("memory", snapshot.time, snapshot.memory)
+        if snapshot.gpus and not snapshot.gpu_stale:
+            for gpu in snapshot.gpus:
+                self.add(f"gpu{gpu.index}_load", snapshot.gpu_time, gpu.load)
+                self.add(f"gpu{gpu.index}_memory_used", snapshot.gpu_time, gpu.memory_used)
+        if snapshot.processes:
+            for service in snapshot.processes.services:
+                self.add(f"service_{service.service}_cpu", snapshot.processes.time, service.cpu)
+                self.add(f"service_{service.service}_rss", snapshot.processes.time, service.rss)
+
+    def memory_bytes(self):
+        return sum(
+            tier.means.itemsize * tier.capacity * 2
+            for series in self.series.values() for tier in series.tiers
+        )
@@ -0,0 +1,173 @@
+# process_monitor.py
+
+import re
+import time
+from collections import namedtuple
+import psutil
+
+DEFAULT_TOP_N = 10
+FULL_SCAN_INTERVAL = 30.0       # Seconds between scans of every pid; ticks in between read only the hot set.
+
+# Compose services of the LibreChat stack and how their processes look on the
+# host: (service, process name pattern, command line pattern or None).
+SERVICE_RULES = (
+    ("ollama", r"^ollama", None),
+    ("mongodb", r"^mongod$", None),
+    ("meilisearch", r"^meilisearch", None),
+    ("vectordb", r"^postgres", None),
+    ("api", r"^node(\.exe)?$", r"api[/\\]server"),
+    ("rag_api", r"^(python[\d.]*|uvicorn)(\.exe)?$", r"uvicorn|rag_api|main\.py"),
+    ("docker", r"^(dockerd|containerd|com\.docker\.|docker desktop|vpnkit)", None),
+)
+
+CONTAINER_PATTERN = re.compile(r"(?:docker[-/]|/containers?/)([0-9a-f]{64})")
+
+ProcessSample = namedtuple("ProcessSample", "pid name service container cpu rss read_rate write_rate")
+ServiceSample = namedtuple("ServiceSample", "service processes cpu rss read_rate write_rate")
+ProcessBreakdown = namedtuple("ProcessBreakdown", "time per_core services top")
+
+
+def classify(name, cmdline, rules=SERVICE_RULES):
+    """Service a process belongs to, or None."""
+    for service, name_pattern, cmd_pattern in rules:
+        if re.search(name_pattern, name, re.IGNORECASE) and (
+            cmd_pattern is None or re.search(cmd_pattern, cmdline, re.IGNORECASE)
+        ):
+            return service
+    return None
+
+
+def container_of(pid):
+    """Short id of the Docker container a process runs in (Linux hosts only), else None."""
+    try:
+        with open(f"/proc/{pid}/cgroup", "r", encoding="utf-8") as f:
+            match = CONTAINER_PATTERN.search(f.read())
+    except OSError:
+        return None
+    return match.group(1)[:12] if match else None
+
+
+class _Tracked:
+    """A cached psutil.Process plus what was learned about it when first seen."""
+
+    __slots__ = ("process", "name", "service", "container", "io", "io_time")
+
+    def __init__(self, process, name, service, container):
+        self.process = process
+        self.name = name
+        self.service = service
+        self.container = container
+        self.io = None
+        self.io_time = None
+
+
+class ProcessSampler:
+    """
+    Attributes CPU, RSS and disk I/O to processes and to the compose services
+    in SERVICE_RULES.
+
+    psutil.Process handles are cached by pid across calls: `cpu_percent` needs
+    the same object between two samples, and a process's name, command line
+    and container are looked up only once. Every `full_scan_interval` seconds
+    a `sample()` lists all pids, drops the handles of processes that exited
+    and reads one `oneshot()` block per live process; the calls in between
+    only read the "hot" set that scan found: the top N plus every process of
+    a service. A process outside it that becomes busy therefore shows up at
+    the next full scan, with its CPU averaged since the previous one. Process
+    CPU is in percent of one core, like `top`.
+    """
+
+    def __init__(self, rules=SERVICE_RULES, top_n=DEFAULT_TOP_N, full_scan_interval=FULL_SCAN_INTERVAL):
+        self.rules = rules
+        self.top_n = top_n
+        self.full_scan_interval = full_scan_interval
+        self._tracked = {}
+        self._hot = set()
+        self._next_full = None
+        psutil.cpu_percent(interval=None, percpu=True)   # Reference point for per-core deltas.
+
+    def _track(self, pid):
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                name = process.name()
+                try:
+                    cmdline = " ".join(process.cmdline())
+                except (psutil.AccessDenied, psutil.ZombieProcess):
+                    cmdline = ""
+                process.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        return _Tracked(process, name, classify(name, cmdline, self.rules), container_of(pid))
+
+    def sample(self):
+        now = time.time()
+        full = self._next_full is None or now >= self._next_full
+        if full:
+            pids = set(psutil.pids())
+            for pid in set(self._tracked) - pids:
+                del self._tracked[pid]
+        else:
+            pids = self._hot & self._tracked.keys()
+
+        samples = []
+        new_services = set()
+        for pid in pids:
+            tracked = self._tracked.get(pid)
+            if tracked is None:
+                tracked = self._track(pid)
+                if tracked is not None:
+                    self._tracked[pid] = tracked
+                    if tracked.service is not None:
+                        new_services.add(pid)
+                continue    # CPU needs a second sample; new service processes show up next tick.
+            try:
+                with tracked.process.oneshot():
+                    cpu = tracked.process.cpu_percent(interval=None)
+                    rss = tracked.process.memory_info().rss
+                    try:
+                        io = tracked.process.io_counters()
+                    except (psutil.AccessDenied, AttributeError):
+                        io = None
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                del self._tracked[pid]
+                continue
+            except psutil.AccessDenied:
+                continue
+            read_rate = write_rate = 0.0
+            if io is not None:
+                if tracked.io is not None and now > tracked.io_time:
+                    elapsed = now - tracked.io_time
+                    read_rate = max(0, io.read_bytes - tracked.io.read_bytes) / elapsed
+                    write_rate = max(0, io.write_bytes - tracked.io.write_bytes) / elapsed
+                tracked.io = io
+                tracked.io_time = now
+            samples.append(ProcessSample(
+                pid, tracked.name, tracked.service, tracked.container, cpu, rss, read_rate, write_rate
+            ))
+
+        totals = {}
+        for sample in samples:
+            if sample.service is None:
+                continue
+            count, cpu, rss, read_rate, write_rate = totals.get(sample.service, (0, 0.0, 0, 0.0, 0.0))
+            totals[sample.service] = (count + 1, cpu + sample.cpu, rss + sample.rss,
+                                      read_rate + sample.read_rate, write_rate + sample.write_rate)
+        services = sorted(
+            (ServiceSample(service, *values) for service, values in totals.items()),
+            key=lambda s: (s.cpu, s.rss), reverse=True
+        )
+        samples.sort(key=lambda s: (s.cpu, s.rss), reverse=True)
+        if full:
+            self._hot = ({sample.pid for sample in samples[:self.top_n]} | new_services
+                         | {sample.pid for sample in samples if sample.service is not None})
+            # The first call only sets the CPU reference points, so the next one scans again.
+            self._next_full = now + self.full_scan_interval if samples else now
+        else:
+            self._hot &= self._tracked.keys()
+        return ProcessBreakdown(
+            time=now,
+            per_core=tuple(psutil.cpu_percent(interval=None, percpu=True)),
+            services=tuple(services),
+            top=tuple(samples[:self.top_n]),
+        )
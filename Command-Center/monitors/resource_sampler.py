@@ -0,0 +1,103 @@
+# resource_sampler.py
+
+import threading
+import time
+from collections import namedtuple
+from psutil import cpu_percent, virtual_memory
+from monitors import system_monitor
+from monitors.process_monitor import ProcessSampler
+
+DEFAULT_INTERVAL = 1.0          # Seconds between CPU/memory snapshots.
+DEFAULT_GPU_INTERVAL = 2.0      # Seconds between GPU queries (each one may fork nvidia-smi).
+GPU_STALE_FACTOR = 3            # GPU data older than this many GPU intervals is flagged as stale.
+DEFAULT_PROCESS_INTERVAL = 3.0  # Seconds between per-process breakdowns.
+
+# Immutable snapshot handed to the UI. `gpus` is None until the first GPU
+# query has finished, then a tuple of GpuSnapshot (empty without a GPU).
+# `processes` is the latest process_monitor.ProcessBreakdown, or None.
+ResourceSnapshot = namedtuple("ResourceSnapshot", "time cpu memory gpus gpu_time gpu_stale processes")
+GpuSnapshot = namedtuple("GpuSnapshot", "index load memory_used memory_total temperature")
+
+
+class ResourceSampler:
+    """
+    Samples CPU, memory and GPU usage off the GUI thread.
+
+    CPU load comes from non-blocking `cpu_percent(interval=None)` deltas between
+    two samples. GPUs are queried on a separate thread, so a slow or hung
+    `nvidia-smi` only makes the GPU part of the snapshots stale and never
+    delays the CPU and memory readings. Every snapshot is passed to `callback`
+    on the sampler thread (GUI code should re-emit it through a Qt signal).
+    """
+
+    def __init__(self, callback=None, interval=DEFAULT_INTERVAL, gpu_interval=DEFAULT_GPU_INTERVAL,
+                 process_interval=DEFAULT_PROCESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.gpu_interval = gpu_interval
+        self.process_interval = process_interval
+        self.latest = None
+        self._process_sampler = None
+        self._processes = None
+        self._gpus = None
+        self._gpu_time = None
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._sample_loop, name="resource-sampler", daemon=True),
+            threading.Thread(target=self._gpu_loop, name="gpu-sampler", daemon=True),
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        # The GPU thread may be stuck in nvidia-smi; it is a daemon, so don't wait for it.
+        self._threads[0].join(timeout)
+
+    def sample(self):
+        now = time.time()
+        gpu_time = self._gpu_time
+        stale = gpu_time is None or now - gpu_time > self.gpu_interval * GPU_STALE_FACTOR
+        snapshot = ResourceSnapshot(
+            time=now,
+            cpu=cpu_percent(interval=None),
+            memory=virtual_memory().percent,
+            gpus=self._gpus,
+            gpu_time=gpu_time,
+            gpu_stale=stale,
+            processes=self._processes,
+        )
+        self.latest = snapshot
+        return snapshot
+
+    def _sample_loop(self):
+        cpu_percent(interval=None)   # The first call only sets the reference point.
+        if self.process_interval:
+            self._process_sampler = ProcessSampler()
+            self._process_sampler.sample()
+        next_breakdown = time.time() + self.process_interval
+        while not self._stop.wait(self.interval):
+            if self._process_sampler and time.time() >= next_breakdown:
+                self._processes = self._process_sampler.sample()
+                next_breakdown = time.time() + self.process_interval
+            snapshot = self.sample()
+            if self.callback:
+                self.callback(snapshot)
+
+    def _gpu_loop(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                gpus = tuple(
+                    GpuSnapshot(gpu["index"], gpu["load"], gpu["memory_used"], gpu["memory_total"],
+                                gpu["temperature"])
+                    for gpu in system_monitor.get_gpu_usage()
+                )
+            except Exception:
+                gpus = ()
+            self._gpus = gpus
+            self._gpu_time = time.time()
+            self._stop.wait(max(0.0, self.gpu_interval - (self._gpu_time - started)))
@@ -1,7 +1,7 @@
 # system_monitor.py
 
-import GPUtil
 from psutil import cpu_percent, virtual_memory
+from monitors.gpu_telemetry import get_telemetry
 
 def get_cpu_usage():
     return cpu_percent(interval=0.1)
@@ -10,13 +10,19 @@ def get_memory_usage():
     return virtual_memory().percent
 
 def get_gpu_usage():
-    gpus = GPUtil.getGPUs()
+    # Cached readings from a persistent NVML / nvidia-smi session (see gpu_telemetry).
     gpu_data = []
-    if gpus:
-        for i, gpu in enumerate(gpus):
-            gpu_data.append({
-                "index": i,
-                "load": gpu.load * 100,
-                "memory_used": gpu.memoryUsed
-            })
+    for gpu in get_telemetry().gpus():
+        gpu_data.append({
+            "index": gpu.index,
+            "name": gpu.name,
+            "load": gpu.load or 0.0,
+            "memory_used": gpu.memory_used or 0.0,
+            "memory_total": gpu.memory_total,
+            "temperature": gpu.temperature
+        })
     return gpu_data
+
+def get_gpu_processes():
+    # Per-process GPU memory in MB: [{"gpu_index", "pid", "name", "memory_used"}]
+    return [process._asdict() for process in get_telemetry().processes()]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The Command Center modules import each other from the package root (`from config import ...`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
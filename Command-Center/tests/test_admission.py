@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from inference import admission
+from inference.admission import AdmissionController
+from inference.ollama_client import LoadedModel, ModelInfo
+
+MB = 1024 * 1024
+
+
+class StubClient:
+    """Ollama with three 4000 MB models, of which A and B are loaded. Names come back tagged, as from /api/tags."""
+
+    def __init__(self):
+        self.loaded = ["A:latest", "B:latest"]
+        self.tag_lists = 0
+
+    def list_models(self):
+        self.tag_lists += 1
+        return [ModelInfo(name, int(4000 * MB / admission.FOOTPRINT_FACTOR), "", "sha-" + name, "", "", "")
+                for name in ("A:latest", "B:latest", "C:latest")]
+
+    def running_models(self):
+        return [LoadedModel(name, 4000 * MB, 4000 * MB, None) for name in self.loaded]
+
+
+class AdmissionTest(unittest.TestCase):
+
+    def setUp(self):
+        # No GPU: the simulated budget is capacity_mb minus the reserve.
+        patcher = mock.patch.object(admission, "get_gpu_usage", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = StubClient()
+        self.controller = AdmissionController(self.client, capacity_mb=10000, reserve_mb=0, switch_after=0.1,
+                                              max_wait=3.0, refresh_interval=3600).start()
+        self.addCleanup(self.controller.stop)
+
+    def test_resident_model_is_admitted_at_once(self):
+        ticket = self.controller.acquire("A")
+        self.controller.release(ticket)
+        self.assertEqual(ticket.model, "A")
+        self.assertEqual(ticket.evicted, ())
+        self.assertLess(ticket.waited, 0.5)
+
+    def test_untagged_names_are_admission_controlled(self):
+        a = self.controller.acquire("A")
+        b = self.controller.acquire("B:latest")
+        lists = self.client.tag_lists
+        tickets = []
+        waiter = threading.Thread(target=lambda: tickets.append(self.controller.acquire("C")))
+        waiter.start()
+        waiter.join(0.3)
+        # "C" is "C:latest" from /api/tags: it needs an eviction, so it queues behind the busy models.
+        self.assertEqual(tickets, [])
+        self.assertEqual(self.controller.stats()["queued_by_model"], {"C:latest": 1})
+        self.assertEqual(self.client.tag_lists, lists)
+        self.controller.release(a)
+        waiter.join(2)
+        self.controller.release(b)
+        self.controller.release(tickets[0])
+        self.assertEqual(tickets[0].model, "C")     # Not a redirect: the request keeps its spelling.
+        self.assertEqual(tickets[0].evicted, ("A:latest",))
+        self.assertEqual(self.controller.stats()["active"], {})
+
+    def test_unknown_names_are_looked_up_once_per_ttl(self):
+        lists = self.client.tag_lists
+        for _ in range(5):
+            self.controller.release(self.controller.acquire("no-such-model"))
+        self.assertEqual(self.client.tag_lists, lists + 1)
+
+    def test_draining_is_cleared_when_another_model_makes_room(self):
+        a = self.controller.acquire("A")
+        time.sleep(0.01)
+        b = self.controller.acquire("B")
+        tickets = []
+        waiter = threading.Thread(target=lambda: tickets.append(self.controller.acquire("C")))
+        waiter.start()
+        # C has waited past switch_after, so the least recently used model (A) drains.
+        deadline = time.monotonic() + 2
+        while self.controller.stats()["draining"] != ["A"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.controller.stats()["draining"], ["A:latest"])
+
+        # B goes idle first and is evicted for C instead of A.
+        self.controller.release(b)
+        waiter.join(2)
+        self.assertEqual(tickets[0].evicted, ("B:latest",))
+        self.controller.release(tickets[0])
+        self.assertEqual(self.controller.stats()["draining"], [])
+
+        # A is still resident and must take requests again without waiting for max_wait.
+        again = self.controller.acquire("A")
+        self.controller.release(again)
+        self.controller.release(a)
+        self.assertFalse(again.forced)
+        self.assertLess(again.waited, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
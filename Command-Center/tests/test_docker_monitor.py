@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+from monitors.docker_monitor import ContainerState, DockerState, DockerStateTracker
+
+
+def container(container_id, service, state, status=""):
+    return {"Id": container_id, "Names": [f"/librechat-{service}-1"], "State": state, "Status": status,
+            "Labels": {"com.docker.compose.service": service, "com.docker.compose.project": "librechat"}}
+
+
+class FakeEngine:
+    """
+    Docker Engine API stub on a Unix socket. Every /events connection pops the
+    next entry of `streams`: its events are sent and the stream is closed, except
+    for the last one, which stays open until stop(). `listings` works the same
+    way for /containers/json.
+    """
+
+    def __init__(self, socket_path, listings, streams):
+        self.listings = list(listings)
+        self.streams = list(streams)
+        self.event_connections = 0
+        self.release = threading.Event()
+        engine = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body):
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/_ping":
+                    self._send(b"OK")
+                elif self.path.startswith("/containers/json"):
+                    listing = engine.listings.pop(0) if len(engine.listings) > 1 else engine.listings[0]
+                    self._send(json.dumps(listing).encode())
+                elif self.path.startswith("/events"):
+                    engine.event_connections += 1
+                    last = len(engine.streams) == 1
+                    events = engine.streams[0] if last else engine.streams.pop(0)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    self.close_connection = True
+                    for event in events:
+                        self.wfile.write(json.dumps(event).encode() + b"\n")
+                        self.wfile.flush()
+                    if last:
+                        engine.release.wait(10)
+                else:
+                    self.send_error(404)
+
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class DockerStateTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, True)
+        self.socket_path = os.path.join(folder, "docker.sock")
+        patcher = mock.patch("monitors.docker_monitor.is_docker_running", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.states = []
+
+    def start(self, listings, streams):
+        engine = FakeEngine(self.socket_path, listings, streams)
+        self.addCleanup(engine.stop)
+        tracker = DockerStateTracker(self.states.append, socket_path=self.socket_path).start()
+        self.addCleanup(tracker.stop)
+        return engine, tracker
+
+    def wait_for(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_listing_and_events_are_tracked_then_stream_end_reconnects(self):
+        first = [container("a" * 64, "api", "running", "Up 2 minutes (health: starting)"),
+                 container("m" * 64, "mongodb", "running", "Up 2 minutes")]
+        second = [container("a" * 64, "api", "exited", "Exited (1) 1 second ago"),
+                  container("m" * 64, "mongodb", "running", "Up 3 minutes")]
+        events = [
+            {"Type": "container", "Action": "health_status: healthy", "Actor": {"ID": "a" * 64}},
+            {"Type": "container", "Action": "start", "Actor": {"ID": "r" * 64, "Attributes": {
+                "name": "librechat-rag_api-1", "com.docker.compose.service": "rag_api"}}},
+            {"Type": "container", "Action": "exec_start: sh", "Actor": {"ID": "m" * 64}},
+            {"Type": "container", "Action": "die", "Actor": {"ID": "m" * 64}},
+        ]
+        engine, tracker = self.start([first, second], [events, []])
+
+        listed = DockerState(True, "api", (
+            ContainerState("a" * 12, "librechat-api-1", "api", "running", "starting"),
+            ContainerState("m" * 12, "librechat-mongodb-1", "mongodb", "running", None),
+        ))
+        after_events = DockerState(True, "api", (
+            ContainerState("a" * 12, "librechat-api-1", "api", "running", "healthy"),
+            ContainerState("m" * 12, "librechat-mongodb-1", "mongodb", "exited", None),
+            ContainerState("r" * 12, "librechat-rag_api-1", "rag_api", "running", None),
+        ))
+        relisted = DockerState(True, "api", (
+            ContainerState("a" * 12, "librechat-api-1", "api", "exited", None),
+            ContainerState("m" * 12, "librechat-mongodb-1", "mongodb", "running", None),
+        ))
+        self.assertTrue(self.wait_for(lambda: tracker.state == relisted), self.states)
+        self.assertEqual(engine.event_connections, 2)
+        self.assertEqual(self.states[0], listed)
+        self.assertIn(after_events, self.states)
+        # The stream ending drops to the process check before reconnecting.
+        ended = self.states.index(after_events) + 1
+        self.assertEqual(self.states[ended], DockerState(False, "process", ()))
+
+    def test_missing_socket_falls_back_to_the_process_check(self):
+        tracker = DockerStateTracker(self.states.append, socket_path=self.socket_path)
+        with mock.patch("monitors.docker_monitor.is_docker_running", return_value=True):
+            tracker.start()
+            self.addCleanup(tracker.stop)
+            self.assertTrue(self.wait_for(lambda: tracker.state.engine_running))
+        self.assertEqual(tracker.state, DockerState(True, "process", ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from monitors import gpu_telemetry
+from monitors.gpu_telemetry import GpuInfo, GpuProcess, GpuTelemetry, NullBackend, NvidiaSmiBackend
+
+LINE = "0, GPU-1, Fake GPU, 10, 100, 8000, 40"
+
+# Fake nvidia-smi: the compute-apps query answers at once, the GPU query
+# streams lines forever, stops after two lines, or exits after two lines.
+SCRIPTS = {
+    "stream": f'while :; do echo "{LINE}"; sleep 0.05; done',
+    "stall": f'echo "{LINE}"; echo "{LINE}"; exec sleep 60',
+    "exit": f'echo "{LINE}"; echo "{LINE}"',
+}
+
+
+@unittest.skipIf(sys.platform == "win32", "fake nvidia-smi is a shell script")
+class NvidiaSmiStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, True)
+        # Short timeouts keep the stall detection (and the tests) fast.
+        for name, value in (("STREAM_START_TIMEOUT", 0.5), ("REDETECT_INTERVAL", 0.2)):
+            patcher = mock.patch.object(gpu_telemetry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_smi(self, behaviour):
+        folder = os.path.join(self.folder, behaviour)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "nvidia-smi")
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n"
+                    'case "$*" in *compute-apps*) echo "GPU-1, 42, ollama, 900"; exit 0;; esac\n'
+                    f"{SCRIPTS[behaviour]}\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def backend(self, behaviour):
+        backend = NvidiaSmiBackend(self.fake_smi(behaviour), interval_ms=100)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_stream_lines_are_parsed(self):
+        backend = self.backend("stream")
+        self.assertEqual(backend.read_gpus(), (GpuInfo(0, "GPU-1", "Fake GPU", 10.0, 100.0, 8000.0, 40.0),))
+        self.assertEqual(backend.read_processes(), (GpuProcess(0, 42, "ollama", 900.0),))
+
+    def test_stream_that_stops_emitting_counts_as_stalled(self):
+        backend = self.backend("stall")
+        self.assertEqual(len(backend.read_gpus()), 1)
+        time.sleep(backend.stale_after + 0.1)
+        self.assertTrue(backend.alive)
+        with self.assertRaisesRegex(OSError, "stalled"):
+            backend.read_gpus()
+
+    def test_stream_that_exits_fails(self):
+        backend = self.backend("exit")
+        backend._process.wait(5)
+        with self.assertRaisesRegex(OSError, "exited"):
+            backend.read_gpus()
+
+    def test_stalled_stream_falls_back_and_is_restarted(self):
+        stalled = self.backend("stall")
+        telemetry = GpuTelemetry(stalled, ttl=0)
+        self.addCleanup(telemetry.close)
+        self.assertEqual(len(telemetry.gpus()), 1)
+
+        time.sleep(stalled.stale_after + 0.1)
+        self.assertEqual(telemetry.gpus(), ())
+        self.assertIsInstance(telemetry.backend, NullBackend)
+        self.assertFalse(stalled.alive)     # The stalled nvidia-smi is killed, not leaked.
+
+        # Redetection finds a working nvidia-smi on PATH and starts a new stream.
+        path = os.path.dirname(self.fake_smi("stream"))
+        with mock.patch.dict(os.environ, {"PATH": path + os.pathsep + os.environ.get("PATH", "")}), \
+                mock.patch.object(gpu_telemetry, "NvmlBackend", side_effect=ImportError):
+            time.sleep(gpu_telemetry.REDETECT_INTERVAL)
+            gpus = telemetry.gpus()
+        self.assertIsInstance(telemetry.backend, NvidiaSmiBackend)
+        self.assertIsNot(telemetry.backend, stalled)
+        self.assertEqual([gpu.name for gpu in gpus], ["Fake GPU"])
+
+
+if __name__ == "__main__":
+    unittest.main()
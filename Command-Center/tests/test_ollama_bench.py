@@ -0,0 +1,89 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+from benchmarks import ollama_bench
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.ollama_bench import DEFAULT_PROMPTS, compare, percentile, run_level, run_suite
+from inference.ollama_client import OllamaClient
+from monitors.resource_sampler import ResourceSampler
+
+MODEL = "llama3.2:3b"
+GPU = {"index": 0, "load": 50.0, "memory_used": 2000.0, "memory_total": 8000.0, "temperature": 40.0}
+
+
+def level(name, tokens_per_sec, ttft_p95):
+    return {"name": name, "tokens_per_sec": tokens_per_sec, "ttft": {"p95": ttft_p95}}
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_interpolates_between_ranks(self):
+        self.assertEqual(percentile([7.0], 95), 7.0)
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2.5)
+        self.assertEqual(percentile([4, 1, 3, 2], 0), 1)
+        self.assertEqual(percentile([4, 1, 3, 2], 100), 4)
+        self.assertAlmostEqual(percentile(list(range(1, 102)), 95), 96)
+
+
+class CompareTest(unittest.TestCase):
+
+    def compare(self, results, baseline, threshold=0.10):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return compare(results, {"results": baseline}, threshold)
+
+    def test_throughput_drop_and_ttft_rise_are_regressions(self):
+        baseline = [level("generate/c1", 100.0, 0.200), level("generate/c2", 180.0, 0.300),
+                    level("generate/c4", 300.0, 0.400)]
+        results = [level("generate/c1", 85.0, 0.200),     # -15% tokens/sec
+                   level("generate/c2", 180.0, 0.360),    # +20% TTFT p95
+                   level("generate/c4", 295.0, 0.420)]    # Within the threshold.
+        self.assertEqual(self.compare(results, baseline), ["generate/c1", "generate/c2"])
+        self.assertEqual(self.compare(results, baseline, threshold=0.25), [])
+
+    def test_levels_missing_from_the_baseline_are_skipped(self):
+        self.assertEqual(self.compare([level("chat/c8", 10.0, 1.0)], [level("generate/c8", 100.0, 0.1)]), [])
+
+
+class RunSuiteTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("monitors.system_monitor.get_gpu_usage", return_value=[GPU])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = FakeOllamaServer(tokens_per_second=500, prompt_seconds=0.01, load_seconds=0,
+                                       num_parallel=2, max_tokens=8).start()
+        self.addCleanup(self.server.stop)
+        self.client = OllamaClient(self.server.url)
+
+    def test_levels_against_the_fake_server(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            results = run_suite(self.client, ["generate", "chat"], MODEL, list(DEFAULT_PROMPTS), [1, 2], 4,
+                                {"num_predict": 8}, "10m", sample_interval=0.05)
+        self.assertEqual([result["name"] for result in results],
+                         ["generate/c1", "generate/c2", "chat/c1", "chat/c2"])
+        self.assertEqual(self.server.requests, 16)
+        for result in results:
+            self.assertEqual((result["requests"], result["errors"], result["tokens"]), (4, 0, 32))
+            self.assertGreater(result["tokens_per_sec"], 0)
+            self.assertLessEqual(result["ttft"]["p50"], result["ttft"]["p95"])
+            self.assertEqual(result["resources"]["gpus"][0]["memory_total_mb"], 8000.0)
+        self.assertEqual(len(output.getvalue().splitlines()), 4)
+
+    def test_sampler_is_stopped_when_a_request_raises(self):
+        samplers = []
+
+        def sampler(*args, **kwargs):
+            samplers.append(ResourceSampler(*args, **kwargs))
+            return samplers[-1]
+
+        with mock.patch.object(ollama_bench, "ResourceSampler", side_effect=sampler), \
+                mock.patch.object(ollama_bench, "timed_request", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                run_level(self.client, "generate", MODEL, ["hi"], 1, 2, {}, None, 0.05)
+        self.assertTrue(samplers[0]._stop.is_set())
+        self.assertFalse(samplers[0]._threads[0].is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+import psutil
+from monitors import process_monitor
+from monitors.process_monitor import ProcessSampler
+
+# The test interpreter counts as one service, a sleeping child as another.
+RULES = (("child", r"^python", r"sleep\(60\)"), ("tests", r"^python", None))
+
+
+class ProcessSamplerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        self.addCleanup(self.child.wait)
+        self.addCleanup(self.child.kill)
+        self.sampler = ProcessSampler(RULES, top_n=3, full_scan_interval=3600)
+        pids = mock.patch.object(process_monitor.psutil, "pids", wraps=psutil.pids)
+        self.pids = pids.start()
+        self.addCleanup(pids.stop)
+
+    def services(self, breakdown):
+        return {service.service for service in breakdown.services}
+
+    def test_ticks_between_full_scans_only_read_the_hot_processes(self):
+        self.assertEqual(self.sampler.sample().top, ())    # Only sets the CPU reference points.
+        scanned = self.sampler.sample()
+        self.assertEqual(self.pids.call_count, 2)
+        self.assertEqual(self.services(scanned), {"child", "tests"})
+
+        light = self.sampler.sample()
+        self.assertEqual(self.pids.call_count, 2)
+        self.assertEqual(self.services(light), {"child", "tests"})
+        read = {sample.pid for sample in light.top}
+        self.assertTrue(read <= self.sampler._hot)
+        self.assertIn(os.getpid(), self.sampler._hot)
+        self.assertLessEqual(len(light.top), 3)
+
+    def test_exited_hot_process_is_dropped_without_a_full_scan(self):
+        self.sampler.sample()
+        self.sampler.sample()
+        self.assertIn(self.child.pid, self.sampler._hot)
+        self.child.kill()
+        self.child.wait()
+        light = self.sampler.sample()
+        self.assertEqual(self.pids.call_count, 2)
+        self.assertEqual(self.services(light), {"tests"})
+        self.assertNotIn(self.child.pid, self.sampler._tracked)
+        self.assertNotIn(self.child.pid, self.sampler._hot)
+
+    def test_full_scan_interval_zero_scans_every_tick(self):
+        sampler = ProcessSampler(RULES, full_scan_interval=0)
+        for _ in range(3):
+            sampler.sample()
+        self.assertEqual(self.pids.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import http.client
+import json
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from unittest import mock
+from benchmarks.fake_ollama import FakeOllamaServer
+from inference import admission
+from inference.admission import AdmissionController
+from inference.ollama_client import OllamaClient
+from inference.proxy import CACHE_HEADER, OllamaProxy
+from inference.response_cache import ModelDigests, ResponseCache
+
+MODEL = "llama3.2:3b"
+PROMPT = " ".join(["word"] * 20)    # 40 tokens from the fake server.
+
+
+class ProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(admission, "get_gpu_usage", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ollama = FakeOllamaServer(tokens_per_second=50, prompt_seconds=0.01, load_seconds=0).start()
+        self.addCleanup(self.ollama.stop)
+        client = OllamaClient(self.ollama.url)
+        self.admission = AdmissionController(client, capacity_mb=100000, refresh_interval=3600).start()
+        self.addCleanup(self.admission.stop)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        self.cache = ResponseCache(cache_dir, digests=ModelDigests(client))
+        self.addCleanup(self.cache.close)
+        self.proxy = OllamaProxy(self.ollama.url, "127.0.0.1", 0, self.admission, self.cache).start()
+        self.addCleanup(self.proxy.stop)
+
+    def post(self, payload):
+        conn = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=10)
+        self.addCleanup(conn.close)
+        conn.request("POST", "/api/generate", json.dumps(payload), {"Content-Type": "application/json"})
+        return conn.getresponse()
+
+    def test_streamed_tokens_are_relayed_as_they_arrive(self):
+        started = time.perf_counter()
+        response = self.post({"model": MODEL, "prompt": PROMPT, "options": {"temperature": 0.7}})
+        first = json.loads(response.readline())
+        first_seconds = time.perf_counter() - started
+        lines = [first] + [json.loads(line) for line in response.read().splitlines() if line.strip()]
+        total_seconds = time.perf_counter() - started
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.getheader(CACHE_HEADER))     # temperature 0.7 is never cached
+        self.assertFalse(first["done"])
+        self.assertTrue(lines[-1]["done"])
+        self.assertEqual(len(lines), 41)
+        # 40 tokens at 50/s take 0.8 s; the first one must not wait for the rest.
+        self.assertLess(first_seconds, total_seconds / 2)
+
+    def test_deterministic_requests_are_answered_from_the_cache(self):
+        for stream in (False, True):
+            payload = {"model": MODEL, "prompt": PROMPT, "stream": stream, "options": {"temperature": 0}}
+            before = self.ollama.requests
+            miss = self.post(payload)
+            miss_body = miss.read()
+            hit = self.post(payload)
+            hit_body = hit.read()
+            self.assertEqual(miss.getheader(CACHE_HEADER), "miss")
+            self.assertEqual(hit.getheader(CACHE_HEADER), "hit")
+            self.assertEqual(hit_body, miss_body)
+            self.assertEqual(self.ollama.requests, before + 1)
+
+    def test_admission_is_released_when_the_client_disconnects(self):
+        self.ollama.tokens_per_second = 10      # The full answer would take 4 s.
+        body = json.dumps({"model": MODEL, "prompt": PROMPT, "options": {"temperature": 0.7}}).encode()
+        sock = socket.create_connection(("127.0.0.1", self.proxy.port), timeout=10)
+        sock.sendall(b"POST /api/generate HTTP/1.1\r\nHost: proxy\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+        self.assertIn(b"200", sock.recv(1024))
+        self.assertEqual(self.admission.stats()["active"], {MODEL: 1})
+        sock.close()
+        deadline = time.monotonic() + 2
+        while self.admission.stats()["active"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.admission.stats()["active"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
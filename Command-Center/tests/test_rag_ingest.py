@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.rag_ingest import RagIngestClient, batch_id, iter_batches
+
+
+def chunks(document_id, count, source="doc.pdf"):
+    return [{"id": f"{document_id}-{i}", "document_id": document_id, "source": source, "chunk_index": i,
+             "text": f"text {i}", "pages": [i + 1], "tables": []} for i in range(count)]
+
+
+class StubRagApi:
+    """POST /embed stub recording the file_id of every accepted upload; `busy` 503s go first."""
+
+    def __init__(self, busy=0, retry_after="0"):
+        self.busy = busy
+        self.retry_after = retry_after
+        self.accepted = []
+        self.attempts = []      # (file_id, time.monotonic())
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                file_id = body.split(b'name="file_id"\r\n\r\n')[1].split(b"\r\n")[0].decode()
+                with stub.lock:
+                    stub.attempts.append((file_id, time.monotonic()))
+                    busy = stub.busy > 0
+                    stub.busy -= busy
+                    if not busy:
+                        stub.accepted.append(file_id)
+                if busy:
+                    self.send_response(503)
+                    self.send_header("Retry-After", stub.retry_after)
+                    payload = b'{"detail": "busy"}'
+                else:
+                    self.send_response(200)
+                    payload = b'{"status": true}'
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RagIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, True)
+
+    def start_stub(self, **kwargs):
+        stub = StubRagApi(**kwargs)
+        self.addCleanup(stub.stop)
+        return stub
+
+    def test_batches_never_span_documents(self):
+        batches = list(iter_batches(chunks("a", 5) + chunks("b", 2), 2))
+        self.assertEqual([[c["id"] for c in batch] for batch in batches],
+                         [["a-0", "a-1"], ["a-2", "a-3"], ["a-4"], ["b-0", "b-1"]])
+
+    def test_busy_responses_are_retried_after_retry_after(self):
+        stub = self.start_stub(busy=2, retry_after="0.2")
+        client = RagIngestClient(stub.url, batch_size=10, max_in_flight=1, backoff=0.01)
+        try:
+            stats = client.ingest(chunks("a", 3))
+        finally:
+            client.close()
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["failed"], 0)
+        times = [when for _, when in stub.attempts]
+        self.assertGreaterEqual(times[1] - times[0], 0.15)     # Retry-After wins over the 10 ms backoff.
+
+    def test_retries_give_up_and_report_the_batch(self):
+        stub = self.start_stub(busy=10)
+        client = RagIngestClient(stub.url, max_retries=2, backoff=0.01)
+        try:
+            stats = client.ingest(chunks("a", 3))
+        finally:
+            client.close()
+        self.assertEqual(stats["failed"], 1)
+        self.assertIn("HTTP 503", client.errors[batch_id(chunks("a", 3))])
+
+    def test_checkpoint_resume_skips_uploaded_batches(self):
+        checkpoint = os.path.join(self.folder, "ingest.checkpoint")
+        stub = self.start_stub()
+        corpus = chunks("a", 4) + chunks("b", 2)
+        client = RagIngestClient(stub.url, batch_size=2, checkpoint_path=checkpoint)
+        try:
+            client.ingest(corpus[:4])       # Interrupted after document a.
+        finally:
+            client.close()
+        client = RagIngestClient(stub.url, batch_size=2, checkpoint_path=checkpoint)
+        try:
+            stats = client.ingest(corpus)
+        finally:
+            client.close()
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(sorted(stub.accepted), sorted(batch_id(b) for b in iter_batches(corpus, 2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from inference.ollama_client import ModelInfo
+from inference.response_cache import ModelDigests, is_complete, is_deterministic, request_key
+
+
+class ResponseCacheKeyTest(unittest.TestCase):
+
+    def test_only_temperature_zero_and_embeddings_are_deterministic(self):
+        self.assertTrue(is_deterministic("/api/embed", {"model": "m"}))
+        self.assertTrue(is_deterministic("/api/chat", {"options": {"temperature": 0}}))
+        self.assertTrue(is_deterministic("/v1/chat/completions", {"temperature": "0"}))
+        self.assertFalse(is_deterministic("/api/chat", {"options": {"temperature": 0.7}}))
+        self.assertFalse(is_deterministic("/api/generate", {}))
+
+    def test_malformed_options_are_not_cached(self):
+        self.assertFalse(is_deterministic("/api/chat", {"options": {"temperature": "abc"}}))
+        self.assertFalse(is_deterministic("/api/chat", {"options": {"temperature": [0]}}))
+        self.assertFalse(is_deterministic("/api/chat", {"options": ["temperature", 0]}))
+        self.assertFalse(is_deterministic("/v1/completions", {"temperature": {}}))
+
+    def test_key_ignores_volatile_fields_and_runtime_options(self):
+        a = {"model": "m", "prompt": "hi", "options": {"temperature": 0, "num_thread": 4}, "keep_alive": "5m"}
+        b = {"options": {"temperature": 0}, "prompt": "hi", "model": "m"}
+        self.assertEqual(request_key("/api/generate", a), request_key("/api/generate", b))
+        self.assertNotEqual(request_key("/api/generate", a, "sha-1"), request_key("/api/generate", b, "sha-2"))
+
+    def test_incomplete_streams_are_rejected(self):
+        self.assertTrue(is_complete(b'{"response":"a","done":false}\n{"done":true}\n', True))
+        self.assertFalse(is_complete(b'{"response":"a","done":false}\n', True))
+        self.assertTrue(is_complete(b"data: {}\n\ndata: [DONE]\n", True))
+
+
+class ModelDigestsTest(unittest.TestCase):
+
+    def test_untagged_names_and_misses_use_the_cached_list(self):
+        class Client:
+            lists = 0
+
+            def list_models(self):
+                self.lists += 1
+                return [ModelInfo("llama3:latest", 1, None, "sha-1", None, None, None)]
+
+        client = Client()
+        digests = ModelDigests(client, ttl=60)
+        self.assertEqual(digests.get("llama3"), "sha-1")
+        self.assertEqual(digests.get("llama3:latest"), "sha-1")
+        self.assertIsNone(digests.get("missing"))
+        self.assertIsNone(digests.get("missing"))
+        self.assertEqual(client.lists, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
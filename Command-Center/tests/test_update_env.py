@@ -0,0 +1,146 @@
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+UPDATE_ENV = os.path.join(os.path.dirname(__file__), "..", "..", "LibreChat", "utils", "update_env.py")
+spec = importlib.util.spec_from_file_location("update_env", UPDATE_ENV)
+update_env = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(update_env)
+
+COMPOSE = """\
+# LibreChat stack
+services:
+  api:
+    image: librechat
+    env_file:
+      - .env
+    volumes:
+      - ./librechat.yaml:/app/librechat.yaml
+
+  rag_api:
+    image: rag
+    environment:
+      - DB_HOST=vectordb
+    env_file:
+      - .env
+  mongodb:
+    image: mongo
+    command: mongod --port ${MONGO_PORT}
+volumes:
+  pgdata:
+"""
+RAG = """\
+services:
+  rag_api:
+    image: rag
+    env_file:
+      - .env
+"""
+
+
+class ServiceBlocksTest(unittest.TestCase):
+
+    def test_blocks_stop_at_the_next_top_level_key(self):
+        blocks = update_env.service_blocks(COMPOSE)
+        self.assertEqual(list(blocks), ["api", "rag_api", "mongodb"])
+        self.assertIn("./librechat.yaml", blocks["api"])
+        self.assertNotIn("pgdata", blocks["mongodb"])
+        self.assertEqual(update_env.service_blocks("volumes:\n  data:\n"), {})
+
+
+class AffectedServicesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        for name, text in (("docker-compose.yml", COMPOSE), ("rag.yml", RAG)):
+            with open(os.path.join(self.workdir, name), "w") as f:
+                f.write(text)
+        self.consumers = update_env.service_consumers(self.workdir)
+
+    def affected(self, changes):
+        return update_env.affected_services(changes, self.consumers)
+
+    def test_env_keys_reach_services_that_load_or_reference_them(self):
+        affected = self.affected({".env": ["CREDS_KEY", "MONGO_PORT"]})
+        self.assertEqual(sorted(affected), [("main", "api"), ("main", "mongodb")])
+        self.assertEqual(affected[("main", "mongodb")], [".env MONGO_PORT"])
+
+    def test_rag_api_only_restarts_for_its_prefixes(self):
+        affected = self.affected({".env": ["RAG_OPENAI_API_KEY"]})
+        self.assertEqual(sorted(affected), [("main", "api"), ("main", "rag_api"), ("rag", "rag_api")])
+        self.assertNotIn(("main", "rag_api"), self.affected({".env": ["CREDS_KEY"]}))
+
+    def test_mounted_files_and_compose_definitions(self):
+        self.assertEqual(list(self.affected({"librechat.yaml": ["endpoints.custom[0].models"]})), [("main", "api")])
+        self.assertEqual(list(self.affected({"rag.yml": ["services.rag_api.image"]})), [("rag", "rag_api")])
+        # A top-level key outside services: touches every service of that file's stack.
+        self.assertEqual(sorted(self.affected({"docker-compose.yml": ["volumes.pgdata"]})),
+                         [("main", "api"), ("main", "mongodb"), ("main", "rag_api")])
+
+
+class SplitNotRecreatedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+
+    def docker_ps(self, lines, returncode=0):
+        completed = subprocess.CompletedProcess([], returncode, "\n".join(lines) + "\n", "")
+        return mock.patch.object(update_env.subprocess, "run", return_value=completed)
+
+    def owner(self, service, files, workdir=None):
+        return f"{service}|{files}|{workdir or self.workdir}"
+
+    def test_services_are_recreated_through_the_stack_that_runs_them(self):
+        affected = {("main", "api"): ["a"], ("main", "rag_api"): ["b"], ("rag", "rag_api"): ["c"],
+                    ("main", "mongodb"): ["d"]}
+        lines = [self.owner("api", "/x/docker-compose.yml,/x/docker-compose.override.yml"),
+                 self.owner("rag_api", "/x/rag.yml"),
+                 self.owner("mongodb", "/elsewhere/docker-compose.yml", workdir="/elsewhere")]
+        with self.docker_ps(lines):
+            skipped = update_env.split_not_recreated(self.workdir, affected)
+        self.assertEqual(sorted(affected), [("main", "api"), ("rag", "rag_api")])
+        self.assertEqual(skipped, {("main", "rag_api"): "runs from the rag stack",
+                                   ("main", "mongodb"): "not running, will use the new values when started"})
+
+    def test_unknown_owner_still_recreates_each_service_once(self):
+        affected = {("main", "rag_api"): ["a"], ("rag", "rag_api"): ["b"]}
+        with self.docker_ps([], returncode=1):
+            skipped = update_env.split_not_recreated(self.workdir, affected)
+        self.assertEqual(list(affected), [("main", "rag_api")])
+        self.assertEqual(list(skipped), [("rag", "rag_api")])
+
+
+class BuildPlanTest(unittest.TestCase):
+
+    def test_copied_override_is_used_and_template_is_read_from_workdir(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, True)
+        files = {"docker-compose.yml": COMPOSE, "input.env": "CREDS_KEY=new\n", ".env": "CREDS_KEY=old\n",
+                 "override.changed.yml": "services:\n  api:\n    ports:\n      - 3080:3080\n"}
+        for name, text in files.items():
+            with open(os.path.join(workdir, name), "w") as f:
+                f.write(text)
+        running = subprocess.CompletedProcess([], 0, f"api|{workdir}/docker-compose.yml|{workdir}\n", "")
+        with mock.patch.object(update_env.subprocess, "run", return_value=running):
+            plan = update_env.build_plan(workdir, "input.env", ".env",
+                                         [("override.changed.yml", "docker-compose.override.yml")])
+        self.assertEqual(plan["writes"], [".env", "docker-compose.override.yml"])
+        self.assertEqual(sorted(plan["affected"]), [("main", "api")])
+        command = ["docker", "compose", "-f", "docker-compose.yml", "-f", "docker-compose.override.yml",
+                   "up", "-d", "--no-deps", "--force-recreate", "api"]
+        self.assertEqual(update_env.restart_commands(workdir, plan["affected"], plan["contents"]), [command])
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            update_env.print_plan(plan, dry_run=True)
+        self.assertIn("$ " + " ".join(command), output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
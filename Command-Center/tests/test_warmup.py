@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+from inference.warmup import MemoryState, WarmupScheduler, in_window, parse_models, plan
+
+GB = 1024 ** 3
+
+
+class ParseModelsTest(unittest.TestCase):
+
+    def test_names_and_windows(self):
+        models = parse_models(["a", {"model": "b", "priority": 2, "hours": ["22:00-02:00"]}])
+        self.assertEqual(models[0].hours, ())
+        self.assertEqual(models[1].priority, 2)
+        self.assertTrue(in_window(models[1].hours, datetime(2024, 1, 1, 1, 30)))
+        self.assertFalse(in_window(models[1].hours, datetime(2024, 1, 1, 12, 0)))
+
+    def test_malformed_entries_name_the_problem(self):
+        for entry in ({"priority": 1}, {"model": "x", "hours": ["8-18"]}, {"model": "x", "priority": "high"}):
+            with self.assertRaisesRegex(ValueError, "WARMUP_MODELS"):
+                parse_models([entry])
+
+
+class WarmupTest(unittest.TestCase):
+
+    def test_scheduled_model_is_loaded_when_it_fits(self):
+        memory = MemoryState(gpu_free_mb=16000, gpu_total_mb=24000, memory_percent=40, memory_total_mb=64000)
+        actions = plan(parse_models(["a"]), {}, {"a": 4 * GB}, memory, {})
+        self.assertEqual([(action.kind, action.model) for action in actions], [("load", "a")])
+
+    def test_unexpected_errors_do_not_stop_the_thread(self):
+        class BrokenClient:
+            def running_models(self):
+                raise ValueError("Expecting value: line 1 column 1 (char 0)")
+
+        logged = []
+        scheduler = WarmupScheduler(BrokenClient(), [], interval=0.01, callback=logged.append).start()
+        try:
+            while len(logged) < 2:
+                scheduler._stop.wait(0.01)
+            self.assertTrue(scheduler._thread.is_alive())
+        finally:
+            scheduler.stop()
+        self.assertIn("ValueError", logged[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,43 @@
 # main_window.py
 
 import webbrowser
-from PySide6.QtWidgets import (QMainWindow, QTextEdit, QWidget, QVBoxLayout, 
-                               QHBoxLayout, QPushButton, QLabel, QProgressBar, QLineEdit)
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (QMainWindow, QPlainTextEdit, QWidget, QVBoxLayout, 
+                               QHBoxLayout, QPushButton, QLabel, QProgressBar, QListWidget, QComboBox,
+                               QTableWidget, QTableWidgetItem, QHeaderView)
+from PySide6.QtCore import Qt, QObject, Signal
 from PySide6 import QtGui
+from config import COMMAND_TIMEOUT, COMMAND_WORKERS, METRICS_EXPORTER_ENABLED, WARMUP_ENABLED
 from ui.styles import DEFAULT_STYLE
-from commands.command_runner import run_command
-from monitors import system_monitor, docker_monitor
-from utils.logger import print_to_terminal, write_to_output
+from commands.command_runner import launch_detached
+from commands.job_scheduler import JobScheduler
+from inference.warmup import WarmupScheduler
+from utils.job_log import JobLog
+from monitors.docker_monitor import DockerStateTracker
+from monitors.metrics_exporter import MetricsExporter
+from monitors.metrics_history import MetricsHistory
+from monitors.resource_sampler import ResourceSampler
+from ui.model_panel import ModelPanel
+from ui.sparkline import Sparkline
+from utils.logger import OutputSink, print_to_terminal
+
+MAX_LISTED_JOBS = 20
+HISTORY_TIERS = ("1 s", "1 min", "10 min")     # Labels of MetricsHistory's default tiers.
+
+
+class JobSignals(QObject):
+    # Scheduler listeners run on worker threads; the signal hands jobs to the GUI thread.
+    job_changed = Signal(object)
+
+
+class ResourceSignals(QObject):
+    # Carries ResourceSnapshot objects from the sampler thread to the GUI thread.
+    snapshot = Signal(object)
+
+
+class DockerSignals(QObject):
+    # Carries DockerState objects from the tracker thread to the GUI thread.
+    state = Signal(object)
+
 
 class OperationsCommandCenter(QMainWindow):
     def __init__(self):
@@ -16,10 +45,29 @@ class OperationsCommandCenter(QMainWindow):
         self.setWindowTitle("Mission Control Center")
         self.setGeometry(100, 100, 900, 600)
         self.gpu_bars = []
+        self.gpu_count = None       # Unknown until the first GPU sample.
+        self.gpu_sparklines = []
+        self.history = MetricsHistory()
+        self.shown_processes = None
+        self.exporter = MetricsExporter().start() if METRICS_EXPORTER_ENABLED else None
+        self.jobs = []
+        self.job_signals = JobSignals()
+        self.job_signals.job_changed.connect(self.update_job_list)
+        self.job_log = JobLog()
+        self.scheduler = JobScheduler(
+            self.append_output, print_to_terminal, max_workers=COMMAND_WORKERS, job_log=self.job_log
+        )
+        self.scheduler.add_listener(self.job_signals.job_changed.emit)
         self.setup_ui()
         self.set_default_style()
         self.start_system_monitor()
         self.start_docker_monitor()
+        self.warmup = None
+        if WARMUP_ENABLED:
+            try:
+                self.warmup = WarmupScheduler(callback=self.append_output).start()
+            except ValueError as e:
+                self.append_output(f"Warm-up disabled: {e}\n")
 
     def setup_ui(self):
         main_widget = QWidget()
@@ -30,9 +78,9 @@ class OperationsCommandCenter(QMainWindow):
         left_layout = QVBoxLayout()
 
         # Text output area
-        self.output_text = QTextEdit()
-        self.output_text.setFontPointSize(10)
+        self.output_text = QPlainTextEdit()
         self.output_text.setReadOnly(True)
+        self.output_sink = OutputSink(self.output_text)
         left_layout.addWidget(self.output_text, stretch=1)
 
         # Resource monitor layout
@@ -43,44 +91,67 @@ class OperationsCommandCenter(QMainWindow):
         self.cpu_progress.setRange(0, 100)
         resource_layout.addWidget(self.cpu_label)
         resource_layout.addWidget(self.cpu_progress)
+        self.cpu_sparkline = Sparkline(self.history.get("cpu"))
+        resource_layout.addWidget(self.cpu_sparkline)
         # Memory usage
         self.mem_label = QLabel("Memory Usage:")
         self.mem_progress = QProgressBar()
         self.mem_progress.setRange(0, 100)
         resource_layout.addWidget(self.mem_label)
         resource_layout.addWidget(self.mem_progress)
+        self.mem_sparkline = Sparkline(self.history.get("memory"))
+        resource_layout.addWidget(self.mem_sparkline)
         # GPU usage
         self.gpu_label = QLabel("GPU Usage:")
         resource_layout.addWidget(self.gpu_label)
-        gpu_data = system_monitor.get_gpu_usage()
-        if gpu_data:
-            for gpu in gpu_data:
-                gpu_bar = QProgressBar()
-                gpu_bar.setRange(0, 100)
-                gpu_bar.setFormat(f"GPU {gpu['index']}")
-                resource_layout.addWidget(gpu_bar)
-                self.gpu_bars.append(gpu_bar)
-        else:
-            resource_layout.addWidget(QLabel("No GPU detected"))
+        # GPU bars are created from the first GPU sample, which arrives off the GUI thread.
+        self.gpu_layout = QVBoxLayout()
+        self.gpu_status = QLabel("Detecting GPUs...")
+        self.gpu_layout.addWidget(self.gpu_status)
+        resource_layout.addLayout(self.gpu_layout)
+        # History resolution shared by all sparklines (one pixel per bucket)
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(QLabel("History resolution:"))
+        self.history_tier = QComboBox()
+        self.history_tier.addItems(HISTORY_TIERS)
+        self.history_tier.currentIndexChanged.connect(self.set_history_tier)
+        history_layout.addWidget(self.history_tier)
+        history_layout.addStretch()
+        resource_layout.addLayout(history_layout)
 
         left_layout.addLayout(resource_layout)
+
+        # Per-core load and the services/processes using the most CPU
+        self.cores_label = QLabel("Cores:")
+        left_layout.addWidget(self.cores_label)
+        self.process_table = QTableWidget(0, 4)
+        self.process_table.setHorizontalHeaderLabels(["Service / process", "CPU % (1 core)", "RSS MB", "I/O MB/s"])
+        self.process_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.process_table.verticalHeader().setVisible(False)
+        self.process_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.process_table.setMaximumHeight(220)
+        left_layout.addWidget(self.process_table)
         left_widget.setLayout(left_layout)
 
         # Right side: Command Buttons and additional controls
         right_widget = QWidget()
         right_layout = QVBoxLayout()
+        # (label, command, timeout in seconds or None)
         commands = [
-            ("Run Docker", r'"C:\Program Files\Docker\Docker\frontend\Docker Desktop.exe"'),
-            ("Docker Compose Down", "docker compose down"),
-            ("Docker Compose Up", "docker compose up -d"),
-            ("Ollama List", "ollama list"),
-            ("PM2 Restart All", "pm2 restart all")
+            ("Run Docker", r'"C:\Program Files\Docker\Docker\frontend\Docker Desktop.exe"', None),
+            ("Docker Compose Down", "docker compose down", COMMAND_TIMEOUT),
+            ("Docker Compose Up", "docker compose up -d", COMMAND_TIMEOUT),
+            # Recreates only the services whose .env / librechat.yaml / compose values changed.
+            ("Config Sync Plan", "python utils/update_env.py --sync --dry-run", COMMAND_TIMEOUT),
+            ("Config Sync", "python utils/update_env.py --sync", COMMAND_TIMEOUT),
+            ("PM2 Restart All", "pm2 restart all", COMMAND_TIMEOUT)
         ]
-        for label, cmd in commands:
+        for label, cmd, timeout in commands:
             if label == "Run Docker":
                 h_layout = QHBoxLayout()
                 docker_button = QPushButton(label)
-                docker_button.clicked.connect(lambda checked, c=cmd: run_command(c, self.append_output, print_to_terminal))
+                # Docker Desktop keeps running; it is launched detached so cancelling jobs never kills it.
+                docker_button.clicked.connect(lambda checked, c=cmd: self.launch_detached(c))
                 h_layout.addWidget(docker_button)
                 self.docker_led = QLabel()
                 self.docker_led.setFixedSize(20, 20)
@@ -88,24 +159,30 @@ class OperationsCommandCenter(QMainWindow):
                 h_layout.addWidget(self.docker_led)
                 h_layout.addStretch()
                 right_layout.addLayout(h_layout)
+                self.docker_services = QLabel("")
+                self.docker_services.setWordWrap(True)
+                right_layout.addWidget(self.docker_services)
             else:
                 button = QPushButton(label)
-                button.clicked.connect(lambda checked, c=cmd: run_command(c, self.append_output, print_to_terminal))
+                button.clicked.connect(lambda checked, c=cmd, t=timeout: self.submit_command(c, t))
                 right_layout.addWidget(button)
+
+        # Jobs section
+        right_layout.addWidget(QLabel("Jobs:"))
+        self.job_list = QListWidget()
+        self.job_list.setMaximumHeight(120)
+        right_layout.addWidget(self.job_list)
+        cancel_button = QPushButton("Cancel Running Jobs")
+        cancel_button.clicked.connect(self.scheduler.cancel_all)
+        right_layout.addWidget(cancel_button)
         
         ollama_button = QPushButton("Open Ollama Search")
         ollama_button.clicked.connect(self.open_ollama)
         right_layout.addWidget(ollama_button)
 
-        # Model installer section
-        model_label = QLabel("Enter model name:")
-        self.model_input = QLineEdit()
-        self.model_input.setPlaceholderText("e.g., ollama run command-a")
-        install_button = QPushButton("Install Model")
-        install_button.clicked.connect(self.install_model)
-        right_layout.addWidget(model_label)
-        right_layout.addWidget(self.model_input)
-        right_layout.addWidget(install_button)
+        # Model management section (Ollama REST API)
+        self.model_panel = ModelPanel(output_callback=self.append_output)
+        right_layout.addWidget(self.model_panel)
 
         url_button = QPushButton("Open ChatBot")
         url_button.clicked.connect(self.open_url)
@@ -123,7 +200,27 @@ class OperationsCommandCenter(QMainWindow):
         self.setStyleSheet(DEFAULT_STYLE)
 
     def append_output(self, text):
-        write_to_output(self.output_text, text)
+        # Safe from any thread; the sink batches writes onto the GUI thread.
+        self.output_sink.write(text)
+
+    def submit_command(self, cmd, timeout=None):
+        # A command that is already queued or running returns its existing job.
+        job = self.scheduler.submit(cmd, timeout=timeout)
+        if job not in self.jobs:
+            self.jobs.insert(0, job)
+            del self.jobs[MAX_LISTED_JOBS:]
+            self.update_job_list(job)
+        return job
+
+    def launch_detached(self, cmd):
+        launch_detached(cmd, self.append_output, print_to_terminal)
+
+    def update_job_list(self, job=None):
+        self.job_list.clear()
+        for listed in self.jobs:
+            duration = f" {listed.duration:.1f}s" if listed.duration is not None else ""
+            log_id = f" ({listed.log_id})" if listed.log_id else ""
+            self.job_list.addItem(f"#{listed.id} [{listed.status}{duration}] {listed.command}{log_id}")
 
     def open_url(self):
         webbrowser.open("http://localhost:3080/")
@@ -131,42 +228,121 @@ class OperationsCommandCenter(QMainWindow):
     def open_ollama(self):
         webbrowser.open("https://ollama.com/search")
 
-    def install_model(self):
-        model_name = self.model_input.text().strip()
-        if model_name:
-            run_command(model_name, self.append_output, print_to_terminal)
-        else:
-            self.append_output("No model name provided.\n")
-            print_to_terminal("No model name provided.\n", color="red")
-
     def start_system_monitor(self):
-        self.monitor_timer = QTimer()
-        self.monitor_timer.timeout.connect(self.update_resource_usage)
-        self.monitor_timer.start(2000)
-
-    def update_resource_usage(self):
-        cpu = system_monitor.get_cpu_usage()
-        self.cpu_progress.setValue(int(cpu))
-        self.cpu_label.setText(f"CPU Load: {cpu:.2f}%")
-
-        mem = system_monitor.get_memory_usage()
-        self.mem_progress.setValue(int(mem))
-        self.mem_label.setText(f"Memory Usage: {mem:.2f}%")
-
-        gpu_data = system_monitor.get_gpu_usage()
-        if self.gpu_bars and gpu_data:
-            for i, gpu in enumerate(gpu_data):
-                usage = gpu['load']
-                self.gpu_bars[i].setValue(int(usage))
-                self.gpu_bars[i].setFormat(f"GPU {gpu['index']}: {usage:.2f}% (Used: {gpu['memory_used']} MB)")
+        self.resource_signals = ResourceSignals()
+        self.resource_signals.snapshot.connect(self.update_resource_usage)
+        self.sampler = ResourceSampler(self.on_resource_snapshot).start()
+
+    def on_resource_snapshot(self, snapshot):
+        # Runs on the sampler thread.
+        if self.exporter:
+            self.exporter.update_resources(snapshot)
+        self.resource_signals.snapshot.emit(snapshot)
+
+    def sparklines(self):
+        return [self.cpu_sparkline, self.mem_sparkline] + self.gpu_sparklines
+
+    def set_history_tier(self, tier):
+        for sparkline in self.sparklines():
+            sparkline.set_tier(tier)
+
+    def update_resource_usage(self, snapshot):
+        self.history.record(snapshot)
+        self.cpu_sparkline.refresh()
+        self.mem_sparkline.refresh()
+
+        self.cpu_progress.setValue(int(snapshot.cpu))
+        self.cpu_label.setText(f"CPU Load: {snapshot.cpu:.2f}%")
+
+        self.mem_progress.setValue(int(snapshot.memory))
+        self.mem_label.setText(f"Memory Usage: {snapshot.memory:.2f}%")
+
+        if snapshot.processes is not None and snapshot.processes is not self.shown_processes:
+            self.update_process_table(snapshot.processes)
+
+        if snapshot.gpus is None:
+            return
+        if len(snapshot.gpus) != self.gpu_count:
+            self.rebuild_gpu_bars(snapshot.gpus)
+        stale = " (stale)" if snapshot.gpu_stale else ""
+        for bar, gpu in zip(self.gpu_bars, snapshot.gpus):
+            bar.setValue(int(gpu.load))
+            total = f" / {gpu.memory_total:.0f}" if gpu.memory_total else ""
+            temperature = f", {gpu.temperature:.0f} °C" if gpu.temperature is not None else ""
+            bar.setFormat(
+                f"GPU {gpu.index}: {gpu.load:.2f}% (Used: {gpu.memory_used:.0f}{total} MB{temperature}){stale}"
+            )
+        for sparkline in self.gpu_sparklines:
+            sparkline.refresh()
+
+    def update_process_table(self, breakdown):
+        self.shown_processes = breakdown
+        self.cores_label.setText("Cores: " + "  ".join(f"{load:.0f}%" for load in breakdown.per_core))
+        rows = [(f"[{service.service}] {service.processes} proc.", service.cpu, service.rss,
+                 service.read_rate + service.write_rate) for service in breakdown.services]
+        for process in breakdown.top:
+            label = f"{process.name} ({process.pid})"
+            if process.service:
+                label += f" - {process.service}"
+            if process.container:
+                label += f" [{process.container}]"
+            rows.append((label, process.cpu, process.rss, process.read_rate + process.write_rate))
+        self.process_table.setRowCount(len(rows))
+        for row, (label, cpu, rss, io_rate) in enumerate(rows):
+            values = (label, f"{cpu:.1f}", f"{rss / (1024 * 1024):.0f}", f"{io_rate / (1024 * 1024):.2f}")
+            for column, value in enumerate(values):
+                self.process_table.setItem(row, column, QTableWidgetItem(value))
+
+    def rebuild_gpu_bars(self, gpus):
+        for widget in self.gpu_bars + self.gpu_sparklines:
+            self.gpu_layout.removeWidget(widget)
+            widget.deleteLater()
+        self.gpu_bars = []
+        self.gpu_sparklines = []
+        for gpu in gpus:
+            gpu_bar = QProgressBar()
+            gpu_bar.setRange(0, 100)
+            gpu_bar.setFormat(f"GPU {gpu.index}")
+            self.gpu_layout.addWidget(gpu_bar)
+            self.gpu_bars.append(gpu_bar)
+            sparkline = Sparkline(self.history.get(f"gpu{gpu.index}_load"), self.history_tier.currentIndex())
+            self.gpu_layout.addWidget(sparkline)
+            self.gpu_sparklines.append(sparkline)
+        self.gpu_count = len(gpus)
+        self.gpu_status.setVisible(not gpus)
+        self.gpu_status.setText("No GPU detected")
 
     def start_docker_monitor(self):
-        self.docker_timer = QTimer()
-        self.docker_timer.timeout.connect(self.update_docker_led)
-        self.docker_timer.start(2000)
+        self.docker_signals = DockerSignals()
+        self.docker_signals.state.connect(self.update_docker_led)
+        self.docker_tracker = DockerStateTracker(self.on_docker_state).start()
+
+    def on_docker_state(self, state):
+        # Runs on the tracker thread.
+        if self.exporter:
+            self.exporter.update_docker(state)
+        self.docker_signals.state.emit(state)
 
-    def update_docker_led(self):
-        if docker_monitor.is_docker_running():
+    def update_docker_led(self, state):
+        if state.engine_running:
             self.docker_led.setStyleSheet("background-color: green; border-radius: 10px;")
         else:
             self.docker_led.setStyleSheet("background-color: red; border-radius: 10px;")
+        lines = []
+        for container in state.containers:
+            health = f" ({container.health})" if container.health else ""
+            lines.append(f"{container.service or container.name}: {container.state}{health}")
+        self.docker_services.setText("\n".join(lines))
+
+    def closeEvent(self, event):
+        self.sampler.stop()
+        self.docker_tracker.stop()
+        self.model_panel.shutdown()
+        if self.warmup:
+            self.warmup.stop()
+        if self.exporter:
+            self.exporter.stop()
+        # Kill whatever is still running instead of leaving orphaned children behind.
+        self.scheduler.shutdown(cancel=True, wait=True)
+        self.job_log.close()
+        super().closeEvent(event)
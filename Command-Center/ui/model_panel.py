@@ -0,0 +1,300 @@
+# model_panel.py
+
+import threading
+from datetime import datetime
+from PySide6.QtCore import QThread, QTimer, Signal
+from PySide6.QtWidgets import (QHBoxLayout, QHeaderView, QLabel, QLineEdit, QMessageBox, QProgressBar,
+                               QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+from inference.ollama_client import OllamaClient, PullCancelled, cancel_connection
+
+LOADED_REFRESH_MS = 5000        # How often /api/ps is polled for the loaded models.
+GB = 1024 ** 3
+
+
+def format_size(size):
+    return f"{size / GB:.1f} GB" if size >= GB / 10 else f"{size / (1024 * 1024):.0f} MB"
+
+
+# -------------------------
+# Workers
+# -------------------------
+class PullWorker(QThread):
+    progress = Signal(object)   # PullProgress
+    done = Signal(str)          # Model name, once the pull succeeded.
+    error = Signal(str)         # Emits error messages.
+
+    def __init__(self, client, model):
+        super().__init__()
+        self.client = client
+        self.model = model
+        self.cancel_event = threading.Event()
+        self.connection = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.connection is not None:
+            cancel_connection(self.connection)
+
+    def _attach(self, connection):
+        self.connection = connection
+
+    def run(self):
+        try:
+            self.client.pull(self.model, self.progress.emit, self.cancel_event, self._attach)
+            self.done.emit(self.model)
+        except PullCancelled:
+            self.error.emit(f"Pull of {self.model} cancelled.")
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class ListWorker(QThread):
+    done = Signal(object, object)       # (installed ModelInfo list or None, loaded LoadedModel list)
+    error = Signal(str)
+
+    def __init__(self, client, installed=True):
+        super().__init__()
+        self.client = client
+        self.installed = installed
+
+    def run(self):
+        try:
+            installed = self.client.list_models() if self.installed else None
+            self.done.emit(installed, self.client.running_models())
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class DeleteWorker(QThread):
+    done = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, client, model):
+        super().__init__()
+        self.client = client
+        self.model = model
+
+    def run(self):
+        try:
+            self.client.delete(self.model)
+            self.done.emit(self.model)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+# -------------------------
+# Panel
+# -------------------------
+class PullRow(QWidget):
+    """Progress bar and cancel button of one pull."""
+
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 0)
+        self.bar.setFormat(f"{worker.model}: starting")
+        self.bar.setTextVisible(True)
+        layout.addWidget(self.bar, stretch=1)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(worker.cancel)
+        layout.addWidget(cancel_button)
+        self.setLayout(layout)
+
+    def update_progress(self, progress):
+        if progress.total:
+            self.bar.setRange(0, 1000)
+            self.bar.setValue(int(progress.completed * 1000 / progress.total))
+            self.bar.setFormat(
+                f"{progress.model}: {progress.status[:24]} "
+                f"{format_size(progress.completed)} / {format_size(progress.total)}"
+            )
+        else:
+            self.bar.setRange(0, 0)
+            self.bar.setFormat(f"{progress.model}: {progress.status}")
+
+
+class ModelPanel(QWidget):
+    """
+    Ollama model management over the REST API: pulls with live byte progress
+    (several at once, limited by the client), installed models with their
+    sizes and the models currently loaded in memory.
+    """
+
+    def __init__(self, client=None, output_callback=None):
+        super().__init__()
+        self.client = client or OllamaClient()
+        self.output_callback = output_callback
+        self.pulls = {}             # model -> PullRow
+        self.workers = set()        # Keeps running QThreads referenced.
+        self.list_worker = None
+        self.refresh_pending = False    # An installed-models refresh asked for while a listing ran.
+        self.setup_ui()
+        self.loaded_timer = QTimer(self)
+        self.loaded_timer.timeout.connect(lambda: self.refresh(installed=False))
+        self.loaded_timer.start(LOADED_REFRESH_MS)
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        layout.addWidget(QLabel("Pull model:"))
+        pull_layout = QHBoxLayout()
+        self.model_input = QLineEdit()
+        self.model_input.setPlaceholderText("e.g., llama3.1:8b")
+        self.model_input.returnPressed.connect(self.pull_model)
+        pull_layout.addWidget(self.model_input)
+        pull_button = QPushButton("Pull")
+        pull_button.clicked.connect(self.pull_model)
+        pull_layout.addWidget(pull_button)
+        layout.addLayout(pull_layout)
+
+        self.pull_layout = QVBoxLayout()
+        layout.addLayout(self.pull_layout)
+
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.model_table = QTableWidget(0, 3)
+        self.model_table.setHorizontalHeaderLabels(["Installed model", "Size", "Params / quant."])
+        self.model_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.model_table.verticalHeader().setVisible(False)
+        self.model_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.model_table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.model_table)
+
+        buttons = QHBoxLayout()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(lambda: self.refresh())
+        buttons.addWidget(refresh_button)
+        delete_button = QPushButton("Delete")
+        delete_button.clicked.connect(self.delete_selected)
+        buttons.addWidget(delete_button)
+        layout.addLayout(buttons)
+
+        self.loaded_label = QLabel("Loaded: -")
+        self.loaded_label.setWordWrap(True)
+        layout.addWidget(self.loaded_label)
+        self.setLayout(layout)
+
+    def log(self, text):
+        if self.output_callback:
+            self.output_callback(text + "\n")
+
+    def _start(self, worker):
+        self.workers.add(worker)
+        # QThread.finished fires once run() has returned; dropping the reference earlier destroys a running thread.
+        worker.finished.connect(lambda: self.workers.discard(worker))
+        worker.start()
+
+    # -------------------------
+    # Pulls
+    # -------------------------
+    def pull_model(self):
+        model = self.model_input.text().strip()
+        if not model:
+            self.status_label.setText("No model name provided.")
+            return
+        if model in self.pulls:
+            self.status_label.setText(f"{model} is already being pulled.")
+            return
+        self.model_input.clear()
+        worker = PullWorker(self.client, model)
+        row = PullRow(worker)
+        self.pulls[model] = row
+        self.pull_layout.addWidget(row)
+        worker.progress.connect(row.update_progress)
+        worker.done.connect(self.pull_finished)
+        worker.error.connect(lambda message, m=model: self.pull_failed(m, message))
+        self.log(f"Pulling {model} from {self.client.base_url}")
+        self._start(worker)
+
+    def _remove_pull(self, model):
+        row = self.pulls.pop(model, None)
+        if row is not None:
+            self.pull_layout.removeWidget(row)
+            row.deleteLater()
+
+    def pull_finished(self, model):
+        self._remove_pull(model)
+        self.status_label.setText(f"Pulled {model}.")
+        self.log(f"Pulled {model}")
+        self.refresh()
+
+    def pull_failed(self, model, message):
+        self._remove_pull(model)
+        self.status_label.setText(message)
+        self.log(f"Pull of {model} failed: {message}")
+
+    def cancel_all(self):
+        for row in list(self.pulls.values()):
+            row.worker.cancel()
+
+    # -------------------------
+    # Listing
+    # -------------------------
+    def refresh(self, installed=True):
+        if self.list_worker is not None:
+            # The running listing may predate a pull or delete; list the installed models again after it.
+            self.refresh_pending = self.refresh_pending or installed
+            return
+        self.list_worker = ListWorker(self.client, installed)
+        self.list_worker.done.connect(self.show_models)
+        self.list_worker.error.connect(self.show_unreachable)
+        self.list_worker.done.connect(self._list_done)
+        self.list_worker.error.connect(self._list_done)
+        self._start(self.list_worker)
+
+    def _list_done(self, *_):
+        self.list_worker = None
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.refresh()
+
+    def show_models(self, installed, loaded):
+        if installed is not None:
+            self.model_table.setRowCount(len(installed))
+            for row, model in enumerate(installed):
+                details = " ".join(part for part in (model.parameter_size, model.quantization) if part)
+                for column, value in enumerate((model.name, format_size(model.size), details)):
+                    self.model_table.setItem(row, column, QTableWidgetItem(value))
+        if loaded:
+            parts = []
+            for model in loaded:
+                vram = f", {format_size(model.size_vram)} in VRAM" if model.size_vram else ""
+                expires = ""
+                if model.expires_at:
+                    try:
+                        expires = f", until {datetime.fromisoformat(model.expires_at[:19]).strftime('%H:%M')}"
+                    except ValueError:
+                        pass
+                parts.append(f"{model.name} ({format_size(model.size)}{vram}{expires})")
+            self.loaded_label.setText("Loaded: " + "; ".join(parts))
+        else:
+            self.loaded_label.setText("Loaded: none")
+
+    def show_unreachable(self, message):
+        self.loaded_label.setText(f"Loaded: - ({message})")
+
+    def delete_selected(self):
+        rows = sorted({index.row() for index in self.model_table.selectedIndexes()})
+        if not rows:
+            return
+        model = self.model_table.item(rows[0], 0).text()
+        answer = QMessageBox.question(self, "Delete model", f"Delete {model} from Ollama?")
+        if answer != QMessageBox.Yes:
+            return
+        worker = DeleteWorker(self.client, model)
+        worker.done.connect(lambda m: (self.log(f"Deleted {m}"), self.refresh()))
+        worker.error.connect(self.status_label.setText)
+        self._start(worker)
+
+    def shutdown(self):
+        self.loaded_timer.stop()
+        self.cancel_all()
+        for worker in list(self.workers):
+            worker.wait(2000)
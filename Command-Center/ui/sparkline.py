@@ -0,0 +1,116 @@
+# sparkline.py
+
+import math
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+LINE_COLOR = QColor("#4CAF50")
+PEAK_COLOR = QColor(76, 175, 80, 70)
+BACKGROUND_COLOR = QColor("#f4f4f4")
+
+
+class Sparkline(QWidget):
+    """
+    One pixel per bucket sparkline of a MetricSeries tier (newest on the right).
+
+    The plot lives in a pixmap. `refresh()` scrolls it left by the number of
+    buckets added since the last call and only draws the new columns, so a
+    tick costs the same whatever the width. A full redraw happens only on
+    resize or when another tier is selected. Bucket maxima are drawn as a
+    faint band behind the mean so short spikes stay visible at coarse tiers.
+    """
+
+    def __init__(self, series, tier=0, minimum=0.0, maximum=100.0, parent=None):
+        super().__init__(parent)
+        self.series = series
+        self.tier_index = tier
+        self.minimum = minimum
+        self.maximum = maximum
+        self._pixmap = None
+        self._drawn_bucket = None
+        self.setMinimumHeight(28)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    @property
+    def tier(self):
+        return self.series.tiers[self.tier_index]
+
+    def set_tier(self, tier):
+        self.tier_index = tier
+        self._redraw()
+
+    def refresh(self):
+        """Draws whatever was added to the series since the last call."""
+        tier = self.tier
+        if self._pixmap is None or tier.last_bucket is None or self._drawn_bucket is None:
+            self._redraw()
+            return
+        new = tier.last_bucket - self._drawn_bucket
+        width = self._pixmap.width()
+        if new >= width:
+            self._redraw()
+            return
+        if new:
+            self._pixmap.scroll(-new, 0, self._pixmap.rect())
+        # The previously newest bucket may have changed too (it was still open),
+        # and so has the segment leading into it.
+        self._draw_columns(width - new - 2, width)
+        self._drawn_bucket = tier.last_bucket
+        self.update()
+
+    def _redraw(self):
+        if self.width() <= 0 or self.height() <= 0:
+            return
+        self._pixmap = QPixmap(self.width(), self.height())
+        self._drawn_bucket = self.tier.last_bucket
+        if self._drawn_bucket is None:
+            self._pixmap.fill(BACKGROUND_COLOR)
+        else:
+            self._draw_columns(0, self._pixmap.width())
+        self.update()
+
+    def _y(self, value):
+        span = (self.maximum - self.minimum) or 1.0
+        fraction = min(1.0, max(0.0, (value - self.minimum) / span))
+        return (self._pixmap.height() - 2) * (1.0 - fraction) + 1
+
+    def _draw_columns(self, first, last):
+        """Repaints pixmap columns [first, last); column width - 1 is tier.last_bucket."""
+        first = max(0, first)
+        width = self._pixmap.width()
+        height = self._pixmap.height()
+        tier = self.tier
+        painter = QPainter(self._pixmap)
+        painter.fillRect(QRect(first, 0, last - first, height), BACKGROUND_COLOR)
+        peak_pen = QPen(PEAK_COLOR)
+        line_pen = QPen(LINE_COLOR)
+        line_pen.setWidth(1)
+        newest = tier.last_bucket
+        previous = tier.value(newest - (width - first))
+        for x in range(first, last):
+            bucket = newest - (width - 1 - x)
+            mean = tier.value(bucket)
+            if not math.isnan(mean):
+                peak = tier.value(bucket, maxima=True)
+                if peak > mean:
+                    painter.setPen(peak_pen)
+                    painter.drawLine(x, int(self._y(peak)), x, int(self._y(mean)))
+                painter.setPen(line_pen)
+                if math.isnan(previous):
+                    painter.drawPoint(x, int(self._y(mean)))
+                else:
+                    painter.drawLine(x - 1, int(self._y(previous)), x, int(self._y(mean)))
+            previous = mean
+        painter.end()
+
+    def resizeEvent(self, event):
+        self._redraw()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
+        painter.end()
@@ -11,7 +11,7 @@ DEFAULT_STYLE = """
     QPushButton:hover {
         background-color: #45a049;
     }
-    QTextEdit {
+    QTextEdit, QPlainTextEdit {
         font-family: monospace;
         font-size: 10pt;
     }
@@ -0,0 +1,289 @@
+# job_log.py
+#
+# Persistent, searchable record of every command run by the job scheduler.
+# Records are JSON Lines in size-rotated segments (rotated segments are
+# gzipped); a SQLite index maps each job to its segments and byte offsets.
+#
+#   python -m utils.job_log --failed --since 2024-05-01
+#   python -m utils.job_log --show <job id>
+
+import argparse
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from config import JOB_LOG_BACKUPS, JOB_LOG_DIR, JOB_LOG_MAX_BYTES
+
+CURRENT_SEGMENT = "commands.jsonl"
+INDEX_NAME = "index.sqlite3"
+MAX_QUEUED_RECORDS = 50_000     # Records beyond this are dropped (and counted) rather than blocking a job.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    command TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    duration REAL,
+    returncode INTEGER,
+    status TEXT,
+    output_bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_started ON jobs (started);
+CREATE TABLE IF NOT EXISTS job_segments (
+    job_id TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    first_offset INTEGER NOT NULL,
+    last_offset INTEGER NOT NULL,
+    PRIMARY KEY (job_id, segment)
+);
+CREATE INDEX IF NOT EXISTS job_segments_segment ON job_segments (segment);
+"""
+
+
+class JobRecorder:
+    """Handle for one job; its methods only queue records and never block."""
+
+    def __init__(self, log, job_id, command):
+        self.log = log
+        self.job_id = job_id
+        self.command = command
+        self.started = time.time()
+        self.output_bytes = 0
+        log._submit({"type": "start", "job": job_id, "time": self.started, "command": command})
+
+    def output(self, stream, text):
+        self.output_bytes += len(text)
+        self.log._submit({"type": "output", "job": self.job_id, "time": time.time(), "stream": stream,
+                          "text": text})
+
+    def finish(self, returncode, status=None):
+        finished = time.time()
+        self.log._submit({"type": "end", "job": self.job_id, "time": finished, "returncode": returncode,
+                          "status": status, "duration": finished - self.started,
+                          "output_bytes": self.output_bytes})
+
+
+class JobLog:
+    """
+    Background writer for job records. Jobs call `start()` and the recorder it
+    returns; a single writer thread appends to the current segment, rotates it
+    once it exceeds `max_bytes` (gzipping the old one and keeping `backups`
+    of them) and keeps the index up to date.
+    """
+
+    def __init__(self, log_dir=JOB_LOG_DIR, max_bytes=JOB_LOG_MAX_BYTES, backups=JOB_LOG_BACKUPS):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        os.makedirs(log_dir, exist_ok=True)
+        self._queue = queue.Queue(maxsize=MAX_QUEUED_RECORDS)
+        self._thread = threading.Thread(target=self._writer, name="job-log-writer", daemon=True)
+        self._thread.start()
+
+    def start(self, command):
+        return JobRecorder(self, uuid.uuid4().hex[:12], command)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _submit(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # -------------------------
+    # Writer thread
+    # -------------------------
+    def _writer(self):
+        index = open_index(self.log_dir)
+        path = os.path.join(self.log_dir, CURRENT_SEGMENT)
+        segment = open(path, "ab")
+        try:
+            while True:
+                record = self._queue.get()
+                batch = [record]
+                # Drain whatever else is queued so the index is committed once per batch.
+                while record is not None:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(record)
+                for record in batch:
+                    if record is None:
+                        return
+                    offset = segment.tell()
+                    segment.write(json.dumps(record).encode("utf-8") + b"\n")
+                    self._index(index, record, offset)
+                    if segment.tell() >= self.max_bytes:
+                        segment.close()
+                        index.commit()
+                        self._rotate(index, path)
+                        segment = open(path, "ab")
+                segment.flush()
+                index.commit()
+        finally:
+            segment.close()
+            index.commit()
+            index.close()
+
+    def _index(self, index, record, offset):
+        job_id = record["job"]
+        if record["type"] == "start":
+            index.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, command, started) VALUES (?, ?, ?)",
+                (job_id, record["command"], record["time"])
+            )
+        elif record["type"] == "end":
+            index.execute(
+                "UPDATE jobs SET finished = ?, duration = ?, returncode = ?, status = ?, output_bytes = ? "
+                "WHERE job_id = ?",
+                (record["time"], record["duration"], record["returncode"], record["status"],
+                 record["output_bytes"], job_id)
+            )
+        index.execute(
+            "INSERT INTO job_segments (job_id, segment, first_offset, last_offset) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (job_id, segment) DO UPDATE SET last_offset = excluded.last_offset",
+            (job_id, CURRENT_SEGMENT, offset, offset)
+        )
+
+    def _rotate(self, index, path):
+        rotated = f"commands-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl.gz"
+        with open(path, "rb") as src, gzip.open(os.path.join(self.log_dir, rotated + ".part"), "wb") as dst:
+            while True:
+                block = src.read(1024 * 1024)
+                if not block:
+                    break
+                dst.write(block)
+        os.replace(os.path.join(self.log_dir, rotated + ".part"), os.path.join(self.log_dir, rotated))
+        os.remove(path)
+        index.execute("UPDATE job_segments SET segment = ? WHERE segment = ?", (rotated, CURRENT_SEGMENT))
+
+        segments = sorted(name for name in os.listdir(self.log_dir)
+                          if name.startswith("commands-") and name.endswith(".jsonl.gz"))
+        for name in segments[:max(0, len(segments) - self.backups)]:
+            os.remove(os.path.join(self.log_dir, name))
+            index.execute("DELETE FROM job_segments WHERE segment = ?", (name,))
+        index.execute("DELETE FROM jobs WHERE job_id NOT IN (SELECT job_id FROM job_segments)")
+        index.commit()
+
+
+# -------------------------
+# Queries
+# -------------------------
+def open_index(log_dir):
+    index = sqlite3.connect(os.path.join(log_dir, INDEX_NAME))
+    index.execute("PRAGMA journal_mode=WAL")
+    index.executescript(SCHEMA)
+    return index
+
+
+def find_jobs(log_dir=JOB_LOG_DIR, job_id=None, since=None, until=None, failed=False, command=None, limit=100):
+    """Index rows (newest first) matching the filters; `since`/`until` are epoch seconds."""
+    clauses, params = [], []
+    if job_id:
+        clauses.append("job_id LIKE ?")
+        params.append(job_id + "%")
+    if since is not None:
+        clauses.append("started >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("started < ?")
+        params.append(until)
+    if failed:
+        clauses.append("(returncode IS NULL OR returncode != 0)")
+    if command:
+        clauses.append("command LIKE ?")
+        params.append(f"%{command}%")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    index = open_index(log_dir)
+    try:
+        index.row_factory = sqlite3.Row
+        rows = index.execute(
+            f"SELECT * FROM jobs {where} ORDER BY started DESC LIMIT ?", params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        index.close()
+
+
+def read_job_records(log_dir, job_id):
+    """Yields the records of one job in order, reading only its byte ranges of each segment."""
+    index = open_index(log_dir)
+    try:
+        spans = index.execute(
+            "SELECT segment, first_offset, last_offset FROM job_segments WHERE job_id = ? "
+            "ORDER BY segment = ?, segment",
+            (job_id, CURRENT_SEGMENT)
+        ).fetchall()
+    finally:
+        index.close()
+    for segment, first, last in spans:
+        path = os.path.join(log_dir, segment)
+        opener = gzip.open if segment.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                f.seek(first)
+                while f.tell() <= last:
+                    line = f.readline()
+                    if not line:
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("job") == job_id:
+                        yield record
+        except FileNotFoundError:
+            continue    # Rotated away between the index lookup and the read.
+
+
+def read_job_output(log_dir, job_id):
+    return "".join(r["text"] for r in read_job_records(log_dir, job_id) if r["type"] == "output")
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the Command-Center job log.")
+    parser.add_argument("--log-dir", default=JOB_LOG_DIR)
+    parser.add_argument("--show", metavar="JOB_ID", help="Print the output of one job")
+    parser.add_argument("--since", type=parse_time, help="ISO date/time")
+    parser.add_argument("--until", type=parse_time, help="ISO date/time")
+    parser.add_argument("--failed", action="store_true", help="Only jobs that did not exit with 0")
+    parser.add_argument("--command", help="Substring of the command")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.show:
+        matches = find_jobs(args.log_dir, job_id=args.show, limit=2)
+        if len(matches) != 1:
+            print("No such job." if not matches else "Job id prefix is ambiguous.", file=sys.stderr)
+            return 1
+        job = matches[0]
+        print(f"$ {job['command']}  (exit {job['returncode']}, {job['status']})")
+        sys.stdout.write(read_job_output(args.log_dir, job["job_id"]))
+        return 0
+
+    for job in find_jobs(args.log_dir, since=args.since, until=args.until, failed=args.failed,
+                         command=args.command, limit=args.limit):
+        started = datetime.fromtimestamp(job["started"]).strftime("%Y-%m-%d %H:%M:%S")
+        duration = f"{job['duration']:.1f}s" if job["duration"] is not None else "-"
+        print(f"{job['job_id']}  {started}  {str(job['returncode']):>4}  {duration:>8}  {job['command']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
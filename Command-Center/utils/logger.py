@@ -1,8 +1,14 @@
 # logger.py
 
+from collections import deque
 from colorama import Fore, Style
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QTextCursor
 
+OUTPUT_FLUSH_MS = 50            # How often queued output is drained into the widget.
+OUTPUT_MAX_LINES = 5000         # Older lines are dropped from the widget beyond this.
+OUTPUT_MAX_PENDING = 10000      # Queued chunks kept while the GUI is busy; the oldest go first.
+
 def print_to_terminal(text, color="default"):
     if color == "red":
         print(Fore.RED + text + Style.RESET_ALL)
@@ -18,3 +24,55 @@ def write_to_output(widget, text):
     widget.moveCursor(QTextCursor.End)
     widget.insertPlainText(text)
     widget.moveCursor(QTextCursor.End)
+
+
+class OutputSink:
+    """
+    Thread-safe writer for a QPlainTextEdit (or QTextEdit) log view.
+
+    `write()` may be called from any thread: it only appends to a deque. A
+    QTimer on the GUI thread drains the deque every `interval_ms` and inserts
+    everything queued since the last tick with a single cursor operation. The
+    document keeps at most `max_lines` lines, so long sessions stay small.
+    """
+
+    def __init__(self, widget, interval_ms=OUTPUT_FLUSH_MS, max_lines=OUTPUT_MAX_LINES,
+                 max_pending=OUTPUT_MAX_PENDING):
+        self.widget = widget
+        self.max_lines = max_lines
+        self._pending = deque(maxlen=max_pending)
+        widget.document().setMaximumBlockCount(max_lines)
+        self.timer = QTimer(widget)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(interval_ms)
+
+    def write(self, text):
+        self._pending.append(text)
+
+    def flush(self):
+        if not self._pending:
+            return
+        parts = []
+        try:
+            while True:
+                parts.append(self._pending.popleft())
+        except IndexError:
+            pass
+        text = "".join(parts)
+        # Only the tail can survive the line cap, so don't lay out the rest.
+        cut = len(text)
+        for _ in range(self.max_lines):
+            cut = text.rfind("\n", 0, cut)
+            if cut <= 0:
+                break
+        if cut > 0:
+            text = text[cut + 1:]
+
+        scrollbar = self.widget.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
+
@@ -0,0 +1,153 @@
+# pdf_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # Size bound for cached page records.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of the file content; the cache never trusts names or mtimes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent per-page cache of extraction results backed by SQLite.
+
+    Entries are keyed on (content digest, extraction mode, extractor version), so
+    a changed file, a different mode or a new output format never hits stale
+    data. Each document stores its page records individually, which lets an
+    interrupted extraction resume from the pages it already finished. The cache
+    is bounded by the total size of stored records and evicts the least recently
+    used documents first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.pinned = set()     # Keys of documents in use; never evicted.
+        self.db = sqlite3.connect(os.path.join(cache_dir, "pages.sqlite3"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                version TEXT NOT NULL,
+                n_pages INTEGER,
+                size INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_digest ON documents(digest);
+            CREATE INDEX IF NOT EXISTS documents_last_access ON documents(last_access);
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (key, page)
+            );
+        """)
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def document_key(digest, mode, version):
+        return f"{digest}:{mode}:{version}"
+
+    def open_document(self, digest, mode, version):
+        """Registers (or touches) a document and returns its cache key."""
+        key = self.document_key(digest, mode, version)
+        with self.db:
+            self.db.execute(
+                "INSERT INTO documents (key, digest, mode, version, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_access = excluded.last_access",
+                (key, digest, mode, version, time.time())
+            )
+        return key
+
+    def page_count(self, key):
+        row = self.db.execute("SELECT n_pages FROM documents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, key, n_pages):
+        with self.db:
+            self.db.execute("UPDATE documents SET n_pages = ? WHERE key = ?", (n_pages, key))
+
+    def cached_page_indices(self, key):
+        return {row[0] for row in self.db.execute("SELECT page FROM pages WHERE key = ?", (key,))}
+
+    def get_page(self, key, page):
+        row = self.db.execute("SELECT record FROM pages WHERE key = ? AND page = ?", (key, page)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_pages(self, key):
+        """Returns {page index: record} for every cached page of the document."""
+        rows = self.db.execute("SELECT page, record FROM pages WHERE key = ?", (key,))
+        return {page: json.loads(record) for page, record in rows}
+
+    def put_pages(self, key, start, records):
+        """Stores records for consecutive pages beginning at page index `start`."""
+        rows = [(key, start + i, json.dumps(record)) for i, record in enumerate(records)]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO pages (key, page, record) VALUES (?, ?, ?)", rows)
+            self.db.execute(
+                "UPDATE documents SET size = (SELECT COALESCE(SUM(LENGTH(record)), 0) FROM pages WHERE key = ?), "
+                "last_access = ? WHERE key = ?",
+                (key, time.time(), key)
+            )
+        self._evict()
+
+    def is_complete(self, key, cached_pages):
+        n_pages = self.page_count(key)
+        return n_pages is not None and len(cached_pages) >= n_pages
+
+    def invalidate(self, digest=None, key=None):
+        """Drops a single document (by key) or every mode/version of a file (by digest)."""
+        if key is not None:
+            keys = [key]
+        else:
+            keys = [row[0] for row in self.db.execute("SELECT key FROM documents WHERE digest = ?", (digest,))]
+        with self.db:
+            for k in keys:
+                self._delete(k)
+        return len(keys)
+
+    def invalidate_file(self, path):
+        return self.invalidate(digest=file_digest(path))
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM pages")
+            self.db.execute("DELETE FROM documents")
+        self.db.execute("VACUUM")
+
+    def total_size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+
+    def _delete(self, key):
+        self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+        self.db.execute("DELETE FROM documents WHERE key = ?", (key,))
+
+    def _evict(self):
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM documents ORDER BY last_access ASC").fetchall()
+        with self.db:
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if key in self.pinned:
+                    continue
+                self._delete(key)
+                total -= size
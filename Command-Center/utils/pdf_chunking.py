@@ -0,0 +1,166 @@
+# pdf_chunking.py
+
+import hashlib
+import json
+import os
+import re
+
+CHUNK_UNITS = ("chars", "tokens")
+# Same defaults as the rag_api service (CHUNK_SIZE / CHUNK_OVERLAP).
+DEFAULT_CHUNK_SIZE = 1500
+DEFAULT_CHUNK_OVERLAP = 100
+DEFAULT_CHUNK_UNIT = "chars"
+
+# Whitespace-delimited tokens. Deliberately tokenizer-independent so chunk
+# boundaries (and therefore chunk IDs) never depend on what is installed.
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+def render_table(table):
+    return "\n".join(",".join(str(cell) if cell is not None else "" for cell in row) for row in table)
+
+
+class PageChunker:
+    """
+    Incrementally cuts the page records of one document into overlapping
+    windows of `size` characters or tokens. Pages are fed in order with
+    add_page() while extraction is running; every chunk carries the pages and
+    tables it was cut from. Chunk IDs only depend on the document ID, the
+    chunking parameters, the chunk position and its text, so re-running on an
+    unchanged file reproduces the same IDs.
+    """
+
+    def __init__(self, document_id, source=None, size=DEFAULT_CHUNK_SIZE,
+                 overlap=DEFAULT_CHUNK_OVERLAP, unit=DEFAULT_CHUNK_UNIT):
+        if unit not in CHUNK_UNITS:
+            raise ValueError(f"Unknown chunk unit: {unit!r} (expected one of {CHUNK_UNITS})")
+        if size <= 0 or not 0 <= overlap < size:
+            raise ValueError("Chunk size must be positive and overlap smaller than the chunk size.")
+        self.document_id = document_id
+        self.source = source
+        self.size = size
+        self.overlap = overlap
+        self.unit = unit
+        self.signature = f"{unit}:{size}:{overlap}"
+        self.buffer = ""        # Text not yet fully emitted.
+        self.pos = 0            # Start of the next window (chars mode).
+        self.token_starts = []  # Buffer offsets of every token (tokens mode).
+        self.token_pos = 0      # Start of the next window (tokens mode).
+        self.spans = []         # (start, end, page, table index or None) for each segment in the buffer.
+        self.chunk_index = 0
+
+    def add_page(self, record):
+        """Feeds one page record; yields the chunks that became complete."""
+        if record["text"]:
+            yield from self._append(record["text"], record["page"], None)
+        for j, table in enumerate(record["tables"]):
+            yield from self._append(render_table(table), record["page"], j + 1)
+
+    def finish(self):
+        """Yields the trailing chunk, unless it would only repeat the previous overlap."""
+        already_emitted = self.overlap if self.chunk_index else 0
+        if self._available() > already_emitted:
+            yield from self._emit(*self._window(self._available()))
+
+    # ----- Internals -----
+    def _append(self, text, page, table):
+        if self.buffer:
+            self.buffer += "\n"
+        start = len(self.buffer)
+        self.buffer += text
+        self.spans.append((start, len(self.buffer), page, table))
+        if self.unit == "tokens":
+            self.token_starts.extend(start + m.start() for m in TOKEN_PATTERN.finditer(text))
+        while self._available() >= self.size:
+            yield from self._emit(*self._window(self.size))
+            self._advance(self.size - self.overlap)
+
+    def _available(self):
+        if self.unit == "chars":
+            return len(self.buffer) - self.pos
+        return len(self.token_starts) - self.token_pos
+
+    def _window(self, n_units):
+        """Buffer offsets [start, end) of the next window of n_units."""
+        if self.unit == "chars":
+            return self.pos, self.pos + n_units
+        start = self.token_starts[self.token_pos]
+        last = self.token_pos + n_units
+        end = self.token_starts[last] if last < len(self.token_starts) else len(self.buffer)
+        return start, end
+
+    def _advance(self, n_units):
+        if self.unit == "chars":
+            self.pos += n_units
+            offset = self.pos
+        else:
+            self.token_pos += n_units
+            offset = self.token_starts[self.token_pos] if self.token_pos < len(self.token_starts) else len(self.buffer)
+        # Compact once the consumed prefix dominates, keeping appends amortised O(n).
+        if offset * 2 >= len(self.buffer):
+            self.buffer = self.buffer[offset:]
+            self.spans = [(s - offset, e - offset, p, t) for s, e, p, t in self.spans if e > offset]
+            if self.unit == "chars":
+                self.pos = 0
+            else:
+                self.token_starts = [t - offset for t in self.token_starts[self.token_pos:]]
+                self.token_pos = 0
+
+    def _emit(self, start, end):
+        text = self.buffer[start:end].strip()
+        if text:
+            yield self._make_chunk(start, end, text)
+
+    def _make_chunk(self, start, end, text):
+        pages = []
+        tables = []
+        for s, e, page, table in self.spans:
+            if s < end and e > start:
+                if page not in pages:
+                    pages.append(page)
+                if table is not None:
+                    tables.append({"page": page, "table": table})
+        digest = hashlib.sha256(
+            f"{self.document_id}\0{self.signature}\0{self.chunk_index}\0{text}".encode("utf-8")
+        ).hexdigest()
+        chunk = {
+            "id": digest[:32],
+            "document_id": self.document_id,
+            "source": self.source,
+            "chunk_index": self.chunk_index,
+            "text": text,
+            "pages": pages,
+            "tables": tables,
+        }
+        self.chunk_index += 1
+        return chunk
+
+
+class ChunkOutput:
+    """
+    Output for OrderedPageWriter that streams chunks as JSON Lines while pages
+    arrive. Like TextOutput it writes to "<path>.part" and renames on close.
+    """
+
+    def __init__(self, path, chunker):
+        self.path = path
+        self.part_path = path + ".part"
+        self.chunker = chunker
+        self.file = open(self.part_path, "w", encoding="utf-8")
+
+    def _write_chunks(self, chunks):
+        for chunk in chunks:
+            self.file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+
+    def write(self, record):
+        self._write_chunks(self.chunker.add_page(record))
+
+    def close(self):
+        self._write_chunks(self.chunker.finish())
+        self.file.close()
+        os.replace(self.part_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
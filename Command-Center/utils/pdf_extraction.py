@@ -0,0 +1,574 @@
+# pdf_extraction.py
+
+import os
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+import pdfplumber
+from utils.pdf_cache import DEFAULT_MAX_BYTES, ExtractionCache, file_digest
+from utils.pdf_chunking import ChunkOutput, PageChunker
+from utils.pdf_journal import JOURNAL_FILE_NAME, STATE_DIR_NAME, BatchJournal, source_stamp, write_error_report
+
+EXTRACTOR_VERSION = "1"        # Bump whenever the page record format or its rendering changes.
+EXTRACTION_MODES = ("Text Only", "Tables Only", "Both")
+DEFAULT_PAGES_PER_TASK = 50    # Large files are split into page ranges of this size.
+
+
+def default_worker_count():
+    """Leave one core free for the GUI / coordinating process."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def list_pdf_files(folder_path):
+    return sorted(f for f in os.listdir(folder_path) if f.lower().endswith('.pdf'))
+
+
+# -------------------------
+# Page-level extraction (runs inside pool processes)
+# -------------------------
+def page_may_contain_tables(page):
+    """
+    Cheap pre-check for the default ("lines") table strategy, which only builds
+    tables from ruling edges: a page needs at least two horizontal and two
+    vertical lines, or any rect/curve (which pdfplumber turns into edges).
+    Pages of plain prose fail this test and skip extract_tables() entirely.
+    """
+    if page.rects or page.curves:
+        return True
+    horizontal = vertical = 0
+    for line in page.lines:
+        if abs(line["top"] - line["bottom"]) < 1:
+            horizontal += 1
+        elif abs(line["x0"] - line["x1"]) < 1:
+            vertical += 1
+        if horizontal >= 2 and vertical >= 2:
+            return True
+    return False
+
+
+def extract_page(page, mode, adaptive=False):
+    """
+    Returns a record {"page", "text", "tables"} for a single pdfplumber page.
+    In adaptive mode the table extractor only runs on pages that pass
+    page_may_contain_tables(); the record then also carries "tables_skipped".
+    """
+    record = {"page": page.page_number, "text": None, "tables": []}
+    if mode in ("Text Only", "Both"):
+        record["text"] = page.extract_text() or None
+    if mode in ("Tables Only", "Both"):
+        if adaptive and not page_may_contain_tables(page):
+            record["tables_skipped"] = True
+        else:
+            record["tables"] = page.extract_tables() or []
+    return record
+
+
+def cache_mode(mode, adaptive=False):
+    """Cache key component for an extraction mode; adaptive results are kept apart."""
+    return f"{mode} (adaptive)" if adaptive else mode
+
+
+def format_page(record):
+    """Renders a page record in the converter's plain-text output format."""
+    parts = []
+    page_number = record["page"]
+    if record["text"]:
+        parts.append(f"--- Page {page_number} Text ---\n{record['text']}\n")
+    for j, table in enumerate(record["tables"]):
+        parts.append(f"Page {page_number} - Table {j+1}:\n")
+        for row in table:
+            parts.append(",".join([str(cell) if cell is not None else "" for cell in row]) + "\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+def count_pages(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_range(pdf_path, mode, start, end, adaptive=False):
+    """Extracts pages [start, end) of a PDF and returns their records in page order."""
+    records = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:end]:
+            records.append(extract_page(page, mode, adaptive))
+            page.close()    # Drop the parsed layout so memory stays flat on long documents.
+    return records
+
+
+def plan_missing_ranges(n_pages, done_pages, pages_per_task=DEFAULT_PAGES_PER_TASK):
+    """Page ranges covering only the pages not in `done_pages` (e.g. already cached)."""
+    ranges = []
+    start = None
+    for i in range(n_pages + 1):
+        missing = i < n_pages and i not in done_pages
+        if missing and start is None:
+            start = i
+        elif not missing and start is not None:
+            ranges.extend((s, min(s + pages_per_task, i)) for s in range(start, i, pages_per_task))
+            start = None
+    return ranges
+
+
+def open_cache(cache_dir, max_bytes=None):
+    return ExtractionCache(cache_dir, max_bytes or DEFAULT_MAX_BYTES)
+
+
+def iter_page_records(pdf_path, mode, cache=None, digest=None, adaptive=False):
+    """
+    Yields (n_pages, record) for every page in order. With a cache, pages stored
+    by an earlier run are served from it and freshly extracted pages are added
+    one by one, so an interrupted extraction picks up where it stopped.
+    """
+    key = None
+    cached = set()
+    if cache is not None:
+        key = cache.open_document(digest or file_digest(pdf_path), cache_mode(mode, adaptive), EXTRACTOR_VERSION)
+        cache.pinned.add(key)
+        cached = cache.cached_page_indices(key)
+    try:
+        if key is not None and cache.is_complete(key, cached):
+            n_pages = cache.page_count(key)
+            for i in range(n_pages):
+                yield n_pages, cache.get_page(key, i)
+            return
+        with pdfplumber.open(pdf_path) as pdf:
+            n_pages = len(pdf.pages)
+            if key is not None:
+                cache.set_page_count(key, n_pages)
+            for i, page in enumerate(pdf.pages):
+                if i in cached:
+                    yield n_pages, cache.get_page(key, i)
+                    continue
+                record = extract_page(page, mode, adaptive)
+                page.close()
+                if key is not None:
+                    cache.put_pages(key, i, [record])
+                yield n_pages, record
+    finally:
+        if key is not None:
+            cache.pinned.discard(key)
+
+
+# -------------------------
+# Streaming output
+# -------------------------
+class TextOutput:
+    """
+    Streams formatted pages to a .txt file. Pages go to "<path>.part", which
+    replaces the target only when the output is closed, so a crash never leaves
+    a truncated file under the final name.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.part_path = path + ".part"
+        self.file = None
+
+    def write(self, record):
+        if self.file is None:
+            self.file = open(self.part_path, "w", encoding="utf-8")
+        self.file.write(format_page(record))
+
+    def close(self):
+        if self.file is None:
+            # Documents without any extracted content still get an (empty) output file.
+            self.file = open(self.part_path, "w", encoding="utf-8")
+        self.file.close()
+        os.replace(self.part_path, self.path)
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+
+class TeeOutput:
+    """Feeds every page record to several outputs (e.g. the .txt file and its chunks)."""
+
+    def __init__(self, *outputs):
+        self.outputs = outputs
+
+    def write(self, record):
+        for output in self.outputs:
+            output.write(record)
+
+    def close(self):
+        for output in self.outputs:
+            output.close()
+
+    def discard(self):
+        for output in self.outputs:
+            output.discard()
+
+
+class PreviewOutput:
+    """Keeps at most `max_chars` of formatted output in memory for display."""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def write(self, record):
+        if self.truncated:
+            return
+        text = format_page(record)
+        if self.size + len(text) > self.max_chars:
+            text = text[:self.max_chars - self.size]
+            self.truncated = True
+        self.parts.append(text)
+        self.size += len(text)
+
+    def text(self):
+        return "".join(self.parts)
+
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class OrderedPageWriter:
+    """
+    Passes page records to an output strictly in page order. Ranges finished out
+    of order wait in a small buffer; pages already in the cache are read back one
+    at a time as the writer reaches them, so a document is never held in memory.
+    """
+
+    def __init__(self, output, n_pages, cache=None, key=None, cached_pages=()):
+        self.output = output
+        self.n_pages = n_pages
+        self.cache = cache
+        self.key = key
+        self.cached_pages = cached_pages
+        self.next_page = 0
+        self.waiting = {}   # page index -> record that arrived ahead of next_page
+        self.tables_skipped = 0     # Written pages, fresh or cached, whose table detection was skipped.
+
+    def add(self, start, records):
+        for i, record in enumerate(records):
+            self.waiting[start + i] = record
+        self.drain()
+
+    def drain(self):
+        while self.next_page < self.n_pages:
+            if self.next_page in self.waiting:
+                record = self.waiting.pop(self.next_page)
+            elif self.next_page in self.cached_pages:
+                record = self.cache.get_page(self.key, self.next_page)
+            else:
+                break
+            self.output.write(record)
+            self.tables_skipped += bool(record.get("tables_skipped"))
+            self.next_page += 1
+
+    @property
+    def complete(self):
+        return self.next_page >= self.n_pages
+
+
+# -------------------------
+# Parallel batch engine
+# -------------------------
+class BatchExtractor:
+    """
+    Extracts every PDF in a folder on a process pool. Files are first sized in
+    parallel, then split into page ranges so that a single large file is spread
+    over several workers. Per-file failures are collected instead of aborting the
+    whole batch. With a cache directory, files are hashed first and only pages
+    missing from the extraction cache are scheduled. With `chunk_options` (keyword
+    arguments for PageChunker), a .jsonl file of RAG chunks is written next to
+    every .txt output while its pages stream in.
+
+    Only a bounded window of page ranges is in flight at once, and finished pages
+    are streamed to their output files in order, so memory use does not grow with
+    the size of the corpus or of any single document.
+
+    With `journal=True` the batch is journaled in the output folder: finished
+    files are skipped when the batch is started again, finished page ranges are
+    kept in the cache (or a private page store when no cache is configured) so
+    a half-done file resumes from its last range, and failing files are listed
+    in an error report.
+
+    With `adaptive=True` the table extractor is skipped on pages without ruling
+    lines; `tables_skipped` counts those pages.
+    """
+
+    def __init__(self, folder_path, mode, output_folder, max_workers=None,
+                 pages_per_task=DEFAULT_PAGES_PER_TASK, progress_callback=None,
+                 cache_dir=None, cache_max_bytes=None, chunk_options=None,
+                 journal=False, resume=True, adaptive=False):
+        self.folder_path = folder_path
+        self.mode = mode
+        self.adaptive = adaptive
+        self.output_folder = output_folder
+        self.max_workers = max_workers or default_worker_count()
+        self.pages_per_task = pages_per_task
+        self.max_in_flight = self.max_workers * 2
+        self.progress_callback = progress_callback
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.cache = None
+        self.private_cache = False
+        self.chunk_options = chunk_options
+        self.use_journal = journal
+        self.resume = resume
+        self.journal = None
+        self.cancel_event = threading.Event()
+        self.digests = {}   # pdf file name -> content digest (with caching or chunking)
+        self.stamps = {}    # pdf file name -> source stamp (journaled batches)
+        self.errors = {}    # pdf file name -> error message
+        self.skipped = []   # files finished by an earlier run of a journaled batch
+        self.pages_from_cache = 0
+        self.tables_skipped = 0
+        self.page_counts = {}   # pdf file name -> number of pages
+        self.file_times = {}    # pdf file name -> [started, finished] (time.perf_counter)
+        self.first_page_time = None     # time.perf_counter() when the first page reached an output
+        self.error_report = None
+
+    def cancel(self):
+        """Stops scheduling new work; finished ranges stay in the page store for a later resume."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def _report_progress(self, done, total):
+        if self.progress_callback and total:
+            self.progress_callback(int((done / total) * 100))
+
+    def _path(self, pdf_file):
+        return os.path.join(self.folder_path, pdf_file)
+
+    def _open_journal(self):
+        settings = {
+            "mode": self.mode,
+            "adaptive": self.adaptive,
+            "chunk_options": self.chunk_options,
+            "version": EXTRACTOR_VERSION,
+        }
+        self.journal = BatchJournal(os.path.join(self.output_folder, JOURNAL_FILE_NAME), settings, self.resume)
+        if not self.cache_dir:
+            self.cache_dir = os.path.join(self.output_folder, STATE_DIR_NAME)
+            self.private_cache = True
+
+    def _skip_finished(self, pdf_files):
+        """Drops files the journal marks as finished from the same, unchanged source."""
+        remaining = []
+        skipped_pages = 0
+        for pdf_file in pdf_files:
+            try:
+                self.stamps[pdf_file] = source_stamp(self._path(pdf_file))
+            except OSError as e:
+                self._fail(pdf_file, e)
+                continue
+            if self.journal.is_done(pdf_file, self.stamps[pdf_file]) and os.path.exists(self._output_path(pdf_file)):
+                self.skipped.append(pdf_file)
+                skipped_pages += self.journal.done_files[pdf_file]["pages"]
+            else:
+                remaining.append(pdf_file)
+        return remaining, skipped_pages
+
+    def run(self, pdf_files=None):
+        from tqdm import tqdm  # Console progress for batch processing
+        if pdf_files is None:
+            pdf_files = list_pdf_files(self.folder_path)
+        skipped_pages = 0
+        if self.use_journal:
+            self._open_journal()
+            pdf_files, skipped_pages = self._skip_finished(pdf_files)
+        if self.cache_dir:
+            self.cache = open_cache(self.cache_dir, self.cache_max_bytes)
+        # "spawn" keeps the children independent of the (threaded) parent process.
+        context = multiprocessing.get_context("spawn")
+        self.writers = {}   # pdf file -> OrderedPageWriter of a file in progress
+        pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        try:
+            keys, page_counts, cached_pages = self._plan_documents(pool, pdf_files)
+            self.page_counts = page_counts
+            total_pages = sum(page_counts.values()) + skipped_pages
+            tasks = []          # (pdf file, start, end) in scheduling order
+            cached_only = []    # files served entirely from the cache
+            remaining = {}      # pdf file -> number of ranges not yet finished
+            pages_done = skipped_pages
+            for pdf_file, n_pages in page_counts.items():
+                done = cached_pages.get(pdf_file, set())
+                pages_done += len(done)
+                self.pages_from_cache += len(done)
+                ranges = plan_missing_ranges(n_pages, done, self.pages_per_task)
+                if ranges:
+                    remaining[pdf_file] = len(ranges)
+                    tasks.extend((pdf_file, start, end) for start, end in ranges)
+                else:
+                    cached_only.append(pdf_file)
+            self._report_progress(pages_done, total_pages)
+
+            task_iter = iter(tasks)
+            pending = {}    # future -> (pdf file, start, end)
+
+            def submit_next():
+                if self.cancelled:
+                    return
+                for pdf_file, start, end in task_iter:
+                    if pdf_file in self.errors:
+                        continue
+                    if pdf_file not in self.writers:
+                        try:
+                            self.writers[pdf_file] = self._open_writer(
+                                pdf_file, page_counts[pdf_file], keys.get(pdf_file), cached_pages.get(pdf_file, ())
+                            )
+                        except Exception as e:
+                            self._fail(pdf_file, e)
+                            continue
+                    future = pool.submit(
+                        extract_page_range, self._path(pdf_file), self.mode, start, end, self.adaptive
+                    )
+                    pending[future] = (pdf_file, start, end)
+                    return
+
+            for _ in range(self.max_in_flight):
+                submit_next()
+            # Fully cached files are written while the pool works on the rest.
+            for pdf_file in cached_only:
+                if self.cancelled:
+                    break
+                try:
+                    self.writers[pdf_file] = self._open_writer(
+                        pdf_file, page_counts[pdf_file], keys.get(pdf_file), cached_pages.get(pdf_file, ())
+                    )
+                    self.writers[pdf_file].drain()
+                    self._note_first_page(self.writers[pdf_file])
+                    self._close_writer(pdf_file, self.writers.pop(pdf_file))
+                except Exception as e:
+                    self._fail(pdf_file, e)
+
+            with tqdm(total=total_pages, initial=pages_done, desc="Batch Processing", unit="page") as bar:
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        pdf_file, start, end = pending.pop(future)
+                        pages_done += end - start
+                        bar.update(end - start)
+                        self._report_progress(pages_done, total_pages)
+                        self._handle_result(pdf_file, start, end, future, keys.get(pdf_file), remaining)
+                        submit_next()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Unfinished files keep their finished ranges in the page store for a resume.
+            for pdf_file in list(self.writers):
+                self._discard_writer(pdf_file)
+            if self.cache:
+                self.cache.close()
+            if self.journal:
+                self.journal.close()
+                self.error_report = write_error_report(self.output_folder, self.errors)
+        return self.errors
+
+    def _fail(self, pdf_file, error):
+        self.errors[pdf_file] = str(error)
+        self._discard_writer(pdf_file)
+        if self.journal:
+            self.journal.file_failed(pdf_file, str(error))
+
+    def _handle_result(self, pdf_file, start, end, future, key, remaining):
+        if pdf_file in self.errors:
+            return
+        try:
+            records = future.result()
+            if key is not None:
+                self.cache.put_pages(key, start, records)
+            self.writers[pdf_file].add(start, records)
+            self._note_first_page(self.writers[pdf_file])
+            remaining[pdf_file] -= 1
+            if remaining[pdf_file] == 0:
+                self._close_writer(pdf_file, self.writers.pop(pdf_file))
+        except Exception as e:
+            self._fail(pdf_file, e)
+
+    def _note_first_page(self, writer):
+        if self.first_page_time is None and writer.next_page:
+            self.first_page_time = time.perf_counter()
+
+    def _map(self, pool, fn, pdf_files):
+        """Runs fn(path) for each file on the pool; failures are recorded per file."""
+        futures = {pool.submit(fn, self._path(pdf_file)): pdf_file for pdf_file in pdf_files}
+        values = {}
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            try:
+                values[pdf_file] = future.result()
+            except Exception as e:
+                self._fail(pdf_file, e)
+        # Keep the original folder order for scheduling.
+        return {f: values[f] for f in pdf_files if f in values}
+
+    def _plan_documents(self, pool, pdf_files):
+        keys = {}           # pdf file -> cache key
+        page_counts = {}    # pdf file -> number of pages
+        cached_pages = {}   # pdf file -> indices of pages already in the cache
+        if self.cache or self.chunk_options is not None:
+            self.digests = self._map(pool, file_digest, pdf_files)
+        if self.cache:
+            for pdf_file, digest in self.digests.items():
+                key = self.cache.open_document(digest, cache_mode(self.mode, self.adaptive), EXTRACTOR_VERSION)
+                self.cache.pinned.add(key)
+                keys[pdf_file] = key
+                cached_pages[pdf_file] = self.cache.cached_page_indices(key)
+                n_pages = self.cache.page_count(key)
+                if n_pages is not None:
+                    page_counts[pdf_file] = n_pages
+        to_count = [f for f in pdf_files if f not in page_counts and f not in self.errors]
+        for pdf_file, n_pages in self._map(pool, count_pages, to_count).items():
+            page_counts[pdf_file] = n_pages
+            if pdf_file in keys:
+                self.cache.set_page_count(keys[pdf_file], n_pages)
+        return keys, {f: page_counts[f] for f in pdf_files if f in page_counts}, cached_pages
+
+    def _output_path(self, pdf_file):
+        # Save output using the same base name as the PDF (with .txt extension)
+        return os.path.join(self.output_folder, os.path.splitext(pdf_file)[0] + ".txt")
+
+    def _open_writer(self, pdf_file, n_pages, key, cached_pages):
+        self.file_times[pdf_file] = [time.perf_counter(), None]
+        output_path = self._output_path(pdf_file)
+        # Files given relative to a subfolder keep that layout in the output folder.
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        outputs = [TextOutput(output_path)]
+        if self.chunk_options is not None:
+            chunker = PageChunker(self.digests[pdf_file], source=pdf_file, **self.chunk_options)
+            outputs.append(ChunkOutput(os.path.splitext(output_path)[0] + ".jsonl", chunker))
+        return OrderedPageWriter(TeeOutput(*outputs), n_pages, self.cache, key, cached_pages)
+
+    def _close_writer(self, pdf_file, writer):
+        writer.output.close()
+        self.tables_skipped += writer.tables_skipped
+        self.file_times[pdf_file][1] = time.perf_counter()
+        if writer.key is not None:
+            self.cache.pinned.discard(writer.key)
+        if self.journal:
+            self.journal.file_done(pdf_file, self.stamps[pdf_file], writer.n_pages)
+            if self.private_cache and writer.key is not None:
+                # The private page store only exists for resuming; the output is final now.
+                self.cache.invalidate(key=writer.key)
+
+    def _discard_writer(self, pdf_file):
+        writer = self.writers.pop(pdf_file, None)
+        if writer is None:
+            return
+        # A partial output file is worse than none.
+        writer.output.discard()
+        if writer.key is not None:
+            self.cache.pinned.discard(writer.key)
+
+
+def format_errors(errors):
+    lines = [f"Failed to process {len(errors)} file(s):"]
+    lines.extend(f"{pdf_file}: {message}" for pdf_file, message in sorted(errors.items()))
+    return "\n".join(lines)
@@ -0,0 +1,101 @@
+# pdf_journal.py
+
+import json
+import os
+import time
+
+JOURNAL_FILE_NAME = ".pdf_to_text.journal"
+STATE_DIR_NAME = ".pdf_to_text_state"       # Page store used for resuming when no cache is configured.
+ERROR_REPORT_NAME = "pdf_to_text_errors.json"
+
+
+def source_stamp(path):
+    """Cheap change detector for a source PDF (size and modification time)."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BatchJournal:
+    """
+    Append-only JSON Lines journal of a batch extraction, kept in the output
+    folder. It records finished files (with the source stamp they were
+    extracted from) and failures. Every entry is flushed as it is written, so a
+    crashed or closed run leaves a usable journal behind. Pages of unfinished
+    files are resumed from the page store, which also holds their content.
+
+    The first line holds the batch settings; a journal written with other
+    settings is discarded instead of resumed.
+    """
+
+    def __init__(self, path, settings, resume=True):
+        self.path = path
+        self.settings = settings
+        self.done_files = {}    # pdf file -> {"stamp", "pages"}
+        self.failed = {}        # pdf file -> error message of the previous run
+        if resume and os.path.exists(path):
+            self._load()
+        else:
+            self._reset()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get("settings") != self.settings:
+            self._reset()
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue    # A torn last line from an interrupted write.
+            pdf_file = entry.get("file")
+            event = entry.get("event")
+            if event == "file":
+                self.done_files[pdf_file] = {"stamp": entry["stamp"], "pages": entry["pages"]}
+                self.failed.pop(pdf_file, None)
+            elif event == "failed":
+                self.failed[pdf_file] = entry["error"]
+                self.done_files.pop(pdf_file, None)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _reset(self):
+        self.file = open(self.path, "w", encoding="utf-8")
+        self._append({"settings": self.settings, "created": time.time()})
+
+    def _append(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def is_done(self, pdf_file, stamp):
+        done = self.done_files.get(pdf_file)
+        return done is not None and done["stamp"] == stamp
+
+    def file_done(self, pdf_file, stamp, n_pages):
+        self.done_files[pdf_file] = {"stamp": stamp, "pages": n_pages}
+        self._append({"event": "file", "file": pdf_file, "stamp": stamp, "pages": n_pages})
+        os.fsync(self.file.fileno())
+
+    def file_failed(self, pdf_file, error):
+        self.done_files.pop(pdf_file, None)
+        self._append({"event": "failed", "file": pdf_file, "error": error})
+
+    def close(self):
+        self.file.close()
+
+
+def write_error_report(output_folder, errors):
+    """Writes (or removes, when there are none) the per-file error report of a batch."""
+    path = os.path.join(output_folder, ERROR_REPORT_NAME)
+    if not errors:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    report = [{"file": pdf_file, "error": message} for pdf_file, message in sorted(errors.items())]
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".part", path)
+    return path
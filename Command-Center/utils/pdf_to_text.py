@@ -1,53 +1,82 @@
-import sys, os
+import sys, os, shutil, tempfile
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget,
-    QProgressBar, QFileDialog, QMessageBox, QTextEdit, QComboBox, QHBoxLayout
+    QProgressBar, QFileDialog, QMessageBox, QTextEdit, QComboBox, QHBoxLayout, QSpinBox,
+    QCheckBox
 )
 from PySide6.QtCore import QThread, Signal
-import pdfplumber
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES
+from utils.pdf_cache import file_digest
+from utils.pdf_chunking import ChunkOutput, PageChunker
+from utils.pdf_extraction import (
+    BatchExtractor, PreviewOutput, TeeOutput, TextOutput, default_worker_count, format_errors,
+    iter_page_records, list_pdf_files, open_cache
+)
+
+PREVIEW_MAX_CHARS = 200_000     # The preview widget never holds more than this; saving uses the full output.
 
 # -------------------------
 # Worker for Single PDF Extraction
 # -------------------------
 class SingleExtractionWorker(QThread):
-    finished = Signal(str)      # Emitted when extraction is complete; returns the content string.
+    finished = Signal(str)      # Emitted when extraction is complete; returns the (bounded) preview string.
     progress = Signal(int)      # Emits progress percentage (0-100).
     error = Signal(str)         # Emits error messages.
     
-    def __init__(self, pdf_path, mode):
+    def __init__(self, pdf_path, mode, cache_dir=None, preview_chars=PREVIEW_MAX_CHARS, chunk_options=None,
+                 adaptive=False):
         super().__init__()
         self.pdf_path = pdf_path
         self.mode = mode  # Expected values: "Text Only", "Tables Only", "Both"
+        self.adaptive = adaptive  # Skip table detection on pages without ruling lines.
+        self.tables_skipped = 0
+        self.cache_dir = cache_dir  # Extraction cache location; None disables caching.
+        self.preview_chars = preview_chars
+        self.chunk_options = chunk_options  # PageChunker arguments; None disables chunk export.
+        self.output_path = None     # Spool file holding the complete output once finished.
+        self.chunks_path = None     # Spool file holding the JSONL chunks, if enabled.
+        self.preview_truncated = False
     
     def run(self):
+        cache = None
         try:
             from tqdm import tqdm  # Console progress
-            content = ""
-            with pdfplumber.open(self.pdf_path) as pdf:
-                n_pages = len(pdf.pages)
+            cache = open_cache(self.cache_dir, PDF_CACHE_MAX_BYTES) if self.cache_dir else None
+            digest = file_digest(self.pdf_path) if cache or self.chunk_options is not None else None
+            fd, self.output_path = tempfile.mkstemp(prefix="pdf_to_text_", suffix=".txt")
+            os.close(fd)
+            preview = PreviewOutput(self.preview_chars)
+            outputs = [TextOutput(self.output_path), preview]
+            if self.chunk_options is not None:
+                fd, self.chunks_path = tempfile.mkstemp(prefix="pdf_to_text_", suffix=".jsonl")
+                os.close(fd)
+                chunker = PageChunker(digest, source=os.path.basename(self.pdf_path), **self.chunk_options)
+                outputs.append(ChunkOutput(self.chunks_path, chunker))
+            output = TeeOutput(*outputs)
+            pages = iter_page_records(self.pdf_path, self.mode, cache, digest, self.adaptive)
+            try:
                 # Iterate with tqdm for console progress
-                for i, page in enumerate(tqdm(pdf.pages, total=n_pages, desc="Extracting pages")):
-                    # Extract text if mode is Text Only or Both
-                    if self.mode in ("Text Only", "Both"):
-                        page_text = page.extract_text()
-                        if page_text:
-                            content += f"--- Page {i+1} Text ---\n{page_text}\n"
-                    # Extract tables if mode is Tables Only or Both
-                    if self.mode in ("Tables Only", "Both"):
-                        tables = page.extract_tables()
-                        if tables:
-                            for j, table in enumerate(tables):
-                                content += f"Page {i+1} - Table {j+1}:\n"
-                                for row in table:
-                                    # Join row items with comma
-                                    row_str = ",".join([str(cell) if cell is not None else "" for cell in row])
-                                    content += row_str + "\n"
-                                content += "\n"
+                for i, (n_pages, record) in enumerate(tqdm(pages, desc="Extracting pages", unit="page")):
+                    output.write(record)
+                    self.tables_skipped += bool(record.get("tables_skipped"))
                     progress_value = int(((i + 1) / n_pages) * 100)
                     self.progress.emit(progress_value)
-            self.finished.emit(content)
+            finally:
+                output.close()
+            self.preview_truncated = preview.truncated
+            self.finished.emit(preview.text())
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            if cache:
+                cache.close()
+    
+    def discard_output(self):
+        for path in (self.output_path, self.chunks_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+        self.output_path = None
+        self.chunks_path = None
 
 # -------------------------
 # Worker for Batch PDF Extraction
@@ -57,46 +86,41 @@ class BatchExtractionWorker(QThread):
     finished = Signal()         # Emitted when batch processing is complete.
     error = Signal(str)         # Emits error messages.
     
-    def __init__(self, folder_path, mode, output_folder):
+    def __init__(self, folder_path, mode, output_folder, max_workers=None, cache_dir=None, chunk_options=None,
+                 resume=True, adaptive=False):
         super().__init__()
         self.folder_path = folder_path
         self.mode = mode            # "Text Only", "Tables Only", or "Both"
         self.output_folder = output_folder
+        self.max_workers = max_workers or default_worker_count()
+        self.cache_dir = cache_dir  # Extraction cache location; None disables caching.
+        self.chunk_options = chunk_options  # PageChunker arguments; None disables chunk export.
+        self.resume = resume        # Continue from the journal of an earlier, interrupted run.
+        self.adaptive = adaptive    # Skip table detection on pages without ruling lines.
+        self.extractor = None
+    
+    def cancel(self):
+        if self.extractor:
+            self.extractor.cancel()
     
     def run(self):
         try:
-            from tqdm import tqdm  # Console progress for batch processing
-            pdf_files = [f for f in os.listdir(self.folder_path) if f.lower().endswith('.pdf')]
-            total_files = len(pdf_files)
-            if total_files == 0:
+            pdf_files = list_pdf_files(self.folder_path)
+            if not pdf_files:
                 self.error.emit("No PDF files found in the selected folder.")
                 return
-            for idx, pdf_file in enumerate(tqdm(pdf_files, total=total_files, desc="Batch Processing")):
-                pdf_path = os.path.join(self.folder_path, pdf_file)
-                content = ""
-                with pdfplumber.open(pdf_path) as pdf:
-                    n_pages = len(pdf.pages)
-                    for i, page in enumerate(pdf.pages):
-                        if self.mode in ("Text Only", "Both"):
-                            page_text = page.extract_text()
-                            if page_text:
-                                content += f"--- Page {i+1} Text ---\n{page_text}\n"
-                        if self.mode in ("Tables Only", "Both"):
-                            tables = page.extract_tables()
-                            if tables:
-                                for j, table in enumerate(tables):
-                                    content += f"Page {i+1} - Table {j+1}:\n"
-                                    for row in table:
-                                        row_str = ",".join([str(cell) if cell is not None else "" for cell in row])
-                                        content += row_str + "\n"
-                                    content += "\n"
-                # Save output using the same base name as the PDF (with .txt extension)
-                output_file_name = os.path.splitext(pdf_file)[0] + ".txt"
-                output_path = os.path.join(self.output_folder, output_file_name)
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                progress_value = int(((idx + 1) / total_files) * 100)
-                self.progress.emit(progress_value)
+            self.extractor = BatchExtractor(
+                self.folder_path, self.mode, self.output_folder,
+                max_workers=self.max_workers, progress_callback=self.progress.emit,
+                cache_dir=self.cache_dir, cache_max_bytes=PDF_CACHE_MAX_BYTES,
+                chunk_options=self.chunk_options, journal=True, resume=self.resume, adaptive=self.adaptive
+            )
+            errors = self.extractor.run(pdf_files)
+            if self.extractor.cancelled:
+                return
+            if errors:
+                # One combined report instead of a dialog per failed file.
+                self.error.emit(format_errors(errors) + f"\n\nError report: {self.extractor.error_report}")
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
@@ -128,6 +152,39 @@ class PDFConverterWindow(QMainWindow):
         mode_layout.addWidget(self.mode_combo)
         layout.addLayout(mode_layout)
         
+        # Adaptive mode: only run the (slow) table extractor on pages with ruling lines
+        self.adaptive_check = QCheckBox("Adaptive table detection (skip pages without ruling lines)")
+        layout.addWidget(self.adaptive_check)
+        
+        # Number of worker processes used for batch extraction
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Batch Workers:")
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(default_worker_count())
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        layout.addLayout(workers_layout)
+        
+        # Persistent extraction cache: unchanged PDFs are not parsed again
+        cache_layout = QHBoxLayout()
+        self.cache_check = QCheckBox("Use extraction cache")
+        self.cache_check.setChecked(True)
+        self.clear_cache_btn = QPushButton("Clear Cache")
+        self.clear_cache_btn.clicked.connect(self.clear_cache)
+        cache_layout.addWidget(self.cache_check)
+        cache_layout.addWidget(self.clear_cache_btn)
+        layout.addLayout(cache_layout)
+        
+        # Journaled batches: continue an interrupted batch instead of starting over
+        self.resume_check = QCheckBox("Resume interrupted batch")
+        self.resume_check.setChecked(True)
+        layout.addWidget(self.resume_check)
+        
+        # RAG export: chunk the output into JSONL while extracting
+        self.chunks_check = QCheckBox("Export RAG chunks (JSONL)")
+        layout.addWidget(self.chunks_check)
+        
         # Buttons for Single PDF and Batch Processing
         button_layout = QHBoxLayout()
         self.single_btn = QPushButton("Convert Single PDF")
@@ -152,34 +209,64 @@ class PDFConverterWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
     
+    # ----- Extraction Cache -----
+    def cache_dir(self):
+        return PDF_CACHE_DIR if self.cache_check.isChecked() else None
+    
+    def clear_cache(self):
+        try:
+            cache = open_cache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
+            cache.clear()
+            cache.close()
+            QMessageBox.information(self, "Cache Cleared", "The extraction cache has been cleared.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to clear cache:\n{e}")
+    
+    def chunk_options(self):
+        return {} if self.chunks_check.isChecked() else None
+    
     # ----- Single PDF Conversion -----
     def select_single_pdf(self):
         pdf_path, _ = QFileDialog.getOpenFileName(self, "Select PDF File", "", "PDF Files (*.pdf)")
         if pdf_path:
+            if self.single_worker:
+                self.single_worker.discard_output()
             self.preview.clear()
             self.progress_bar.setValue(0)
             mode = self.mode_combo.currentText()
-            self.single_worker = SingleExtractionWorker(pdf_path, mode)
+            self.single_worker = SingleExtractionWorker(
+                pdf_path, mode, cache_dir=self.cache_dir(), chunk_options=self.chunk_options(),
+                adaptive=self.adaptive_check.isChecked()
+            )
             self.single_worker.progress.connect(self.progress_bar.setValue)
             self.single_worker.finished.connect(self.on_single_finished)
             self.single_worker.error.connect(self.on_error)
             self.single_worker.start()
     
-    def on_single_finished(self, content):
+    def on_single_finished(self, preview):
         # Display the extracted content in the preview area
-        self.preview.setPlainText(content)
+        if self.single_worker.preview_truncated:
+            preview += "\n[Preview truncated - save the result to get the complete output.]\n"
+        self.preview.setPlainText(preview)
         # Ask user if they wish to save the content
+        message = "Extraction complete."
+        if self.single_worker.adaptive:
+            message += f" Table detection was skipped on {self.single_worker.tables_skipped} pages."
         save_choice = QMessageBox.question(
-            self, "Save Output", "Extraction complete. Would you like to save the result?",
+            self, "Save Output", f"{message} Would you like to save the result?",
             QMessageBox.Yes | QMessageBox.No
         )
         if save_choice == QMessageBox.Yes:
             output_path, _ = QFileDialog.getSaveFileName(self, "Save Output As", "", "Text Files (*.txt)")
             if output_path:
                 try:
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        f.write(content)
-                    QMessageBox.information(self, "Saved", f"Output saved to:\n{output_path}")
+                    shutil.copyfile(self.single_worker.output_path, output_path)
+                    saved = output_path
+                    if self.single_worker.chunks_path:
+                        chunks_path = os.path.splitext(output_path)[0] + ".jsonl"
+                        shutil.copyfile(self.single_worker.chunks_path, chunks_path)
+                        saved += f"\n{chunks_path}"
+                    QMessageBox.information(self, "Saved", f"Output saved to:\n{saved}")
                 except Exception as e:
                     QMessageBox.critical(self, "Error", f"Failed to save file:\n{e}")
     
@@ -193,14 +280,31 @@ class PDFConverterWindow(QMainWindow):
                 return
             self.progress_bar.setValue(0)
             mode = self.mode_combo.currentText()
-            self.batch_worker = BatchExtractionWorker(folder_path, mode, output_folder)
+            self.batch_worker = BatchExtractionWorker(
+                folder_path, mode, output_folder, max_workers=self.workers_spin.value(),
+                cache_dir=self.cache_dir(), chunk_options=self.chunk_options(),
+                resume=self.resume_check.isChecked(), adaptive=self.adaptive_check.isChecked()
+            )
             self.batch_worker.progress.connect(self.progress_bar.setValue)
             self.batch_worker.finished.connect(self.on_batch_finished)
             self.batch_worker.error.connect(self.on_error)
             self.batch_worker.start()
     
     def on_batch_finished(self):
-        QMessageBox.information(self, "Batch Completed", "All PDFs in the folder have been processed.")
+        message = "All PDFs in the folder have been processed."
+        if self.batch_worker.adaptive:
+            skipped = self.batch_worker.extractor.tables_skipped
+            message += f"\nTable detection was skipped on {skipped} pages without ruling lines."
+        QMessageBox.information(self, "Batch Completed", message)
+    
+    def closeEvent(self, event):
+        if self.batch_worker and self.batch_worker.isRunning():
+            # Let in-flight ranges land in the journal so the batch can be resumed.
+            self.batch_worker.cancel()
+            self.batch_worker.wait()
+        if self.single_worker:
+            self.single_worker.discard_output()
+        super().closeEvent(event)
     
     # ----- Error Handling -----
     def on_error(self, error_message):
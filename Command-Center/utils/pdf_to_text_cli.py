@@ -0,0 +1,112 @@
+# pdf_to_text_cli.py
+#
+# Headless front end for the PDF batch extractor. It drives the same
+# BatchExtractor as the "Batch Process Folder" button but never imports
+# PySide6, so it runs on servers and from cron:
+#
+#   python -m utils.pdf_to_text_cli "manuals/**/*.pdf" -o extracted --workers 8
+
+import argparse
+import glob
+import os
+import sys
+import time
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES
+from utils.pdf_chunking import CHUNK_UNITS, DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_UNIT
+from utils.pdf_extraction import (
+    DEFAULT_PAGES_PER_TASK, EXTRACTION_MODES, BatchExtractor, default_worker_count, format_errors
+)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def resolve_inputs(patterns):
+    """Expands the input globs and returns (common root folder, paths relative to it)."""
+    paths = sorted({
+        os.path.abspath(path)
+        for pattern in patterns
+        for path in glob.glob(pattern, recursive=True)
+        if path.lower().endswith(".pdf") and os.path.isfile(path)
+    })
+    if not paths:
+        return None, []
+    root = os.path.commonpath(paths) if len(paths) > 1 else os.path.dirname(paths[0])
+    if os.path.isfile(root):
+        root = os.path.dirname(root)
+    return root, [os.path.relpath(path, root) for path in paths]
+
+
+def print_stats(extractor, root, elapsed):
+    finished = [f for f, (_, end) in extractor.file_times.items() if end is not None]
+    pages = sum(extractor.page_counts.get(f, 0) for f in finished)
+    megabytes = sum(os.path.getsize(os.path.join(root, f)) for f in finished) / (1024 * 1024)
+    durations = sorted(end - start for f, (start, end) in extractor.file_times.items() if end is not None)
+    print(f"Files: {len(finished)} extracted, {len(extractor.skipped)} already done, "
+          f"{len(extractor.errors)} failed")
+    print(f"Pages: {pages} ({extractor.pages_from_cache} from cache) in {elapsed:.2f}s")
+    if extractor.adaptive:
+        print(f"Table detection skipped on {extractor.tables_skipped} pages without ruling lines")
+    if elapsed > 0:
+        print(f"Throughput: {pages / elapsed:.1f} pages/s, {megabytes / elapsed:.2f} MB/s")
+    if durations:
+        print("Per-file time: p50 {:.3f}s  p90 {:.3f}s  p99 {:.3f}s  max {:.3f}s".format(
+            percentile(durations, 0.50), percentile(durations, 0.90),
+            percentile(durations, 0.99), durations[-1]
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text and tables from PDFs without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="PDF files or glob patterns (** is recursive)")
+    parser.add_argument("-o", "--output-dir", required=True, help="Folder for the extracted files")
+    parser.add_argument("-m", "--mode", choices=EXTRACTION_MODES, default="Both", help="Extraction mode")
+    parser.add_argument("-w", "--workers", type=int, default=default_worker_count(), help="Worker processes")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Only run table detection on pages that have ruling lines")
+    parser.add_argument("--pages-per-task", type=int, default=DEFAULT_PAGES_PER_TASK,
+                        help="Page range size used to split large files across workers")
+    parser.add_argument("--cache-dir", default=PDF_CACHE_DIR, help="Extraction cache folder")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the extraction cache")
+    parser.add_argument("--restart", action="store_true", help="Ignore the journal of an earlier run")
+    parser.add_argument("--chunks", action="store_true", help="Also write RAG chunks as .jsonl")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--chunk-unit", choices=CHUNK_UNITS, default=DEFAULT_CHUNK_UNIT)
+    args = parser.parse_args(argv)
+
+    root, pdf_files = resolve_inputs(args.inputs)
+    if not pdf_files:
+        print("No PDF files matched.", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+    chunk_options = None
+    if args.chunks:
+        chunk_options = {"size": args.chunk_size, "overlap": args.chunk_overlap, "unit": args.chunk_unit}
+
+    extractor = BatchExtractor(
+        root, args.mode, args.output_dir, max_workers=args.workers, pages_per_task=args.pages_per_task,
+        cache_dir=None if args.no_cache else args.cache_dir, cache_max_bytes=PDF_CACHE_MAX_BYTES,
+        chunk_options=chunk_options, journal=True, resume=not args.restart, adaptive=args.adaptive
+    )
+    started = time.perf_counter()
+    try:
+        errors = extractor.run(pdf_files)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the journal.", file=sys.stderr)
+        return 130
+    print_stats(extractor, root, time.perf_counter() - started)
+    if errors:
+        print(format_errors(errors), file=sys.stderr)
+        print(f"Error report: {extractor.error_report}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# rag_ingest.py
+
+import argparse
+import glob
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_RAG_URL = f"http://localhost:{os.environ.get('RAG_PORT', '8000')}"
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_IN_FLIGHT = 4
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class IngestError(Exception):
+    pass
+
+
+def iter_jsonl_chunks(paths):
+    """Streams chunk records from the .jsonl files written by pdf_to_text."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_batches(chunks, batch_size):
+    """Groups consecutive chunks of the same document into batches of at most batch_size."""
+    batch = []
+    for chunk in chunks:
+        if batch and (len(batch) >= batch_size or chunk["document_id"] != batch[0]["document_id"]):
+            yield batch
+            batch = []
+        batch.append(chunk)
+    if batch:
+        yield batch
+
+
+def batch_id(batch, per_chunk=False):
+    """Deterministic ID of a batch: chunk IDs are stable, so re-runs map to the same batches."""
+    first = batch[0]
+    if per_chunk:
+        return first["id"]
+    return f"{first['document_id'][:16]}-{first['chunk_index']:06d}-{len(batch)}"
+
+
+def page_label(batch):
+    """"p3" or "p3-5" for the pages a batch covers, "" without page information."""
+    pages = sorted({page for chunk in batch for page in chunk.get("pages") or ()})
+    if not pages:
+        return ""
+    return f"p{pages[0]}" if pages[0] == pages[-1] else f"p{pages[0]}-{pages[-1]}"
+
+
+# -------------------------
+# Keep-alive connection pool
+# -------------------------
+class ConnectionPool:
+    """A fixed set of persistent HTTP(S) connections shared by the upload threads."""
+
+    def __init__(self, base_url, size, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Sends a request on a pooled connection and returns (status, headers, body)."""
+        with self.slots:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self.idle.put(conn)
+            return response.status, dict(response.getheaders()), data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# -------------------------
+# Checkpoint
+# -------------------------
+class Checkpoint:
+    """Append-only record of uploaded batch IDs so an interrupted ingest can resume."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self.file = open(path, "a", encoding="utf-8") if path else None
+
+    def __contains__(self, item):
+        return item in self.done
+
+    def add(self, item):
+        with self.lock:
+            self.done.add(item)
+            if self.file:
+                self.file.write(item + "\n")
+                self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+# -------------------------
+# Ingest client
+# -------------------------
+class RagIngestClient:
+    """
+    Uploads chunk batches to the rag_api service (LibreChat/rag.yml).
+
+    Each batch becomes one POST /embed request: the chunk texts are sent as a
+    text file whose file_id is the deterministic batch ID, so re-ingesting an
+    unchanged corpus addresses the same documents. rag_api splits that file
+    again with its own CHUNK_SIZE, so chunk IDs and table boundaries do not
+    survive; only the page range is kept, in the file name. With `per_chunk`
+    every chunk is uploaded as its own file (file_id = chunk ID), which keeps
+    the boundaries as long as CHUNK_SIZE is at least the extraction chunk size,
+    at the cost of one request per chunk.
+
+    At most `max_in_flight` requests run at once, each on a keep-alive
+    connection from the pool. Connection errors and 408/429/5xx responses are
+    retried with exponential backoff (honouring Retry-After); other errors fail
+    the batch. Completed batches are appended to the checkpoint file.
+    """
+
+    def __init__(self, base_url=DEFAULT_RAG_URL, batch_size=DEFAULT_BATCH_SIZE,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_retries=5, backoff=0.5, max_backoff=30.0,
+                 timeout=120, auth_token=None, entity_id=None, checkpoint_path=None, endpoint="/embed",
+                 per_chunk=False):
+        self.batch_size = 1 if per_chunk else batch_size
+        self.per_chunk = per_chunk
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.auth_token = auth_token
+        self.entity_id = entity_id
+        self.endpoint = endpoint
+        self.pool = ConnectionPool(base_url, max_in_flight, timeout)
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.stats = {"batches": 0, "chunks": 0, "skipped": 0, "failed": 0, "retries": 0, "bytes": 0}
+        self.errors = {}    # batch ID -> error message
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.pool.close()
+        self.checkpoint.close()
+
+    def ingest_files(self, paths):
+        return self.ingest(iter_jsonl_chunks(paths))
+
+    def ingest(self, chunks):
+        """Uploads all chunks; returns the stats dictionary."""
+        started = time.perf_counter()
+        # Bounds the batches held in memory to those being uploaded plus one waiting per slot.
+        window = threading.BoundedSemaphore(self.max_in_flight * 2)
+
+        def upload(bid, batch):
+            try:
+                self._upload_with_retries(bid, batch)
+            finally:
+                window.release()
+
+        def check(bid, future):
+            # Anything _upload_with_retries does not handle itself (e.g. a malformed chunk) fails the batch.
+            error = future.exception()
+            if error is not None:
+                with self.lock:
+                    self.stats["failed"] += 1
+                    self.errors[bid] = f"{type(error).__name__}: {error}"
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for batch in iter_batches(chunks, self.batch_size):
+                bid = batch_id(batch, self.per_chunk)
+                if bid in self.checkpoint:
+                    self.stats["skipped"] += 1
+                    continue
+                window.acquire()
+                future = executor.submit(upload, bid, batch)
+                future.add_done_callback(lambda future, bid=bid: check(bid, future))
+        self.stats["elapsed"] = time.perf_counter() - started
+        return self.stats
+
+    def _upload_with_retries(self, bid, batch):
+        body, content_type = self._encode_batch(bid, batch)
+        headers = {"Content-Type": content_type, "Accept": "application/json"}
+        if self.auth_token:
+            headers["Authorization"] = f"Bearer {self.auth_token}"
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                status, response_headers, data = self.pool.request("POST", self.endpoint, body, headers)
+                if 200 <= status < 300:
+                    self.checkpoint.add(bid)
+                    with self.lock:
+                        self.stats["batches"] += 1
+                        self.stats["chunks"] += len(batch)
+                        self.stats["bytes"] += len(body)
+                    return
+                error = f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+                if status not in RETRY_STATUSES:
+                    break
+                retry_after = response_headers.get("Retry-After")
+            except (OSError, http.client.HTTPException) as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt < self.max_retries:
+                with self.lock:
+                    self.stats["retries"] += 1
+                time.sleep(self._delay(attempt, retry_after))
+        with self.lock:
+            self.stats["failed"] += 1
+            self.errors[bid] = error
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)    # Jitter so retries do not arrive in lockstep.
+
+    def _encode_batch(self, bid, batch):
+        boundary = uuid.uuid4().hex
+        source = batch[0].get("source") or batch[0]["document_id"]
+        fields = {"file_id": bid}
+        if self.entity_id:
+            fields["entity_id"] = self.entity_id
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            )
+        text = "\n\n".join(chunk["text"] for chunk in batch).encode("utf-8")
+        pages = page_label(batch)
+        filename = f"{os.path.splitext(source)[0]}.{pages + '.' if pages else ''}{batch[0]['chunk_index']:06d}.txt"
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: text/plain\r\n\r\n".encode("utf-8") + text + b"\r\n"
+        )
+        parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+        return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload pdf_to_text JSONL chunks to the rag_api service.")
+    parser.add_argument("inputs", nargs="+", help="JSONL files or glob patterns")
+    parser.add_argument("--url", default=DEFAULT_RAG_URL, help="rag_api base URL")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Chunks per request. They are uploaded as one text file that rag_api re-chunks, "
+                             "so chunk IDs and table boundaries are lost (the page range stays in the file name)")
+    parser.add_argument("--per-chunk", action="store_true",
+                        help="Upload every chunk as its own file (file_id = chunk ID) to keep chunk boundaries; "
+                             "ignores --batch-size")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Concurrent requests")
+    parser.add_argument("--retries", type=int, default=5, help="Retries per batch")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming an interrupted ingest")
+    parser.add_argument("--entity-id", help="entity_id sent with every upload")
+    parser.add_argument("--token", default=os.environ.get("RAG_API_TOKEN"), help="Bearer token (or RAG_API_TOKEN)")
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("No input files matched.")
+    client = RagIngestClient(
+        args.url, batch_size=args.batch_size, max_in_flight=args.max_in_flight, max_retries=args.retries,
+        auth_token=args.token, entity_id=args.entity_id, checkpoint_path=args.checkpoint, per_chunk=args.per_chunk
+    )
+    try:
+        stats = client.ingest_files(paths)
+    finally:
+        client.close()
+    rate = stats["chunks"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    print(f"Uploaded {stats['chunks']} chunks in {stats['batches']} batches "
+          f"({stats['skipped']} skipped, {stats['failed']} failed, {stats['retries']} retries) "
+          f"in {stats['elapsed']:.1f}s - {rate:.1f} chunks/s")
+    for bid, error in sorted(client.errors.items()):
+        print(f"Failed batch {bid}: {error}")
+    return 1 if client.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,15 @@
 import os
 import re
 import argparse
+import shutil
+import subprocess
 import sys
+import tempfile
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional; YAML files are then compared as a whole.
+    yaml = None
 
 """
 This script updates environment variables in a .env file with values from the local environment.
@@ -26,8 +34,38 @@ Usage:
 3. Run the script, specifying the input and output file paths.
    Example:
    python update_env.py input.env output.env
+
+Config sync (--sync):
+   Instead of "Docker Compose Down" + "Docker Compose Up" after every change, the sync
+   engine diffs the new .env / librechat.yaml / rag.yml / compose values against the ones
+   the services were last (re)started with, writes only files whose content changed,
+   maps the changed keys to the compose services that consume them and recreates just
+   those services (docker compose up -d --no-deps --force-recreate <services>).
+   Run from the LibreChat folder:
+
+   python utils/update_env.py input.env .env --sync --dry-run    # print the plan only
+   python utils/update_env.py input.env .env --sync              # write, restart, remember
+   python utils/update_env.py --sync --copy librechat.changed.yaml:librechat.yaml
+
+   Values are never printed, only key names.
 """
 
+# Compose stacks whose services can be restarted: name -> compose files (missing ones are skipped).
+COMPOSE_STACKS = {
+    'main': ['docker-compose.yml', 'docker-compose.override.yml'],
+    'rag': ['rag.yml'],
+}
+# Files whose values are diffed even when this run does not write them.
+WATCHED_FILES = ['.env', 'librechat.yaml', 'rag.yml', 'docker-compose.yml', 'docker-compose.override.yml']
+STATE_DIR = '.config_sync'  # Copies of the files as last applied, relative to the working directory.
+# Services that load the whole .env via env_file but only read some of it. Without an entry
+# here, any .env change restarts a service that loads the file.
+ENV_KEY_FILTERS = {
+    'rag_api': ('RAG_', 'EMBEDDINGS_', 'CHUNK_', 'COLLECTION_', 'POSTGRES_', 'DB_', 'VECTOR_DB_', 'ATLAS_',
+                'MONGO_VECTOR_', 'PDF_', 'OLLAMA_', 'OPENAI_', 'AZURE_', 'HF_', 'AWS_', 'GOOGLE_',
+                'JWT_SECRET', 'DEBUG_RAG_API', 'CONSOLE_JSON'),
+}
+
 def read_env_file(file_path):
     """Reads the .env file and returns the lines as a list."""
     with open(file_path, 'r') as file:
@@ -39,12 +77,36 @@ def write_env_file(file_path, lines):
     with open(file_path, 'w') as file:
         file.writelines(lines)
 
-def update_env_file_with_local_env(input_file_path, output_file_path):
+def write_if_changed(file_path, text):
+    """Atomically writes text unless the file already has exactly this content. Returns True if written."""
+    if read_text(file_path) == text:
+        return False
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.sync-')
+    try:
+        with os.fdopen(fd, 'w', newline='') as file:
+            file.write(text)
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+def read_text(file_path):
+    """File content, or None if the file does not exist."""
+    try:
+        with open(file_path, 'r', newline='') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+def render_env_lines(lines):
     """
-    Reads the input .env file, updates the variables set to GET_FROM_LOCAL_ENV
-    with values from the local environment, and writes the result to the output .env file.
+    Replaces GET_FROM_LOCAL_ENV values with the local environment.
+    Returns (updated lines, updated variables, missing variables).
     """
-    lines = read_env_file(input_file_path)
     updated_lines = []
     # Regex pattern to match lines ending with "GET_FROM_LOCAL_ENV"
     env_var_pattern = re.compile(r'^\s*([A-Z_]+)=GET_FROM_LOCAL_ENV\s*$')
@@ -65,30 +127,405 @@ def update_env_file_with_local_env(input_file_path, output_file_path):
                 missing_vars.append(key)
         else:
             updated_lines.append(line)
+    return updated_lines, updated_vars, missing_vars
 
+def report_missing(missing_vars):
     # Print warnings and exit if any required environment variables are missing
     if missing_vars:
         for var in missing_vars:
             print(f"Warning: {var} set to GET_FROM_LOCAL_ENV, could not find {var}, please set {var} in your local environment and run again.")
         sys.exit(1)
 
+def update_env_file_with_local_env(input_file_path, output_file_path):
+    """
+    Reads the input .env file, updates the variables set to GET_FROM_LOCAL_ENV
+    with values from the local environment, and writes the result to the output .env file.
+    The output file is left untouched when its content would not change.
+    """
+    lines = read_env_file(input_file_path)
+    updated_lines, updated_vars, missing_vars = render_env_lines(lines)
+    report_missing(missing_vars)
+
     # Write the updated lines to the output .env file
-    write_env_file(output_file_path, updated_lines)
+    written = write_if_changed(output_file_path, ''.join(updated_lines))
 
     # Print the list of updated variables
     if updated_vars:
         print("Updated the following variables:")
         for var in updated_vars:
             print(var)
-    
-    print(f"Processed {input_file_path} and wrote updates to {output_file_path}.")
+
+    if written:
+        print(f"Processed {input_file_path} and wrote updates to {output_file_path}.")
+    else:
+        print(f"Processed {input_file_path}; {output_file_path} is already up to date.")
+
+# -------------------------
+# Parsing and diffing
+# -------------------------
+def parse_env(text):
+    """KEY=VALUE pairs of a .env file (comments and blank lines ignored)."""
+    values = {}
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        key = key.strip()
+        if key.startswith('export '):
+            key = key[len('export '):].strip()
+        values[key] = value.strip()
+    return values
+
+def flatten(value, prefix=''):
+    """Nested YAML data as {'a.b[0].c': leaf}."""
+    items = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            items.update(flatten(child, f'{prefix}.{key}' if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            items.update(flatten(child, f'{prefix}[{index}]'))
+    else:
+        items[prefix] = value
+    return items
+
+def parse_values(name, text):
+    """Comparable key -> value map of a watched file; YAML without PyYAML is one opaque value."""
+    if text is None:
+        return {}
+    if name.endswith('.env') or os.path.basename(name).startswith('.env'):
+        return parse_env(text)
+    if yaml is not None:
+        try:
+            return flatten(yaml.safe_load(text) or {})
+        except yaml.YAMLError:
+            pass
+    if is_compose_file(name):
+        return {f'services.{service}': block for service, block in service_blocks(text).items()}
+    return {'': text}
+
+def diff_values(old, new):
+    """Sorted keys whose value was added, removed or changed."""
+    return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+
+def is_compose_file(name):
+    return any(name in files for files in COMPOSE_STACKS.values())
+
+# -------------------------
+# Compose services and what they consume
+# -------------------------
+def service_blocks(text):
+    """Raw text of each service under the top-level services: key (works without PyYAML)."""
+    blocks = {}
+    in_services = False
+    indent = None
+    current = None
+    for line in (text or '').splitlines():
+        if not line.strip() or line.lstrip().startswith('#'):
+            if current:
+                blocks[current].append(line)
+            continue
+        stripped = line.lstrip(' ')
+        depth = len(line) - len(stripped)
+        if depth == 0:
+            in_services = stripped.rstrip().startswith('services:')
+            current = None
+            continue
+        if not in_services:
+            continue
+        if indent is None:
+            indent = depth
+        if depth == indent and stripped.rstrip().endswith(':'):
+            current = stripped.rstrip()[:-1].strip('\'"')
+            blocks[current] = []
+        elif current:
+            blocks[current].append(line)
+    return {service: '\n'.join(lines) for service, lines in blocks.items()}
+
+ENV_REFERENCE = re.compile(r'\$\{?([A-Za-z_][A-Za-z0-9_]*)')
+
+def service_consumers(workdir):
+    """
+    For each (stack, service): which .env keys and which mounted files it consumes.
+    Returns {(stack, service): {'env_all': bool, 'env_vars': set, 'files': set}}.
+    """
+    consumers = {}
+    for stack, files in COMPOSE_STACKS.items():
+        for compose_file in files:
+            text = read_text(os.path.join(workdir, compose_file))
+            for service, block in service_blocks(text).items():
+                entry = consumers.setdefault((stack, service), {'env_all': False, 'env_vars': set(), 'files': set()})
+                # ${VAR} interpolation reads the .env in the project folder.
+                entry['env_vars'].update(ENV_REFERENCE.findall(block))
+                for name in WATCHED_FILES:
+                    if name == '.env':
+                        # env_file: .env, or the file bind-mounted into the container.
+                        if re.search(r'(^|[\s\-:/])\.env\s*$', block, re.MULTILINE) or './.env' in block:
+                            entry['env_all'] = True
+                    elif not is_compose_file(name) and re.search(r'\./' + re.escape(name) + r'\b', block):
+                        entry['files'].add(name)
+    return consumers
+
+def env_key_consumed(service, key, entry):
+    if key in entry['env_vars']:
+        return True
+    if not entry['env_all']:
+        return False
+    prefixes = ENV_KEY_FILTERS.get(service)
+    return prefixes is None or key.startswith(prefixes)
+
+def affected_services(changes, consumers):
+    """
+    Maps {file: [changed keys]} to {(stack, service): [reasons]}.
+    """
+    affected = {}
+    for name, keys in changes.items():
+        for key in keys:
+            if is_compose_file(name):
+                # services.<name>... changed: that service's definition changed.
+                match = re.match(r'services\.([^.\[]+)', key)
+                targets = [(stack, match.group(1)) for stack, files in COMPOSE_STACKS.items()
+                           if name in files] if match else []
+                if not match and key:
+                    # volumes:, networks: or the whole file without PyYAML.
+                    targets = [(stack, service) for (stack, service) in consumers
+                               if name in COMPOSE_STACKS[stack]]
+                for target in targets:
+                    if target in consumers:
+                        affected.setdefault(target, []).append(f'{name} {key}')
+            elif name == '.env':
+                for (stack, service), entry in consumers.items():
+                    if env_key_consumed(service, key, entry):
+                        affected.setdefault((stack, service), []).append(f'.env {key}')
+            else:
+                for target, entry in consumers.items():
+                    if name in entry['files']:
+                        affected.setdefault(target, []).append(f'{name} {key}'.rstrip())
+    return affected
+
+# -------------------------
+# Sync engine
+# -------------------------
+def build_plan(workdir, env_template=None, env_output='.env', copies=(), state_dir=STATE_DIR):
+    """
+    Collects new file contents and diffs every watched file against its last applied copy
+    (or, on the first run, against the file on disk). Returns a plan dict.
+    """
+    new_contents = {}
+    if env_template:
+        # Like the copies and the output, the template is relative to the working directory.
+        updated_lines, _, missing_vars = render_env_lines(read_env_file(os.path.join(workdir, env_template)))
+        report_missing(missing_vars)
+        new_contents[env_output] = ''.join(updated_lines)
+    for source, target in copies:
+        text = read_text(os.path.join(workdir, source))
+        if text is None:
+            raise FileNotFoundError(os.path.join(workdir, source))
+        new_contents[target] = text
+
+    names = list(dict.fromkeys(WATCHED_FILES + list(new_contents)))
+    writes = []
+    changes = {}
+    for name in names:
+        path = os.path.join(workdir, name)
+        current = read_text(path)
+        new = new_contents.get(name, current)
+        if new is not None and new != current:
+            writes.append(name)
+        applied = read_text(os.path.join(workdir, state_dir, name))
+        old = applied if applied is not None else current
+        keys = diff_values(parse_values(name, old), parse_values(name, new))
+        if keys:
+            changes[name] = keys
+
+    consumers = service_consumers_after(workdir, new_contents)
+    affected = affected_services(changes, consumers)
+    skipped = split_not_recreated(workdir, affected)
+    return {'workdir': workdir, 'writes': writes, 'contents': new_contents, 'changes': changes,
+            'affected': affected, 'skipped': skipped, 'state_dir': state_dir, 'files': names}
+
+def service_consumers_after(workdir, new_contents):
+    """service_consumers() as it will be once new compose files are written."""
+    if not any(is_compose_file(name) for name in new_contents):
+        return service_consumers(workdir)
+    with tempfile.TemporaryDirectory() as preview:
+        for files in COMPOSE_STACKS.values():
+            for name in files:
+                text = new_contents.get(name, read_text(os.path.join(workdir, name)))
+                if text is not None:
+                    with open(os.path.join(preview, name), 'w') as file:
+                        file.write(text)
+        return service_consumers(preview)
+
+def compose_command(workdir, stack, contents=()):
+    """`docker compose -f ...` for the stack's files that exist or are about to be written (`contents`)."""
+    command = ['docker', 'compose']
+    for name in COMPOSE_STACKS[stack]:
+        if name in contents or os.path.exists(os.path.join(workdir, name)):
+            command += ['-f', name]
+    return command
+
+def running_owners(workdir):
+    """
+    {service: stack} of the running containers started from this folder, or None if docker
+    cannot tell. docker-compose.yml and rag.yml both define rag_api, so the compose labels
+    decide which definition the running container came from.
+    """
+    label_format = '{{.Label "com.docker.compose.service"}}|{{.Label "com.docker.compose.project.config_files"}}' \
+                   '|{{.Label "com.docker.compose.project.working_dir"}}'
+    try:
+        completed = subprocess.run(['docker', 'ps', '--filter', 'label=com.docker.compose.service',
+                                    '--format', label_format], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if completed.returncode != 0:
+        return None
+    owners = {}
+    for line in completed.stdout.splitlines():
+        parts = line.strip().split('|')
+        if len(parts) != 3 or not parts[0]:
+            continue
+        service, config_files, working_dir = parts
+        if working_dir and os.path.normcase(os.path.normpath(working_dir)) != os.path.normcase(workdir):
+            continue    # Another compose project that happens to use the same service name.
+        names = {os.path.basename(path.replace('\\', '/')) for path in config_files.split(',') if path}
+        matches = [(len(names & set(files)), stack) for stack, files in COMPOSE_STACKS.items()]
+        count, stack = max(matches)
+        if count:
+            owners[service] = stack
+    return owners
+
+def split_not_recreated(workdir, affected):
+    """
+    Moves services out of `affected` that must not be recreated through their stack:
+    ones that are not running (they read the new values whenever they are started, and
+    `up` would start them now) and ones whose container runs from the other stack.
+    Returns {(stack, service): reason}.
+    """
+    skipped = {}
+    if not affected:
+        return skipped
+    owners = running_owners(workdir)
+    for target in sorted(affected):
+        stack, service = target
+        if owners is None:
+            # Docker cannot tell; still recreate each service through one stack only.
+            if any(s != stack and name == service for (s, name) in affected if (s, name) < target):
+                affected.pop(target)
+                skipped[target] = 'docker cannot tell which stack runs it; recreated through one stack only'
+        elif service not in owners:
+            affected.pop(target)
+            skipped[target] = 'not running, will use the new values when started'
+        elif owners[service] != stack:
+            affected.pop(target)
+            skipped[target] = f'runs from the {owners[service]} stack'
+    return skipped
+
+def restart_commands(workdir, affected, contents=()):
+    commands = []
+    for stack in COMPOSE_STACKS:
+        services = sorted(service for (s, service) in affected if s == stack)
+        if services:
+            commands.append(compose_command(workdir, stack, contents) + ['up', '-d', '--no-deps', '--force-recreate'] + services)
+    return commands
+
+def print_plan(plan, dry_run):
+    print('Config sync plan' + (' (dry run)' if dry_run else '') + ':')
+    for name in plan['files']:
+        keys = plan['changes'].get(name)
+        action = 'write  ' if name in plan['writes'] else 'changed' if keys else 'same   '
+        if keys:
+            shown = ', '.join(key or '(whole file)' for key in keys[:8])
+            more = f' and {len(keys) - 8} more' if len(keys) > 8 else ''
+            print(f'  {action} {name}: {shown}{more}')
+        elif name in plan['writes']:
+            print(f'  {action} {name} (formatting only)')
+    if not plan['changes']:
+        print('  Nothing changed.')
+    if plan['affected']:
+        print('Services to recreate:')
+        for (stack, service), reasons in sorted(plan['affected'].items()):
+            shown = '; '.join(reasons[:4]) + (f' and {len(reasons) - 4} more' if len(reasons) > 4 else '')
+            print(f'  {service} ({stack}): {shown}')
+        for command in restart_commands(plan['workdir'], plan['affected'], plan['contents']):
+            print('  $ ' + ' '.join(command))
+    elif plan['changes']:
+        print('No running service consumes the changed keys; nothing to restart.')
+    if plan['skipped']:
+        print('Not recreated:')
+        for (stack, service), reason in sorted(plan['skipped'].items()):
+            print(f'  {service} ({stack}): {reason}')
+
+def remember_baseline(plan):
+    """
+    On the first run, stores the files as they are before writing, so changes that are
+    written but not yet restarted are still planned next time.
+    """
+    state = os.path.join(plan['workdir'], plan['state_dir'])
+    os.makedirs(state, exist_ok=True)
+    for name in plan['files']:
+        text = read_text(os.path.join(plan['workdir'], name))
+        if text is not None and not os.path.exists(os.path.join(state, name)):
+            write_if_changed(os.path.join(state, name), text)
+
+def remember_applied(plan):
+    """Stores the files as applied, so the next run only sees later changes."""
+    state = os.path.join(plan['workdir'], plan['state_dir'])
+    os.makedirs(state, exist_ok=True)
+    for name in plan['files']:
+        text = read_text(os.path.join(plan['workdir'], name))
+        if text is None:
+            if os.path.exists(os.path.join(state, name)):
+                os.remove(os.path.join(state, name))
+        else:
+            write_if_changed(os.path.join(state, name), text)
+
+def sync(workdir, env_template=None, env_output='.env', copies=(), dry_run=False, restart=True):
+    """Runs the whole sync; returns a process exit code."""
+    plan = build_plan(workdir, env_template, env_output, copies)
+    print_plan(plan, dry_run)
+    if dry_run:
+        return 0
+    remember_baseline(plan)
+    for name in plan['writes']:
+        write_if_changed(os.path.join(workdir, name), plan['contents'][name])
+        print(f'Wrote {name}.')
+    if not restart:
+        if plan['affected']:
+            print('Restart skipped (--no-restart); the changes will be planned again next time.')
+        return 0
+    for command in restart_commands(workdir, plan['affected'], plan['contents']):
+        print('Running: ' + ' '.join(command))
+        completed = subprocess.run(command, cwd=workdir)
+        if completed.returncode != 0:
+            print(f'Restart failed with exit code {completed.returncode}; the changes will be planned again next time.')
+            return completed.returncode
+    remember_applied(plan)
+    return 0
 
 if __name__ == "__main__":
     # Parse command-line arguments for input and output file paths
     parser = argparse.ArgumentParser(description='Update .env file with local environment variables.')
-    parser.add_argument('input_file_path', type=str, help='Path to the input .env file')
-    parser.add_argument('output_file_path', type=str, help='Path to the output .env file')
+    parser.add_argument('input_file_path', type=str, nargs='?', help='Path to the input .env file')
+    parser.add_argument('output_file_path', type=str, nargs='?', help='Path to the output .env file')
+    parser.add_argument('--sync', action='store_true',
+                        help='Diff all config files and recreate only the compose services that use changed keys')
+    parser.add_argument('--dry-run', action='store_true', help='With --sync: print the plan, change nothing')
+    parser.add_argument('--no-restart', action='store_true', help='With --sync: write files but restart nothing')
+    parser.add_argument('--copy', action='append', default=[], metavar='SOURCE:TARGET',
+                        help='With --sync: also sync TARGET from SOURCE, e.g. librechat.changed.yaml:librechat.yaml')
+    parser.add_argument('--workdir', default='.',
+                        help='LibreChat folder with the compose files; with --sync, the input, output and --copy '
+                             'paths are relative to it (default: current)')
     args = parser.parse_args()
 
+    if args.sync:
+        copies = [tuple(pair.split(':', 1)) for pair in args.copy]
+        sys.exit(sync(os.path.abspath(args.workdir), args.input_file_path, args.output_file_path or '.env', copies,
+                      dry_run=args.dry_run, restart=not args.no_restart))
+    if not args.input_file_path or not args.output_file_path:
+        parser.error('input_file_path and output_file_path are required without --sync')
+
     # Update the .env file with local environment variables
     update_env_file_with_local_env(args.input_file_path, args.output_file_path)